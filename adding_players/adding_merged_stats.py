@@ -1,25 +1,49 @@
-import firebase_admin
-from firebase_admin import credentials
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+
+# game_storage lives at the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from game_storage import open_storage
+
+# GAME_STORAGE picks the backend (Firestore by default, or e.g. sqlite:game_storage.sqlite)
+storage = open_storage()
+
+
+def bulk_upsert(collection, rows, merge=False):
+    # Batched writes (500 per commit, several commits in flight) instead of
+    # one round trip per row
+    start = time.perf_counter()
+    total = storage.upsert(collection, rows, merge=merge)
+    seconds = time.perf_counter() - start
+    print(f"{collection}: {total} rows in {seconds:.2f}s ({total / max(seconds, 1e-9):.0f} rows/s)")
+    return total
+
+
+def player_doc_id(row):
+    # The ID add_formatted_names_to_playerData gives the player, so loading
+    # the CSV again updates documents instead of adding duplicates
+    name = (row.get('Player') or '').strip()
+    if name:
+        return format_name_first_last(name)
+    return hashlib.sha1(json.dumps(row, sort_keys=True).encode()).hexdigest()[:20]
 
-cred = credentials.Certificate(r"C:\Users\taylo\Downloads\moneyball-a1cab-firebase-adminsdk-fbsvc-250a320975.json")
-firebase_admin.initialize_app(cred)
 
-from firebase_admin import firestore
-import csv
 def add_csv_to_playerData(csv_file_path):
-    db = firestore.client()
     with open(csv_file_path, newline='', encoding='utf-8') as csvfile:
         reader = csv.DictReader(csvfile)
-        for row in reader:
-            db.collection('playerData').add(dict(row))
+        # merge keeps the first/last names already stored for the player
+        return bulk_upsert('playerData', ((player_doc_id(row), dict(row)) for row in reader), merge=True)
 
 
 def format_name_first_last(name):
     parts = name.strip().split()
     return '_'.join(parts)
 
-def add_formatted_names_to_playerData(csv_file_path):
-        db = firestore.client()
+def player_data_rows(csv_file_path):
         with open(csv_file_path, newline='', encoding='utf-8') as csvfile:
             reader = csv.reader(csvfile)
             for row in reader:
@@ -33,7 +57,10 @@ def add_formatted_names_to_playerData(csv_file_path):
                         "first_name": firstname,
                         "last_name": lastname
                     }
-                    db.collection('playerData').document(formatted_name).set(doc_data)
+                    yield formatted_name, doc_data
+
+def add_formatted_names_to_playerData(csv_file_path):
+        return bulk_upsert('playerData', player_data_rows(csv_file_path), merge=True)
 
 def extract_column_2(input_csv, output_csv):
     with open(input_csv, newline='', encoding='utf-8') as infile, \
@@ -49,21 +76,31 @@ def extract_column_2(input_csv, output_csv):
 # Example usage:
 # extract_column_2('merged_baseball_stats.csv', 'column2_only.csv')
 # add_formatted_names_to_playerData('column2_only.csv')
-def count_playerData_documents():
-    db = firestore.client()
-    docs = db.collection('playerData').stream()
-    count = sum(1 for _ in docs)
+def count_playerData_documents(filters=None):
+    # Counted by the server (an aggregation query) instead of streaming every
+    # document; filters are (field, op, value), e.g. [('Position', '==', '2.0')]
+    count = storage.count('playerData', filters)
     print(f"Total documents in playerData: {count}")
     return count
 
 # count_playerData_documents()
 
 
+def delete_from_playerData(player=None, filters=None):
+    # One player's document by name, the documents matching filters, or
+    # everything; deleted in pages of batched writes
+    start = time.perf_counter()
+    if player is not None:
+        deleted = storage.delete('playerData', [format_name_first_last(player)])
+    else:
+        deleted = storage.delete_matching('playerData', filters)
+    seconds = time.perf_counter() - start
+    print(f"playerData: {deleted} deleted in {seconds:.2f}s ({deleted / max(seconds, 1e-9):.0f} rows/s)")
+    return deleted
+
+
 def delete_all_from_playerData():
-    db = firestore.client()
-    docs = db.collection('playerData').stream()
-    for doc in docs:
-        doc.reference.delete()
+    return delete_from_playerData()
 
 
 mlb_teams = [
@@ -220,15 +257,14 @@ mlb_teams = [
 ]
 
 def add_teams_to_firestore():
-    db = firestore.client()
-    for team in mlb_teams:
-        team_ref = db.collection('teams').document(team['abbreviation'])
-        team_ref.set({
-            'city': team['city'],
-            'name': team['name']
-        })
+    return bulk_upsert('teams', ((team['abbreviation'], {
+        'city': team['city'],
+        'name': team['name']
+    }) for team in mlb_teams))
 
-add_teams_to_firestore()
+if __name__ == "__main__":
+    add_teams_to_firestore()
 
 # Example usage:
-# delete_all_from_playerData()
\ No newline at end of file
+# delete_all_from_playerData()
+# delete_from_playerData('Jarren Duran')
\ No newline at end of file
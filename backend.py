@@ -1,19 +1,17 @@
 # app.py
-import firebase_admin
-from firebase_admin import credentials, firestore
 from flask import Flask, request, jsonify, render_template
 import pickle
 
+from game_storage import open_storage
+
 
 ## This is just sample code so we would need to change it so that it works with our database and models.
 
 # Init Flask
 app = Flask(__name__)
 
-# Init Firebase
-cred = credentials.Certificate('path/to/your-firebase-key.json')
-firebase_admin.initialize_app(cred)
-db = firestore.client()
+# Init storage (Firestore unless GAME_STORAGE points somewhere else)
+storage = open_storage()
 
 # Load your AI model
 model = pickle.load(open('useAnImportedModel.py', 'rb'))
@@ -27,14 +25,12 @@ def predict():
     data = request.json
     player_id = data['player_id']
 
-    # Get player data from Firestore (assume collection is "players")
-    doc = db.collection('players').document(player_id).get()
+    # Get player data from storage (assume collection is "players")
+    player_data = storage.get('players', player_id)
 
-    if not doc.exists:
+    if player_data is None:
         return jsonify({'error': 'Player not found'}), 404
 
-    player_data = doc.to_dict()
-
     # Extract features the model needs (example: age, pa, ab, hr, rbi)
     features = [
         player_data.get('age', 0),
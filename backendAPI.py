@@ -1,13 +1,45 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 from fastapi import FastAPI, HTTPException
+import numpy as np
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-# Import the helper functions and potentially the global model variable from useAnImportedModel
-# Import _model to check if it's loaded
-from useAnImportedModel import load_xgb_model, predict_with_loaded_model, get_expected_features_count, _model
+# Import the helper functions from useAnImportedModel
+# get_loaded_model() is checked per request; importing _model directly would
+# only ever see the value it had at import time (None)
+from useAnImportedModel import (load_xgb_model, predict_with_loaded_model, predict_batch_with_loaded_model,
+                                get_expected_features_count, get_loaded_model)
+from prediction_table import DEFAULT_MAX_AGE_HOURS, DEFAULT_TABLE_PATH, PredictionTable
 
 MODEL_PATH = "predict_BA.json"
 
+# Threads that run the full predictionModelV3 pipeline for /predict/player.
+# Kept small: each run is CPU heavy and XGBoost already uses several cores
+PIPELINE_WORKERS = int(os.environ.get("PIPELINE_WORKERS", 2))
+pipeline_pool = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline")
+
+# (player, stat, opponent) -> future of the run already in progress, so
+# identical concurrent requests wait on one computation
+_inflight: Dict[tuple, asyncio.Future] = {}
+
+def _game_storage():
+    # Imported on first use so startup doesn't pull in the model or Firestore
+    from predictionModelV3 import get_storage
+    return get_storage()
+
+
+# Precomputed predictions (see prediction_table.py); answered without
+# touching the pipeline when present and current: a table older than
+# PREDICTION_TABLE_MAX_AGE_HOURS, or a row older than the player's latest
+# game in gameStats, falls back to get_prediction
+prediction_table = PredictionTable(
+    os.environ.get("PREDICTION_TABLE_PATH", DEFAULT_TABLE_PATH),
+    max_age_hours=float(os.environ.get("PREDICTION_TABLE_MAX_AGE_HOURS", DEFAULT_MAX_AGE_HOURS)),
+    get_storage=_game_storage)
+
 # Init fast api
 app = FastAPI(
     title="Baseball prediction endpoint",
@@ -52,6 +84,46 @@ class PredictionOutput(BaseModel):
             }
         }
 
+# 3. Batch input: many rows in one request, either row by row or column by column
+
+
+class BatchPredictionInput(BaseModel):
+    rows: Optional[List[List[float]]] = Field(
+        None, description="One feature vector per row, in the model's feature order.")
+    # Columnar payloads repeat fewer brackets and commas for large batches
+    columns: Optional[List[List[float]]] = Field(
+        None, description="One list of values per feature, in the model's feature order.")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "rows": [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]]
+            }
+        }
+
+
+class BatchPredictionOutput(BaseModel):
+    predictions: List[float]
+    count: int
+    message: str = "Prediction successful"
+
+# 4. Name-based input: what the frontend's prediction form sends
+
+
+class PlayerPredictionInput(BaseModel):
+    player: str = Field(..., description="Player id as stored in playerData, e.g. jose_altuve.")
+    stat: str = Field(..., description="Stat to predict, e.g. H.")
+    opponent: str = Field(..., description="Opponent team abbreviation, e.g. SEA.")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "player": "jose_altuve",
+                "stat": "H",
+                "opponent": "SEA"
+            }
+        }
+
 # --- Load the model when the application starts ---
 # This is crucial for performance. The model is loaded only once.
 
@@ -62,20 +134,25 @@ async def startup_event():
     try:
         load_xgb_model(MODEL_PATH)
         expected_count = get_expected_features_count()
-        if _model:
+        if get_loaded_model():
             print(f"ML model '{MODEL_PATH}' loaded successfully.")
             if expected_count is not None:
                 print(f"Model expects {expected_count} features.")
             else:
                 print("Could not determine expected number of features from the model.")
         else:
-            raise RuntimeError("Model loading failed, _model is still None.")
+            raise RuntimeError("Model loading failed, no model is loaded.")
     except Exception as e:
         print(f"FATAL ERROR: Could not load the ML model at startup: {e}")
         # In a production environment, you might want to stop the server here
         # or have a health check that fails. For development, just log.
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    pipeline_pool.shutdown(wait=False, cancel_futures=True)
+
+
 # --- Root endpoint (optional, for health check or info) ---
 @app.get("/")
 async def read_root():
@@ -86,7 +163,7 @@ async def read_root():
 @app.post("/predict", response_model=PredictionOutput)  # Corrected syntax
 # input_data will be an instance of PredictionInput
 async def predict(input_data: PredictionInput):
-    if _model is None:
+    if get_loaded_model() is None:
         raise HTTPException(
             status_code=503, detail="Prediction model is not loaded. Please check server logs.")
 
@@ -109,3 +186,100 @@ async def predict(input_data: PredictionInput):
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"An unexpected error occurred during prediction: {e}")
+
+
+# --- Batch Prediction Endpoint ---
+@app.post("/predict/batch", response_model=BatchPredictionOutput)
+async def predict_batch(input_data: BatchPredictionInput):
+    if get_loaded_model() is None:
+        raise HTTPException(
+            status_code=503, detail="Prediction model is not loaded. Please check server logs.")
+
+    if (input_data.rows is None) == (input_data.columns is None):
+        raise HTTPException(
+            status_code=400, detail="Send exactly one of 'rows' or 'columns'.")
+
+    # Build the (n_rows, n_features) matrix once; ragged input fails here
+    try:
+        if input_data.rows is not None:
+            X = np.asarray(input_data.rows, dtype=np.float32)
+        else:
+            X = np.asarray(input_data.columns, dtype=np.float32).T
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail="All feature vectors must have the same length.")
+
+    if X.ndim != 2 or X.shape[0] == 0:
+        raise HTTPException(status_code=400, detail="No rows to predict.")
+
+    # One length check for the whole batch instead of one per row
+    expected_features_count = get_expected_features_count()
+    if expected_features_count is not None and X.shape[1] != expected_features_count:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid number of features. Expected {expected_features_count}, "
+                   f"but received {X.shape[1]}."
+        )
+
+    try:
+        predictions = predict_batch_with_loaded_model(X)
+        return BatchPredictionOutput(predictions=predictions.tolist(), count=len(predictions))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Input data error: {e}")
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {e}")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"An unexpected error occurred during prediction: {e}")
+
+
+# --- Name-Based Prediction Endpoint ---
+def _run_pipeline(player, stat, opponent):
+    # Imported on first use so the feature-vector endpoints don't need
+    # Firebase credentials
+    from predictionModelV3 import get_prediction
+
+    target_stats, prediction = get_prediction(player, stat, opponent)
+    return {target: float(value) for target, value in zip(target_stats, prediction)}
+
+
+async def _coalesced_prediction(player, stat, opponent):
+    key = (player, stat, opponent)
+    future = _inflight.get(key)
+    if future is None:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(pipeline_pool, _run_pipeline, player, stat, opponent)
+        _inflight[key] = future
+        future.add_done_callback(lambda _: _inflight.pop(key, None))
+    # shield: a client that disconnects must not cancel the run other
+    # requests are waiting on
+    return await asyncio.shield(future)
+
+
+@app.post("/predict/player", response_model=Dict[str, float])
+async def predict_player(input_data: PlayerPredictionInput):
+    # Same {stat: prediction} shape the frontend prints line by line
+    player = input_data.player.strip().lower()
+    stat = input_data.stat.strip()
+    opponent = input_data.opponent.strip().upper()
+
+    # An unknown stat is the caller's mistake, not a pipeline failure
+    from predictionModelV3 import check_stat
+    try:
+        check_stat(stat)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Input data error: {e}")
+
+    hit = prediction_table.lookup(player, stat, opponent)
+    if hit is not None:
+        target_stats, prediction = hit
+        return {target: float(value) for target, value in zip(target_stats, prediction)}
+
+    try:
+        return await _coalesced_prediction(player, stat, opponent)
+    except ValueError as e:
+        # e.g. "No data found for player: ..."
+        raise HTTPException(status_code=400, detail=f"Input data error: {e}")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"An unexpected error occurred during prediction: {e}")
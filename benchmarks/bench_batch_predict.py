@@ -0,0 +1,60 @@
+"""Compare rows per second of POST /predict and POST /predict/batch.
+
+Runs backendAPI in process through FastAPI's TestClient, so no server is
+needed:
+
+    python -m benchmarks.bench_batch_predict --rows 2000 --batch-size 500
+
+Batch predictions are checked against the single-row endpoint before the
+timings are printed.
+"""
+import argparse
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from backendAPI import app
+from useAnImportedModel import get_expected_features_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    with TestClient(app) as client:  # runs the startup event that loads the model
+        n_features = get_expected_features_count()
+        X = np.random.default_rng(0).random((args.rows, n_features)).round(3)
+
+        start = time.perf_counter()
+        single = []
+        for row in X.tolist():
+            response = client.post("/predict", json={"features": row})
+            response.raise_for_status()
+            single.append(response.json()["prediction"])
+        single_time = time.perf_counter() - start
+
+        timings = {}
+        for layout in ("rows", "columns"):
+            start = time.perf_counter()
+            batched = []
+            for i in range(0, args.rows, args.batch_size):
+                chunk = X[i:i + args.batch_size]
+                payload = chunk.tolist() if layout == "rows" else chunk.T.tolist()
+                response = client.post("/predict/batch", json={layout: payload})
+                response.raise_for_status()
+                batched.extend(response.json()["predictions"])
+            timings[layout] = time.perf_counter() - start
+            assert batched == single, f"/predict/batch ({layout}) differs from /predict"
+
+    print(f"Predictions identical for {args.rows} rows ({n_features} features)")
+    print(f"{'/predict:':<26} {args.rows / single_time:>10.0f} rows/s")
+    for layout, seconds in timings.items():
+        label = f"/predict/batch ({layout}):"
+        print(f"{label:<26} {args.rows / seconds:>10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
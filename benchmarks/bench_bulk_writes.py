@@ -0,0 +1,74 @@
+"""Compare one write per row with the batched playerData loader.
+
+Writes go to benchmarks/fake_firestore.py with a simulated round-trip
+latency, so nothing touches a real database:
+
+    python -m benchmarks.bench_bulk_writes --latency 0.02
+
+The batched loader is run twice to check that a reload updates the same
+documents instead of adding duplicates. The gameStats corpus is then
+upserted with one batch in flight and with WRITE_WORKERS in flight.
+"""
+import argparse
+import csv
+import time
+
+import adding_players.adding_merged_stats as loader
+import game_storage
+from benchmarks.corpus import iter_game_documents
+from benchmarks.fake_firestore import FakeFirestore
+from game_storage import FirestoreStorage
+
+
+def time_game_upsert(games, latency, workers):
+    game_storage.WRITE_WORKERS = workers
+    storage = FirestoreStorage(FakeFirestore(latency=latency))
+    start = time.perf_counter()
+    written = storage.upsert_games(games)
+    return written, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default="merged_baseball_stats.csv")
+    parser.add_argument("--games-dir", default="other_files")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per round trip")
+    args = parser.parse_args()
+
+    with open(args.csv, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+
+    # The old loader: collection.add() for every row, one after another
+    serial = FakeFirestore(latency=args.latency)
+    start = time.perf_counter()
+    for row in rows:
+        serial.collection('playerData').document().set(dict(row))
+    serial_time = time.perf_counter() - start
+
+    batched = FakeFirestore(latency=args.latency)
+    loader.storage = FirestoreStorage(batched)
+    start = time.perf_counter()
+    loader.add_csv_to_playerData(args.csv)
+    batched_time = time.perf_counter() - start
+    round_trips = batched.round_trips
+
+    loader.add_csv_to_playerData(args.csv)
+    documents = loader.storage.count('playerData')
+    assert documents == len({loader.player_doc_id(row) for row in rows}), "reload added documents"
+    print(f"Reload kept {documents} playerData documents for {len(rows)} rows")
+
+    print(f"{'One write per row:':<20} {serial_time:6.2f} s, {len(rows)} round trips, "
+          f"{len(rows) / serial_time:8.0f} rows/s")
+    print(f"{'Batched loader:':<20} {batched_time:6.2f} s, {round_trips} round trips, "
+          f"{len(rows) / batched_time:8.0f} rows/s")
+
+    games = list(iter_game_documents(args.games_dir))
+    default_workers = game_storage.WRITE_WORKERS
+    for workers in (1, default_workers):
+        written, seconds = time_game_upsert(games, args.latency, workers)
+        label = f"gameStats, {workers} in flight:"
+        print(f"{label:<28} {written} rows in {seconds:6.2f} s, {written / seconds:8.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
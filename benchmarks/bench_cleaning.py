@@ -0,0 +1,69 @@
+"""Compare the old per-cell regex cleaning with clean_game_frame.
+
+Uses the scraped CSVs on disk, so no database reads are made:
+
+    python -m benchmarks.bench_cleaning
+
+Every player's cleaned frame is checked against the old output before the
+timings are printed.
+"""
+import argparse
+import re
+import time
+
+import pandas as pd
+
+import predictionModelV3 as pm
+from benchmarks.corpus import load_player_records
+
+
+def legacy_clean(records):
+    # The loop fetch_and_clean_player_data used to run on every value
+    cleaned_data = []
+    for raw in records:
+        cleaned = {}
+        for key, val in raw.items():
+            val = str(val).strip()
+            if re.match(r'^-?\d+\.?\d*%$', val):  # percent values
+                cleaned[key] = float(val.replace('%', '')) / 100
+            elif re.match(r'^-?\d+\.?\d*$', val):  # numeric values
+                cleaned[key] = float(val)
+            else:
+                cleaned[key] = val  # categorical or other
+        cleaned_data.append(cleaned)
+    return pd.DataFrame(cleaned_data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv-dir", default="other_files")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    players = load_player_records(args.csv_dir)
+    games = sum(len(records) for records in players.values())
+
+    for records in players.values():
+        pd.testing.assert_frame_equal(
+            legacy_clean(records), pm.clean_game_frame(pd.DataFrame(records)))
+    print(f"Output identical for {len(players)} players ({games} games)")
+
+    legacy_best, vectorized_best = float('inf'), float('inf')
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for records in players.values():
+            legacy_clean(records)
+        legacy_best = min(legacy_best, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for records in players.values():
+            pm.clean_game_frame(pd.DataFrame(records))
+        vectorized_best = min(vectorized_best, time.perf_counter() - start)
+
+    print(f"{'Per-cell regex loop:':<22} {legacy_best:.3f} s")
+    print(f"{'clean_game_frame:':<22} {vectorized_best:.3f} s")
+    print(f"Speedup: {legacy_best / vectorized_best:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
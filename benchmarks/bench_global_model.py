@@ -0,0 +1,79 @@
+"""Compare per-player training with one global model per stat.
+
+Uses the local game-log store (build it first with `python game_log_store.py build`):
+
+    python -m benchmarks.bench_global_model --stat H --players 10 --holdout 5
+
+Times train_model for a sample of players and extrapolates to the league,
+then trains the global model without each player's last --holdout games
+and scores it on them against a rolling 3-game mean baseline.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import predictionModelV3 as pm
+from game_log_store import DEFAULT_STORE_PATH, load_league_games
+from global_model import (GlobalModels, encode, next_game_features, panel_features,
+                          train_global_model)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stat", default="H")
+    parser.add_argument("--players", type=int, default=10, help="players to time train_model on")
+    parser.add_argument("--holdout", type=int, default=5, help="last games per player held out")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH)
+    args = parser.parse_args()
+
+    games = load_league_games(args.store)
+    players = games['player'].value_counts()
+    sample = players.index[::max(len(players) // args.players, 1)][:args.players]
+
+    start = time.perf_counter()
+    for player in sample:
+        df = pm.fetch_and_clean_player_data(player, args.stat, store_path=args.store)
+        features, targets, _ = pm.prepare_features_and_targets(df, args.stat)
+        pm.train_model(features, targets)
+    per_player = (time.perf_counter() - start) / len(sample)
+
+    # Hold out each player's last games; everything before them trains
+    position_from_end = games.groupby('player').cumcount(ascending=False)
+    train_games = games[position_from_end >= args.holdout].reset_index(drop=True)
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        start = time.perf_counter()
+        train_global_model(train_games, args.stat, model_dir)
+        global_time = time.perf_counter() - start
+        model_size = os.path.getsize(os.path.join(model_dir, f"{args.stat}.json"))
+
+        # Predict each held-out game from the games before it; the model
+        # is never refit as those games are added
+        booster, categories = GlobalModels(model_dir).get(args.stat)
+        features, values = panel_features(games, args.stat)
+        held_out = ((position_from_end < args.holdout).to_numpy()
+                    & features.notna().all(axis=1).to_numpy() & values.notna().to_numpy())
+        start = time.perf_counter()
+        predictions = booster.inplace_predict(encode(features[held_out], categories))
+        predict_time = time.perf_counter() - start
+
+    actual = values[held_out].to_numpy()
+    baseline = features.loc[held_out, f'{args.stat}_rolling3'].to_numpy() / pm.ROLLING_WEIGHT
+    print(f"{'train_model per player:':<30} {per_player:.2f} s "
+          f"(x {len(players)} players = {per_player * len(players):.0f} s per stat)")
+    print(f"{'Global model:':<30} {global_time:.2f} s, {model_size / 1e6:.1f} MB per stat")
+    print(f"{'Held-out predictions:':<30} {held_out.sum()} games in {predict_time * 1000:.1f} ms")
+    print(f"{'Global MAE:':<30} {np.mean(np.abs(predictions - actual)):.4f}")
+    print(f"{'Rolling 3-game mean MAE:':<30} {np.mean(np.abs(baseline - actual)):.4f}")
+
+    # The serving path: one row built from the player's history
+    player = sample[0]
+    row = next_game_features(games[games['player'] == player], player, args.stat, "SEA")
+    print(f"Next game for {player} vs SEA: {booster.inplace_predict(encode(row, categories))[0]:.4f}")
+
+
+if __name__ == "__main__":
+    main()
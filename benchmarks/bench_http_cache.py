@@ -0,0 +1,130 @@
+"""Measure what a league re-scrape downloads with and without the scrapers' HTTP cache.
+
+A local server stands in for Baseball-Reference: every game-log and player
+URL returns shohei_ohtani.html with an ETag and Last-Modified, answers
+conditional requests with 304 and sleeps --latency per request:
+
+    python -m benchmarks.bench_http_cache --players 30
+
+The scrape (a player page, the seasons 2021 to this year and the postseason
+log for every player) runs four times: without a cache, into an empty
+cache, a day later (everything past its revalidation time) and after the
+current season's pages have changed on the server.
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from web_scraper.http_cache import HTTPCache, is_immutable
+
+
+class FakeSite(BaseHTTPRequestHandler):
+    body = b""
+    latency = 0.0
+    version = 0  # bumped to change every current-season page
+    hits = 0
+    bytes_sent = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        current = not is_immutable(self.path)
+        etag = hashlib.md5(f"{self.path}:{self.version if current else 0}".encode()).hexdigest()
+        etag = f'"{etag}"'
+        with self.lock:
+            FakeSite.hits += 1
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(usegmt=True))
+        self.end_headers()
+        self.wfile.write(self.body)
+        with self.lock:
+            FakeSite.bytes_sent += len(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def league_urls(base, players):
+    this_year = datetime.now().year
+    urls = []
+    for player in range(players):
+        urls.append(f"{base}/players/p/player{player:03d}.shtml")
+        for year in range(2021, this_year + 1):
+            urls.append(f"{base}/players/gl.fcgi?id=player{player:03d}&t=b&year={year}")
+        urls.append(f"{base}/players/gl.fcgi?id=player{player:03d}&t=b&year=0&post=1")
+    return urls
+
+
+def scrape(urls, session, cache=None):
+    # (seconds, requests, bytes) for fetching every URL once
+    hits, sent = FakeSite.hits, FakeSite.bytes_sent
+    start = time.perf_counter()
+    for url in urls:
+        if cache is None:
+            response = session.get(url, timeout=30)
+            response.raise_for_status()
+        else:
+            cache.get(url, session)
+    return time.perf_counter() - start, FakeSite.hits - hits, FakeSite.bytes_sent - sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per request")
+    parser.add_argument("--page", default="shohei_ohtani.html")
+    args = parser.parse_args()
+
+    with open(args.page, "rb") as f:
+        FakeSite.body = f.read()
+    FakeSite.latency = args.latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeSite)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = league_urls(f"http://127.0.0.1:{server.server_port}", args.players)
+    session = requests.Session()
+
+    def report(label, seconds, hits, sent):
+        print(f"{label:<34} {seconds:6.2f} s {hits:5} requests {sent / 1e6:8.1f} MB downloaded")
+
+    report("No cache:", *scrape(urls, session))
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = HTTPCache(os.path.join(tmp, "http_cache.sqlite"))
+        report("Empty cache:", *scrape(urls, session, cache))
+        report("Rerun, same day:", *scrape(urls, session, cache))
+
+        cache.revalidate_after = 0  # a day later, everything mutable is stale
+        seconds, hits, sent = scrape(urls, session, cache)
+        report("Rerun, a day later:", seconds, hits, sent)
+        assert sent == 0, "unchanged pages were downloaded again"
+
+        FakeSite.version += 1
+        seconds, hits, sent = scrape(urls, session, cache)
+        report("Rerun, current season changed:", seconds, hits, sent)
+        changed = sum(1 for url in urls if not is_immutable(url))
+        assert hits == sent / len(FakeSite.body) == changed, (hits, changed)
+
+        stats = cache.stats()
+        raw = len(FakeSite.body) * stats["pages"]
+        print(f"Cache: {stats['pages']} pages, {stats['immutable']} immutable, "
+              f"{stats['compressed_bytes'] / 1e6:.1f} MB on disk for {raw / 1e6:.1f} MB of HTML")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
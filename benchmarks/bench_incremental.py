@@ -0,0 +1,103 @@
+"""Compare daily full refits with incremental model updates.
+
+Replays the last few games of a player's history one day at a time through
+gameStats (benchmarks/fake_firestore.py loaded with the other_files/ CSVs),
+the way production sees them: the games are held back and each day's game
+is upserted before the player's history is read again:
+
+    python -m benchmarks.bench_incremental --player jose_altuve --days 10
+
+Each day either refits all trees or adds INCREMENTAL_ROUNDS trees to the
+previous day's model, then predicts that day's game from what is known
+before it is played (pregame_columns), so the two RMSEs compare real
+forecasts rather than a model reading the answer off the box score.
+gameStats returns a
+player's documents in ID order, so a player with a *_Postseason_* file
+only gets incremental updates if the history comes back sorted by date;
+the run fails if no day could be updated.
+"""
+import argparse
+import time
+
+import numpy as np
+
+import predictionModelV3 as pm
+from benchmarks.corpus import iter_game_documents
+from benchmarks.fake_firestore import FakeFirestore
+from game_storage import FirestoreStorage
+
+
+def held_back_storage(player, csv_dir, days):
+    # (gameStats without the player's last `days` games, those games oldest first)
+    docs = [(doc_id, row) for doc_id, row in iter_game_documents(csv_dir) if doc_id.startswith(f"{player}_")]
+    docs.sort(key=lambda doc: doc[1].get("Date", ""))
+    stored, held = docs[:-days], docs[-days:]
+    return FirestoreStorage(FakeFirestore({"gameStats": dict(stored)})), held
+
+
+def pregame_columns(features, stat):
+    # The stat's lags and rolling mean, the opponent, home/away and the
+    # postseason series. The game's own box score (the target among it) and
+    # the season rates it updates are left out
+    prefixes = (f"{stat}_lag", f"{stat}_rolling", "Opp_", "@/H_", "Series_")
+    return [col for col in features.columns if col.startswith(prefixes)]
+
+
+def features_from_storage(player, stat):
+    df = pm.fetch_and_clean_player_data(player, stat)
+    features, targets, _ = pm.prepare_features_and_targets(df, stat)
+    return features[pregame_columns(features, stat)], targets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--player", default="jose_altuve")
+    parser.add_argument("--stat", default="H")
+    parser.add_argument("--days", type=int, default=10)
+    parser.add_argument("--csv-dir", default="other_files")
+    args = parser.parse_args()
+
+    pm.storage, held = held_back_storage(args.player, args.csv_dir, args.days)
+    features, targets = features_from_storage(args.player, args.stat)
+
+    full_cpu, incremental_cpu = 0.0, 0.0
+    full_errors, incremental_errors = [], []
+    updates, refits = 0, 0
+
+    model = pm.BoosterModel(pm.model_boosters(
+        pm.train_model(features.iloc[:-1], targets.iloc[:-1])[0]))
+
+    for doc_id, row in held:
+        # The nightly scrape adds the game; everything before it is history
+        pm.storage.upsert_games([(doc_id, row)])
+        features, targets = features_from_storage(args.player, args.stat)
+        X, y = features.iloc[:-1], targets.iloc[:-1]
+        actual = targets.iloc[-1].values
+        next_game = features.iloc[[-1]]
+
+        start = time.process_time()
+        full_model, _ = pm.train_model(X, y)
+        full_cpu += time.process_time() - start
+        full_errors.append(full_model.predict(next_game)[0] - actual)
+
+        start = time.process_time()
+        new_rows = pm.incremental_rows(model, X, y)
+        if new_rows:
+            model = pm.update_model(model, X, y, new_rows)
+            updates += 1
+        else:
+            model = pm.BoosterModel(pm.model_boosters(pm.train_model(X, y)[0]))
+            refits += 1
+        incremental_cpu += time.process_time() - start
+        incremental_errors.append(model.predict(next_game)[0] - actual)
+
+    print(f"{args.player} {args.stat}: {args.days} daily refreshes "
+          f"({updates} incremental updates, {refits} full refits)")
+    print(f"{'Full refit CPU:':<20} {full_cpu:.2f} s   RMSE {np.sqrt(np.mean(np.square(full_errors))):.3f}")
+    print(f"{'Incremental CPU:':<20} {incremental_cpu:.2f} s   RMSE {np.sqrt(np.mean(np.square(incremental_errors))):.3f}")
+    print(f"CPU fraction: {incremental_cpu / full_cpu:.0%}")
+    assert updates, "no day was updated incrementally; is the history returned oldest game first?"
+
+
+if __name__ == "__main__":
+    main()
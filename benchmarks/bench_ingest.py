@@ -0,0 +1,84 @@
+"""Compare server.js-style row-by-row uploads with the parallel, resumable CSV ingestion.
+
+gameStats is benchmarks/fake_firestore.py with a simulated round-trip
+latency, so nothing touches a real database:
+
+    python -m benchmarks.bench_ingest --latency 0.02
+
+The row-by-row upload (one awaited set() per row, one file at a time) is
+timed on --sample-files files and extrapolated to the corpus. The ingestion
+then loads everything, is rerun to check the manifest skips every file, and
+is rerun after one file changes to check only that file is uploaded again.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.corpus import iter_game_documents
+from benchmarks.fake_firestore import FakeFirestore
+from game_log_store import parse_csv_with_header_fix
+from game_storage import FirestoreStorage, csv_paths, game_doc_id
+from ingest_game_logs import ingest
+
+
+def upload_row_by_row(db, paths):
+    # What uploadCSVFile does: one set() round trip per row
+    rows = 0
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for row in parse_csv_with_header_fix(f.read()):
+                db.collection("gameStats").document(game_doc_id(path, row)).set(row)
+                rows += 1
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games-dir", default="other_files")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per round trip")
+    parser.add_argument("--sample-files", type=int, default=3)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    files = list(csv_paths([args.games_dir]))
+    expected = dict(iter_game_documents(args.games_dir))
+
+    start = time.perf_counter()
+    sample_rows = upload_row_by_row(FakeFirestore(latency=args.latency), files[:args.sample_files])
+    per_row = (time.perf_counter() - start) / sample_rows
+    print(f"{'Row by row:':<26} {sample_rows} rows in {per_row * sample_rows:.2f}s, "
+          f"~{per_row * len(expected) / 60:.0f} min for {len(expected)} rows")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest = os.path.join(tmp, "manifest.json")
+        db = FakeFirestore(latency=args.latency)
+        storage = FirestoreStorage(db)
+
+        start = time.perf_counter()
+        ingested, skipped, rows = ingest([args.games_dir], storage, manifest, workers=args.workers)
+        print(f"{'Ingest:':<26} {rows} rows from {ingested} files in "
+              f"{time.perf_counter() - start:.2f}s, {db.round_trips} round trips")
+        stored = db.collection("gameStats")._collection.docs
+        assert stored == expected, "ingested documents differ from server.js's"
+
+        start = time.perf_counter()
+        ingested, skipped, rows = ingest([args.games_dir], storage, manifest, workers=args.workers)
+        print(f"{'Rerun, nothing changed:':<26} {ingested} files uploaded, {skipped} skipped in "
+              f"{time.perf_counter() - start:.2f}s")
+        assert ingested == 0 and rows == 0
+
+        # A copy of the corpus with one file rescraped
+        games_dir = os.path.join(tmp, "games")
+        shutil.copytree(args.games_dir, games_dir)
+        ingest([games_dir], storage, manifest, workers=args.workers)
+        with open(os.path.join(games_dir, os.path.basename(files[0])), "a", encoding="utf-8") as f:
+            f.write("\n")
+        ingested, skipped, rows = ingest([games_dir], storage, manifest, workers=args.workers)
+        print(f"{'Rerun, one file changed:':<26} {ingested} file uploaded, {skipped} skipped")
+        assert ingested == 1
+
+
+if __name__ == "__main__":
+    main()
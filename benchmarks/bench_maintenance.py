@@ -0,0 +1,111 @@
+"""Compare streamed counts and per-document deletes with aggregation counts and paged batch deletes.
+
+playerData and gameStats are served from benchmarks/fake_firestore.py with a
+simulated round-trip latency, so nothing touches a real database:
+
+    python -m benchmarks.bench_maintenance --latency 0.02
+
+Every filtered count and delete (one season, one player) is checked against
+the same selection made in Python, and against SQLiteStorage and
+MemoryStorage loaded with the same documents.
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+from benchmarks.corpus import iter_game_documents
+from benchmarks.fake_firestore import FakeFirestore
+from game_storage import (FirestoreStorage, MemoryStorage, SQLiteStorage, _matches,
+                          player_id_range, season_filters)
+
+
+def seeded(player_data, games, latency):
+    return FakeFirestore({"playerData": dict(player_data), "gameStats": dict(games)}, latency=latency)
+
+
+def measure(db, func):
+    # (result, seconds, round trips, documents read) for one call
+    round_trips, reads = db.round_trips, db.documents_read
+    start = time.perf_counter()
+    result = func()
+    return (result, time.perf_counter() - start,
+            db.round_trips - round_trips, db.documents_read - reads)
+
+
+def report(label, seconds, round_trips, reads):
+    print(f"{label:<34} {seconds:7.2f} s {round_trips:7} round trips {reads:7} reads")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default="merged_baseball_stats.csv")
+    parser.add_argument("--games-dir", default="other_files")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per round trip")
+    parser.add_argument("--season", default="2023")
+    parser.add_argument("--player", default="jose_altuve")
+    args = parser.parse_args()
+
+    with open(args.csv, newline='', encoding='utf-8') as f:
+        player_data = [("_".join(row["Player"].split()), row) for row in csv.DictReader(f)]
+    games = list(iter_game_documents(args.games_dir))
+
+    # === playerData: count and delete everything ===
+    db = seeded(player_data, games, args.latency)
+    storage = FirestoreStorage(db)
+    storage.count("teams")  # the first query imports the Firestore client library
+    streamed, *costs = measure(db, lambda: sum(
+        1 for _ in db.collection("playerData").select([]).stream()))
+    report("Streamed count:", *costs)
+    counted, *costs = measure(db, lambda: storage.count("playerData"))
+    report("Aggregation count:", *costs)
+    assert streamed == counted == len(dict(player_data)), (streamed, counted)
+
+    def delete_one_by_one():
+        doc_ids = [doc.id for doc in db.collection("playerData").select([]).stream()]
+        for doc_id in doc_ids:
+            db.collection("playerData").document(doc_id).delete()
+        return len(doc_ids)
+
+    deleted, *costs = measure(db, delete_one_by_one)
+    report(f"One delete per document ({deleted}):", *costs)
+
+    db = seeded(player_data, games, args.latency)
+    storage = FirestoreStorage(db)
+    deleted, *costs = measure(db, lambda: storage.delete_matching("playerData"))
+    report(f"Paged batch deletes ({deleted}):", *costs)
+    assert storage.count("playerData") == 0
+
+    # === gameStats: one season, one player ===
+    filters = season_filters(args.season)
+    expected_season = sum(1 for _, row in games if _matches(row, filters))
+    prefix = player_id_range(args.player)[0]
+    expected_player = sum(1 for doc_id, _ in games if doc_id.startswith(prefix))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {"firestore": storage, "sqlite": SQLiteStorage(os.path.join(tmp, "games.sqlite")),
+                    "memory": MemoryStorage()}
+        for name, backend in backends.items():
+            if name != "firestore":
+                backend.upsert("gameStats", games)
+            season = backend.count("gameStats", filters)
+            player = backend.count("gameStats", id_prefix=prefix)
+            assert (season, player) == (expected_season, expected_player), (name, season, player)
+
+            start = time.perf_counter()
+            deleted_season = backend.delete_matching("gameStats", filters)
+            deleted_player = backend.delete_matching("gameStats", id_prefix=prefix)
+            seconds = time.perf_counter() - start
+            left = backend.count("gameStats")
+            overlap = sum(1 for doc_id, row in games
+                          if doc_id.startswith(prefix) and _matches(row, filters))
+            assert deleted_season == expected_season, (name, deleted_season)
+            assert deleted_player == expected_player - overlap, (name, deleted_player)
+            assert left == len(games) - expected_season - expected_player + overlap, (name, left)
+            print(f"{name:<10} season {args.season}: {deleted_season} deleted, "
+                  f"{args.player}: {deleted_player} more, {left} left in {seconds:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
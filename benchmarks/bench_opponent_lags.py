@@ -0,0 +1,76 @@
+"""Compare add_opponent_lagged_stats per opponent with the all-opponent pass.
+
+Uses the local game-log store (build it first with `python game_log_store.py build`):
+
+    python -m benchmarks.bench_opponent_lags --player jose_altuve --stat H
+
+The vectorized columns are checked against the loop on every meeting row
+(the only rows the loop fills) before the timings are printed.
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import predictionModelV3 as pm
+from game_log_store import DEFAULT_STORE_PATH
+
+
+def legacy_all_opponents(features, stat):
+    # What getting every opponent's lags took before: one call per opponent
+    df = features.copy()
+    for col in [col for col in features.columns if col.startswith('Opp_')]:
+        df = pm.add_opponent_lagged_stats(df, stat, col[len('Opp_'):])
+    return df
+
+
+def best_of(repeat, func, *args):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--player", default="jose_altuve")
+    parser.add_argument("--stat", default="H")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH)
+    args = parser.parse_args()
+
+    df = pm.fetch_and_clean_player_data(args.player, args.stat, store_path=args.store)
+    features, _, _ = pm.prepare_features_and_targets(df, args.stat)
+    opp_cols = [col for col in features.columns if col.startswith('Opp_')]
+
+    with warnings.catch_warnings():
+        # The loop inserts 3 columns per opponent and fragments the frame
+        warnings.simplefilter("ignore", pd.errors.PerformanceWarning)
+        legacy, legacy_time = best_of(args.repeat, legacy_all_opponents, features, args.stat)
+    vectorized, vectorized_time = best_of(
+        args.repeat, pm.add_all_opponent_lagged_stats, features, args.stat)
+
+    for col in opp_cols:
+        meetings = features[col].to_numpy(dtype=bool)
+        for lag in pm.OPP_LAGS:
+            name = f"{args.stat}_vs_{col[len('Opp_'):]}_lag{lag}"
+            assert np.array_equal(legacy[name].to_numpy()[meetings],
+                                  vectorized[name].to_numpy()[meetings], equal_nan=True), \
+                f"{name} differs from add_opponent_lagged_stats"
+    added = len(opp_cols) * len(pm.OPP_LAGS)
+    print(f"{added} columns match the per-opponent loop on meeting rows "
+          f"({len(features)} games, {len(opp_cols)} opponents)")
+
+    print(f"{'Per-opponent loop:':<20} {legacy_time * 1000:8.1f} ms")
+    print(f"{'Vectorized:':<20} {vectorized_time * 1000:8.1f} ms "
+          f"({legacy_time / vectorized_time:.1f}x)")
+    print(f"Prediction row has {vectorized.iloc[-1, -added:].notna().sum()}/{added} "
+          f"values (loop: {legacy.iloc[-1, -added:].notna().sum()})")
+
+
+if __name__ == "__main__":
+    main()
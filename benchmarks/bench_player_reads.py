@@ -0,0 +1,58 @@
+"""Compare the documents a full gameStats scan reads with the player-scoped range query.
+
+    python -m benchmarks.bench_player_reads --csv-dir other_files
+
+gameStats is the CSV corpus loaded into the in-memory Firestore stand-in
+(benchmarks/fake_firestore.py), which bills reads the way Firestore does:
+one per document a query streams. Each column is that counter's increase
+over one query, not the number of games that came back, so a query that
+read more documents than it returned shows up here.
+"""
+import argparse
+import time
+
+import predictionModelV3 as pm
+from benchmarks.fake_firestore import load_game_stats
+from game_storage import FirestoreStorage
+
+DEFAULT_PLAYERS = ["leo_jimenez", "triston_casas", "matt_vierling", "jose_altuve"]
+
+
+def counted(db, query):
+    # (billed documents read, result, seconds) for one query
+    before = db.documents_read
+    start = time.perf_counter()
+    result = query()
+    return db.documents_read - before, result, time.perf_counter() - start
+
+
+def full_scan(db, player_name):
+    # The old approach: stream the whole collection and filter client side
+    return sum(1 for doc in db.collection("gameStats").stream() if doc.id.startswith(f"{player_name}_"))
+
+
+def scoped(player_name):
+    return len(pm.stream_player_games(player_name))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv-dir", default="other_files")
+    parser.add_argument("--players", nargs="+", default=DEFAULT_PLAYERS)
+    args = parser.parse_args()
+
+    db = load_game_stats(args.csv_dir)
+    pm.storage = FirestoreStorage(db)
+    scoped(args.players[0])  # first query pays for lazy imports
+
+    print(f"{'Player':<18} {'Games':>6} {'Scan reads':>11} {'Scan s':>8} {'Scoped reads':>13} {'Scoped s':>9}")
+    print('-' * 70)
+    for player in args.players:
+        scan_reads, games, scan_time = counted(db, lambda: full_scan(db, player))
+        scoped_reads, scoped_games, scoped_time = counted(db, lambda: scoped(player))
+        assert scoped_games == games, f"{player}: scoped query returned {scoped_games} games, scan found {games}"
+        print(f"{player:<18} {games:>6} {scan_reads:>11} {scan_time:>8.3f} {scoped_reads:>13} {scoped_time:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Time every stage of the prediction path offline and compare with a baseline.
+
+gameStats is served from memory (benchmarks/fake_firestore.py) loaded with
+the other_files/ CSVs, and /predict runs through FastAPI's TestClient, so
+no credentials, network or server are needed:
+
+    python -m benchmarks.bench_suite                      # compare with the baseline
+    python -m benchmarks.bench_suite --update-baseline    # record a new baseline
+
+Needs Python 3.12+ (predictionModelV3 and backendAPI use its f-strings).
+Each stage's time is the median of --repeat runs, summed over the players,
+after one untimed warm-up pass. Wall-clock times only compare on the same
+hardware and interpreter, so the baseline file keeps one baseline per host
+(CPU model, CPU count and Python version). A stage more than --tolerance
+slower than this host's baseline is a regression and makes the run exit
+non-zero; on a host with no baseline nothing is compared.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import predictionModelV3 as pm
+from benchmarks.check_import_time import eager_imports
+from benchmarks.fake_firestore import load_game_stats
+from game_storage import FirestoreStorage
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "bench_suite.json")
+DEFAULT_PLAYERS = ["jose_altuve", "leo_jimenez", "triston_casas", "matt_vierling"]
+
+STAGES = ["fetch", "clean", "add_lagged_features", "prepare_features_and_targets",
+          "train_model", "predict", "api_predict"]
+
+
+def median_time(func, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def time_player(player, stat, repeat):
+    # One player through every stage of get_prediction, timed separately
+    stages = {}
+    stages["fetch"], raw = median_time(
+        lambda: pd.DataFrame(pm.stream_player_games(player)), repeat)
+    stages["clean"], _ = median_time(lambda: pm.clean_game_frame(raw), repeat)
+
+    games = pm.load_clean_games(player)
+    stages["add_lagged_features"], lagged = median_time(
+        lambda: pm.add_lagged_features(games.copy(), [stat], lags=pm.LAGS), repeat)
+    df = lagged.dropna().reset_index(drop=True)
+    stages["prepare_features_and_targets"], (features, targets, _) = median_time(
+        lambda: pm.prepare_features_and_targets(df, stat), repeat)
+
+    stages["train_model"], (model, _) = median_time(
+        lambda: pm.train_model(features, targets), repeat)
+    row = pm.add_user_input_opponent(features.copy(), "SEA").iloc[[-1]]
+    stages["predict"], _ = median_time(lambda: model.predict(row), repeat)
+    return stages
+
+
+def time_api(requests, repeat):
+    # Single-row /predict with the saved model backendAPI loads at startup
+    from fastapi.testclient import TestClient
+
+    from backendAPI import app
+    from useAnImportedModel import get_expected_features_count
+
+    with TestClient(app) as client:
+        rows = np.random.default_rng(0).random(
+            (requests, get_expected_features_count())).round(3).tolist()
+
+        def post_all():
+            for row in rows:
+                client.post("/predict", json={"features": row}).raise_for_status()
+
+        seconds, _ = median_time(post_all, repeat)
+    return seconds
+
+
+def git_commit():
+    # HEAD, with "-dirty" when tracked files have uncommitted changes
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty", "--abbrev=7"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def cpu_model():
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def host_key():
+    # Baselines are only compared on the host they were recorded on
+    return f"{cpu_model()}, {os.cpu_count()} cpus, Python {platform.python_version()}"
+
+
+def load_baselines(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)["hosts"]
+
+
+def compare(results, baseline, tolerance):
+    # Prints stage by stage; returns the stages that got slower than allowed
+    print(f"{'Stage':<30} {'baseline':>10} {'now':>10} {'ratio':>7}")
+    regressions = []
+    for stage in STAGES:
+        now, before = results["stages"].get(stage), baseline["stages"].get(stage)
+        if now is None or not before:
+            print(f"{stage:<30} {'-':>10} {now * 1000 if now else 0:>8.1f}ms")
+            continue
+        ratio = now / before
+        flag = "  REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"{stage:<30} {before * 1000:>8.1f}ms {now * 1000:>8.1f}ms {ratio:>6.2f}x{flag}")
+        if flag:
+            regressions.append(stage)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", nargs="+", default=DEFAULT_PLAYERS)
+    parser.add_argument("--stat", default="H")
+    parser.add_argument("--csv-dir", default="other_files")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--api-requests", type=int, default=200)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown per stage, 0.25 = 25%%")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    # Startup must not pull in the model or Firestore packages again
+    eager = {module: eager_imports(module) for module in ("predictionModelV3", "backendAPI")}
+    eager = {module: names for module, names in eager.items() if names}
+    if eager:
+        sys.exit("FAIL: imported at startup: " + "; ".join(
+            f"{module} -> {', '.join(names)}" for module, names in eager.items()))
+
+    # The Firestore backend's paged queries, served from memory
+    pm.storage = FirestoreStorage(load_game_stats(args.csv_dir))
+    time_player(args.players[0], args.stat, 1)  # lazy imports and first-call setup
+
+    stages = dict.fromkeys(STAGES, 0.0)
+    for player in args.players:
+        for stage, seconds in time_player(player, args.stat, args.repeat).items():
+            stages[stage] += seconds
+    stages["api_predict"] = time_api(args.api_requests, args.repeat)
+
+    results = {
+        "commit": git_commit(),
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": f"{cpu_model()}, {os.cpu_count()} cpus",
+        "players": args.players,
+        "stat": args.stat,
+        "repeat": args.repeat,
+        "api_requests": args.api_requests,
+        "stages": stages,
+    }
+
+    host = host_key()
+    baselines = load_baselines(args.baseline)
+    if args.update_baseline:
+        baselines[host] = results
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({"hosts": baselines}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline for {results['commit']} on {host} written to {args.baseline}")
+        for stage in STAGES:
+            print(f"{stage:<30} {stages[stage] * 1000:>8.1f}ms")
+        return
+
+    baseline = baselines.get(host)
+    if baseline is None:
+        print(f"WARNING: no baseline for this host ({host}) in {args.baseline}; nothing compared. "
+              f"Record one with --update-baseline on a commit you trust.")
+        for stage in STAGES:
+            print(f"{stage:<30} {stages[stage] * 1000:>8.1f}ms")
+        return
+    print(f"Comparing {results['commit']} with baseline {baseline['commit']} "
+          f"({baseline['recorded_at']}, {host})")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"FAIL: {', '.join(regressions)} slower than the baseline by more than "
+              f"{args.tolerance:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Time pulling the batting game log out of saved Baseball-Reference game-log pages.
+
+    python -m benchmarks.bench_table_extract --pages saved/altuvjo01_2024.html
+    python -m benchmarks.bench_table_extract --cache     # rendered game logs in the HTTP cache
+
+Each page must be a browser-rendered game log (gl.fcgi) with the genuine
+<pre id="csv_players_standard_batting"> the CSV button leaves; that <pre>
+is the expected output for everything below. The page is read two ways:
+as saved, and as plain HTTP would return it (no <pre>, the table inside
+an HTML comment). Each is extracted by parsing the whole page into a
+soup (what table_to_csv used to be given), by a SoupStrainer parse where
+that can work, and by cutting out the element's markup and parsing only
+that. Every result must be byte-for-byte the file the <pre> gives.
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from web_scraper.table_extract import (BATTING_PRE_ID, BATTING_TABLE_ID, GAME_LOG_URL_PREFIX,
+                                       batting_csv_lines, csv_file_text, element_markup,
+                                       table_csv_lines)
+
+
+def full_soup(html):
+    return batting_csv_lines(BeautifulSoup(html, "html.parser"), from_table=True)
+
+
+def targeted(html):
+    return batting_csv_lines(html, from_table=True)
+
+
+def strainer(html):
+    # A strainer sees neither comment contents nor the <pre>'s sibling table,
+    # so it only applies to a page whose elements are rendered
+    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer(["pre", "table"]))
+    pre_tag = soup.find("pre", id=BATTING_PRE_ID)
+    if pre_tag is not None:
+        return pre_tag.get_text().strip().splitlines()
+    return table_csv_lines(soup.find("table", id=BATTING_TABLE_ID))
+
+
+def pre_lines(html):
+    # The genuine <pre>'s CSV lines
+    pre = BeautifulSoup(element_markup(html, "pre", BATTING_PRE_ID), "html.parser").pre
+    return pre.get_text().strip().splitlines()
+
+
+def variants(html):
+    # The saved page, and the same page as plain HTTP serves it
+    pre = element_markup(html, "pre", BATTING_PRE_ID)
+    table = element_markup(html, "table", BATTING_TABLE_ID)
+    if pre is None or table is None:
+        return None
+    return {
+        "rendered, <pre>": html,
+        "HTTP, table in comment": html.replace(pre, "").replace(table, f"<!--\n{table}\n-->"),
+    }
+
+
+def timed(extract, html, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        lines = extract(html)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), lines
+
+
+def load_pages(paths, from_cache):
+    pages = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            pages.append((path, f.read()))
+    if from_cache:
+        from web_scraper.http_cache import default_cache
+
+        cache = default_cache()
+        pages.extend((url, cache.lookup(url)["text"]) for url in cache.urls(GAME_LOG_URL_PREFIX))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", nargs="*", default=[], help="saved game-log pages with the CSV <pre>")
+    parser.add_argument("--cache", action="store_true", help="also use the game logs in the HTTP cache")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    checked, mismatches = 0, []
+    for source, html in load_pages(args.pages, args.cache):
+        pages = variants(html)
+        if pages is None:
+            print(f"{source}: skipped, not a rendered game log with both the <pre> and the table")
+            continue
+        expected = csv_file_text(pre_lines(html))
+        print(f"{source}: {len(html) / 1e6:.2f} MB, {expected.count(chr(10))} lines")
+        for label, page in pages.items():
+            full_seconds, lines = timed(full_soup, page, args.repeat)
+            row = f"  {label:<24} full soup {full_seconds * 1000:7.1f} ms"
+            results = [("full soup", lines)]
+            targeted_seconds, lines = timed(targeted, page, args.repeat)
+            row += f"   targeted {targeted_seconds * 1000:6.1f} ms ({full_seconds / targeted_seconds:4.0f}x)"
+            results.append(("targeted", lines))
+            if label.startswith("rendered"):
+                strained_seconds, lines = timed(strainer, page, args.repeat)
+                row += f"   strainer {strained_seconds * 1000:6.1f} ms"
+                results.append(("strainer", lines))
+            print(row)
+            for method, lines in results:
+                if lines is None or csv_file_text(lines) != expected:
+                    mismatches.append(f"{source} ({label}, {method})")
+        checked += 1
+
+    if not checked:
+        sys.exit("No rendered game-log page to benchmark: pass --pages or scrape a season with Chrome "
+                 "and use --cache")
+    if mismatches:
+        sys.exit("Differs from the page's <pre>: " + "; ".join(mismatches))
+
+
+if __name__ == "__main__":
+    main()
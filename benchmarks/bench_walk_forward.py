@@ -0,0 +1,69 @@
+"""Compare the old fit-per-window loop with the walk-forward engine.
+
+Uses the local game-log store (build it first with `python game_log_store.py build`):
+
+    python -m benchmarks.bench_walk_forward --player jose_altuve --games 150 --jobs 4
+
+The sequential engine's scores are checked against the old loop bit for bit
+before the timings are printed.
+"""
+import argparse
+import time
+
+import numpy as np
+import xgboost as xgb
+from sklearn.metrics import r2_score
+from sklearn.multioutput import MultiOutputRegressor
+
+import predictionModelV3 as pm
+from game_log_store import DEFAULT_STORE_PATH
+from walk_forward import run_walk_forward
+
+
+def legacy_walk_forward(features, targets, weights, window=10, val_window=5):
+    # The loop walk_forward_validation used to run
+    r2_scores = []
+    for i in range(window, len(features) - val_window):
+        model = MultiOutputRegressor(
+            xgb.XGBRegressor(objective='reg:squarederror'))
+        model.fit(features.iloc[:i], targets.iloc[:i], sample_weight=weights[:i])
+        y_pred = model.predict(features.iloc[i:i + val_window])
+        r2_scores.append(r2_score(targets.iloc[i:i + val_window], y_pred,
+                                  multioutput='uniform_average'))
+    return r2_scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--player", default="jose_altuve")
+    parser.add_argument("--stat", default="H")
+    parser.add_argument("--games", type=int, default=150, help="validate on the first N games")
+    parser.add_argument("--jobs", type=int, default=-1, help="pool size for the parallel run")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH)
+    args = parser.parse_args()
+
+    df = pm.fetch_and_clean_player_data(args.player, args.stat, store_path=args.store)
+    features, targets, _ = pm.prepare_features_and_targets(df, args.stat)
+    features, targets = features.iloc[:args.games], targets.iloc[:args.games]
+    weights = np.linspace(1, 3, num=len(features))
+
+    start = time.perf_counter()
+    legacy = legacy_walk_forward(features, targets, weights)
+    legacy_time = time.perf_counter() - start
+
+    sequential = run_walk_forward(features, targets, weights, n_jobs=1)
+    assert np.array_equal(np.array(legacy), sequential['r2'].to_numpy()), \
+        "sequential engine differs from the old loop"
+    print(f"Sequential scores identical to the old loop ({len(legacy)} windows)")
+
+    parallel = run_walk_forward(features, targets, weights, n_jobs=args.jobs)
+
+    print(f"{'Old loop:':<22} {legacy_time:.2f} s")
+    print(f"{'Engine, 1 job:':<22} {sequential.attrs['wall_seconds']:.2f} s")
+    parallel_label = f"Engine, {parallel.attrs['n_jobs']} jobs:"
+    print(f"{parallel_label:<22} {parallel.attrs['wall_seconds']:.2f} s")
+    print(f"Average R2 {sequential['r2'].mean():.4f}, average MSE {sequential['mse'].mean():.4f}")
+
+
+if __name__ == "__main__":
+    main()
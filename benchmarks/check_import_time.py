@@ -0,0 +1,84 @@
+"""Fail when importing predictionModelV3 gets slower than the startup budget.
+
+    python -m benchmarks.check_import_time --budget-ms 1000
+
+Imports the module with `python -X importtime` in a fresh interpreter
+without FIREBASE_KEY_PATH, prints the slowest imports and exits non-zero
+when the best of --runs is over budget or a deferred package (xgboost,
+scikit-learn, firebase_admin) is imported eagerly again. The deferred
+packages are also checked in sys.modules after importing each of
+--check-modules (predictionModelV3 and backendAPI); bench_suite runs
+that check on every run too.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed once a model is trained or Firestore is read
+DEFERRED = ["xgboost", "sklearn", "firebase_admin", "google.cloud.firestore"]
+
+
+def _clean_env():
+    return {key: value for key, value in os.environ.items() if key != "FIREBASE_KEY_PATH"}
+
+
+def eager_imports(module):
+    # Deferred packages in sys.modules right after a cold `import module`
+    code = f"import sys, {module}; print(' '.join(m for m in {DEFERRED!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=_clean_env(),
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return result.stdout.split()
+
+
+def import_times(module):
+    # {imported module: cumulative microseconds} for one cold import
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, env=_clean_env(), capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    times = {}
+    for line in result.stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="predictionModelV3")
+    parser.add_argument("--budget-ms", type=float, default=1000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--check-modules", nargs="+", default=["predictionModelV3", "backendAPI"],
+                        help="modules that must import without the deferred packages")
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    times = min(runs, key=lambda run: run[args.module])
+    total_ms = times[args.module] / 1000
+
+    print(f"Slowest imports under {args.module}:")
+    for name, us in sorted(times.items(), key=lambda item: -item[1])[:8]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    eager = [name for name in DEFERRED if name in times]
+    for module in args.check_modules:
+        eager += [f"{name} (by {module})" for name in eager_imports(module)]
+    print(f"import {args.module}: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms, best of {args.runs})")
+    if eager:
+        print(f"FAIL: imported at startup: {', '.join(eager)}")
+    if total_ms > args.budget_ms:
+        print("FAIL: over the import-time budget")
+    sys.exit(1 if eager or total_ms > args.budget_ms else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Helpers for loading the scraped game-log CSVs the way server.js uploads them."""
+import glob
+import os
+import re
+
+from game_log_store import parse_csv_with_header_fix
+
+# "jose_altuve_2024.csv" / "jose_altuve_Postseason.csv" -> "jose_altuve"
+SEASON_SUFFIX = re.compile(r'_(\d{4}|Postseason)\.csv$')
+
+
+def iter_game_documents(csv_dir):
+    # Yields (document ID, row) pairs using server.js's "{file}_{date}" IDs
+    for path in sorted(glob.glob(os.path.join(csv_dir, "*.csv"))):
+        file_name = os.path.basename(path)
+        with open(path, encoding="utf-8") as f:
+            rows = parse_csv_with_header_fix(f.read())
+        for row in rows:
+            date = row.get("Date") or next(iter(row.values()))
+            yield f"{file_name.replace('.csv', '')}_{date}", row
+
+
+def load_player_records(csv_dir):
+    # Groups the corpus into {player_name: [raw game dicts]}
+    players = {}
+    for path in sorted(glob.glob(os.path.join(csv_dir, "*.csv"))):
+        player = SEASON_SUFFIX.sub('', os.path.basename(path))
+        with open(path, encoding="utf-8") as f:
+            players.setdefault(player, []).extend(parse_csv_with_header_fix(f.read()))
+    return players
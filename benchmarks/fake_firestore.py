@@ -0,0 +1,210 @@
+"""In-memory stand-in for the Firestore calls the pipeline makes.
+
+Supports what FirestoreStorage uses: document-ID ordering, start_at /
+end_at / start_after cursors, where() field filters, select() projections,
+limit(), count() aggregations, document get/set/delete and write batches.
+Documents are kept sorted by ID, so a range query is two bisects like the
+real index. `latency` adds a sleep per network round trip (a query page, a
+single write, a batch commit or an aggregation), and `documents_read` counts
+billed reads: one per streamed document, one per 1000 counted.
+"""
+import bisect
+import itertools
+import math
+import threading
+import time
+import uuid
+
+from benchmarks.corpus import iter_game_documents
+from game_storage import FILTER_OPS
+
+
+class FakeDocument:
+    def __init__(self, doc_id, data, fields=None):
+        self.id = doc_id
+        self._data = data
+        self._fields = fields
+        self.exists = data is not None
+
+    def to_dict(self):
+        if self._data is None:
+            return None
+        if self._fields is None:
+            return dict(self._data)
+        return {field: self._data[field] for field in self._fields if field in self._data}
+
+
+class FakeCollection:
+    def __init__(self, db, documents=None):
+        self.db = db
+        self.ids = sorted(documents or {})
+        self.docs = dict(documents or {})
+
+    def _set(self, doc_id, data, merge=False):
+        if doc_id not in self.docs:
+            bisect.insort(self.ids, doc_id)
+            self.docs[doc_id] = {}
+        self.docs[doc_id] = {**self.docs[doc_id], **data} if merge else dict(data)
+
+    def _delete(self, doc_id):
+        if self.docs.pop(doc_id, None) is not None:
+            self.ids.pop(bisect.bisect_left(self.ids, doc_id))
+
+
+class FakeReference:
+    def __init__(self, collection, doc_id):
+        self._collection = collection
+        self.id = doc_id
+
+    def get(self):
+        self._collection.db.round_trip()
+        return FakeDocument(self.id, self._collection.docs.get(self.id))
+
+    def set(self, data, merge=False):
+        self._collection.db.round_trip()
+        with self._collection.db.lock:
+            self._collection._set(self.id, data, merge)
+
+    def delete(self):
+        self._collection.db.round_trip()
+        with self._collection.db.lock:
+            self._collection._delete(self.id)
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self._db = db
+        self._writes = []
+
+    def set(self, reference, data, merge=False):
+        self._writes.append((reference, data, merge))
+
+    def delete(self, reference):
+        self._writes.append((reference, None, False))
+
+    def commit(self):
+        self._db.round_trip()
+        with self._db.lock:
+            for reference, data, merge in self._writes:
+                if data is None:
+                    reference._collection._delete(reference.id)
+                else:
+                    reference._collection._set(reference.id, data, merge)
+
+
+class FakeAggregationResult:
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeCountQuery:
+    def __init__(self, query):
+        self._query = query
+
+    def get(self):
+        db = self._query._collection.db
+        db.round_trip()
+        with db.lock:
+            value = sum(1 for _ in self._query._matching())
+        db.read(max(1, math.ceil(value / 1000)))
+        return [[FakeAggregationResult(value)]]
+
+
+class FakeQuery:
+    def __init__(self, collection, start=None, end=None, after=None, fields=None, count=None,
+                 filters=()):
+        self._collection = collection
+        self._start, self._end, self._after = start, end, after
+        self._fields, self._count = fields, count
+        self._filters = filters
+
+    def _with(self, **changes):
+        state = dict(start=self._start, end=self._end, after=self._after,
+                     fields=self._fields, count=self._count, filters=self._filters)
+        state.update(changes)
+        return FakeQuery(self._collection, **state)
+
+    def document(self, doc_id=None):
+        return FakeReference(self._collection, doc_id or uuid.uuid4().hex[:20])
+
+    def order_by(self, field_path):
+        return self  # documents are always in ID order
+
+    def start_at(self, values):
+        return self._with(start=values[0])
+
+    def end_at(self, values):
+        return self._with(end=values[0])
+
+    def start_after(self, doc):
+        return self._with(after=doc.id)
+
+    def select(self, fields):
+        return self._with(fields=list(fields))
+
+    def limit(self, count):
+        return self._with(count=count)
+
+    def where(self, filter):
+        condition = (filter.field_path, FILTER_OPS[filter.op_string], filter.value)
+        return self._with(filters=self._filters + (condition,))
+
+    def count(self):
+        return FakeCountQuery(self)
+
+    def _matching(self):
+        # IDs in range and passing every filter, in ID order
+        ids, docs = self._collection.ids, self._collection.docs
+        lo = 0 if self._start is None else bisect.bisect_left(ids, self._start)
+        if self._after is not None:
+            lo = max(lo, bisect.bisect_right(ids, self._after))
+        hi = len(ids) if self._end is None else bisect.bisect_right(ids, self._end)
+        for doc_id in ids[lo:hi]:
+            data = docs[doc_id]
+            if all(field in data and compare(data[field], value)
+                   for field, compare, value in self._filters):
+                yield doc_id
+
+    def stream(self):
+        db = self._collection.db
+        db.round_trip()
+        with db.lock:
+            doc_ids = list(itertools.islice(self._matching(), self._count))
+        db.read(len(doc_ids))
+        docs = self._collection.docs
+        for doc_id in doc_ids:
+            yield FakeDocument(doc_id, docs.get(doc_id), self._fields)
+
+
+class FakeFirestore:
+    def __init__(self, collections=None, latency=0.0):
+        # collections: {collection name: {document ID: data}}
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.round_trips = 0
+        self.documents_read = 0
+        self._collections = {name: FakeCollection(self, documents)
+                             for name, documents in (collections or {}).items()}
+
+    def round_trip(self):
+        with self.lock:
+            self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def read(self, documents):
+        with self.lock:
+            self.documents_read += documents
+
+    def collection(self, name):
+        with self.lock:
+            collection = self._collections.setdefault(name, FakeCollection(self))
+        return FakeQuery(collection)
+
+    def batch(self):
+        return FakeBatch(self)
+
+
+def load_game_stats(csv_dir):
+    # gameStats as server.js would have uploaded the CSVs in csv_dir
+    return FakeFirestore({"gameStats": dict(iter_game_documents(csv_dir))})
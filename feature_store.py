@@ -0,0 +1,305 @@
+import argparse
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Materialized model inputs per player and stat, saved as
+# "{store}/{player}/{stat}.pkl" together with the state needed to extend
+# them when games are appended
+DEFAULT_FEATURE_STORE_PATH = "feature_store"
+
+# add_lagged_features looks back at most this many games (lag3, rolling3)
+CARRY_GAMES = 3
+
+# === Fingerprint the Game History ===
+
+
+def games_fingerprint(games, columns, categories, first_game=0):
+    # Position-weighted sum of per-row hashes over the columns features are
+    # built from: order sensitive, and an append only needs the new rows
+    # (first_game = games already counted) added to the stored value
+    if games.empty:
+        return 0
+    numeric = [col for col in columns if col not in categories]
+    matrix = np.empty((len(games), len(columns)), dtype=np.float64)
+    matrix[:, :len(numeric)] = games[numeric].to_numpy(dtype=np.float64)
+    for i, col in enumerate(col for col in columns if col in categories):
+        # Category code (-1 for anything unseen) instead of hashing strings
+        matrix[:, len(numeric) + i] = pd.Index(categories[col]).get_indexer(
+            games[col].to_numpy(dtype=object))
+
+    # Odd per-column multipliers make any single edited value change the row hash
+    multipliers = np.arange(1, 2 * len(columns) + 1, 2, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    row_hashes = (matrix.view(np.uint64) * multipliers).sum(axis=1, dtype=np.uint64)
+    positions = np.arange(first_game + 1, first_game + len(games) + 1, dtype=np.uint64)
+    return int((row_hashes * positions).sum(dtype=np.uint64))
+
+
+def _dtype_signature(games):
+    return {col: str(dtype) for col, dtype in games.dtypes.items()}
+
+# === Full Recompute ===
+
+
+def full_features(games, stat):
+    # Exactly what fetch_and_clean_player_data + prepare_features_and_targets
+    # produce from the cleaned games, plus how each one-hot column was made
+    import predictionModelV3 as pm
+
+    lagged = pm.add_lagged_features(games.copy(), [stat], lags=pm.LAGS)
+    lagged = lagged.dropna().reset_index(drop=True)
+    features, targets, _ = pm.prepare_features_and_targets(lagged, stat)
+
+    # Columns prepare_features_and_targets one-hot encodes, with every
+    # category seen; get_dummies names them "{col}_{category}" and drops
+    # the first (sorted) category
+    encoded = [col for col in lagged.columns
+               if col not in pm.FEATURE_DROP_COLS and lagged[col].dtype not in ('float64', 'int64')]
+    categories = {col: pd.Categorical(lagged[col]).categories.tolist() for col in encoded}
+    dummies = {f"{col}_{category}": (col, category)
+               for col, cats in categories.items() for category in cats[1:]}
+
+    # Every feature must be either a dummy or a copied game column to
+    # extend it without re-running prepare_features_and_targets
+    lag_columns = [col for col in lagged.columns if col not in games.columns]
+    copied = [name for name in features.columns if name not in dummies and name not in lag_columns]
+    if not all(name in games.columns for name in copied):
+        dummies = None
+
+    # The game columns the features depend on; the rest (Date, Team, ...)
+    # are dropped and can't change the features
+    sources = sorted(set(encoded) | set(copied) | {stat})
+    return features, targets, {'categories': categories, 'dummies': dummies, 'sources': sources}
+
+# === Per-Player Feature Store ===
+
+
+class FeatureStore:
+    """Persisted lagged/one-hot features that grow with a player's game log.
+
+    Appended games only cost their own rows: the lags and rolling mean are
+    extended from the last CARRY_GAMES values of the stat, and the one-hot
+    columns reuse the category sets already seen. Anything that isn't a
+    plain append (edited history, a new column or category) rebuilds.
+    """
+
+    def __init__(self, path=DEFAULT_FEATURE_STORE_PATH):
+        self.path = path
+        self.appends = 0
+        self.rebuilds = 0
+        self.hits = 0
+
+    def _file(self, player, stat):
+        return os.path.join(self.path, player, f"{stat}.pkl")
+
+    def _load(self, player, stat):
+        try:
+            with open(self._file(player, stat), "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None, None, None
+        return entry['state'], entry['features'], entry['targets']
+
+    def _save(self, player, stat, state, features, targets):
+        path = self._file(player, stat)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so a concurrent reader never sees half a file;
+        # the temp name is per writer since pipeline threads can race here
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({'state': state, 'features': features, 'targets': targets}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def rebuild(self, player, stat, games):
+        features, targets, encoding = full_features(games, stat)
+        state = {
+            'games': len(games),
+            'fingerprint': games_fingerprint(games, encoding['sources'], encoding['categories']),
+            'dtypes': _dtype_signature(games),
+            'carry': games[stat].iloc[-CARRY_GAMES:].tolist(),
+            **encoding,
+        }
+        self._save(player, stat, state, features, targets)
+        self.rebuilds += 1
+        return features, targets
+
+    def _extend(self, state, features, new_games, stat):
+        # Feature rows for new_games only, or None if they can't be appended
+        import predictionModelV3 as pm
+
+        if state['dummies'] is None or len(state['carry']) < CARRY_GAMES:
+            return None
+        source = {col: new_games[col].to_numpy(dtype=object) for col in state['categories']}
+        for col, categories in state['categories'].items():
+            if not pd.Series(source[col]).isin(categories).all():
+                return None  # e.g. first game against a new opponent
+
+        # add_lagged_features for the new games, from the carried values
+        values = np.array(state['carry'] + new_games[stat].tolist(), dtype=np.float64)
+        rows = np.arange(CARRY_GAMES, len(values))
+        lags = {f'{stat}_lag{lag}': values[rows - lag] * pm.LAG_WEIGHTS.get(lag, 1)
+                for lag in pm.LAGS}
+        lags[f'{stat}_rolling3'] = (values[rows - 3] + values[rows - 2] + values[rows - 1]) / 3 \
+            * pm.ROLLING_WEIGHT
+
+        # Rows fetch_and_clean_player_data's dropna() would remove
+        keep = ~new_games.isna().any(axis=1).to_numpy()
+        for values in lags.values():
+            keep &= ~np.isnan(values)
+
+        # Same columns prepare_features_and_targets builds, row by row
+        columns = {}
+        for name, dtype in features.dtypes.items():
+            if name in state['dummies']:
+                col, category = state['dummies'][name]
+                values = source[col] == category
+            elif name in lags:
+                values = lags[name]
+            else:
+                values = new_games[name].to_numpy()
+            columns[name] = values[keep].astype(dtype)
+        tail_features = pd.DataFrame(columns, columns=features.columns).fillna(0)
+        tail_targets = pd.DataFrame(
+            {stat: pd.to_numeric(new_games[stat].to_numpy()[keep], errors='coerce')}).fillna(0)
+        return tail_features, tail_targets
+
+    def _append(self, player, stat, state, features, targets, new_games, tail):
+        features = pd.concat([features, tail[0]], ignore_index=True)
+        targets = pd.concat([targets, tail[1]], ignore_index=True)
+        state.update(
+            games=state['games'] + len(new_games),
+            fingerprint=(state['fingerprint'] + games_fingerprint(
+                new_games, state['sources'], state['categories'], state['games'])) % 2**64,
+            carry=(state['carry'] + new_games[stat].tolist())[-CARRY_GAMES:],
+        )
+        self._save(player, stat, state, features, targets)
+        self.appends += 1
+        return features, targets
+
+    def append(self, player, stat, new_games):
+        # Extend the stored features with games played after the stored
+        # ones, without needing the rest of the history
+        state, features, targets = self._load(player, stat)
+        if state is None:
+            raise ValueError(f"No stored features for {player} {stat}; rebuild first")
+        tail = None
+        if _dtype_signature(new_games) == state['dtypes']:
+            tail = self._extend(state, features, new_games, stat)
+        if tail is None:
+            raise ValueError(f"New games for {player} {stat} are not a plain append")
+        return self._append(player, stat, state, features, targets, new_games, tail)
+
+    def features_for(self, player, stat, games):
+        """(features, targets, target_stats) for the player's cleaned games.
+
+        Same output as prepare_features_and_targets(fetch_and_clean_player_data(...)).
+        """
+        state, features, targets = self._load(player, stat)
+        seen = state['games'] if state else 0
+
+        # Only a plain append of games to an unchanged history is extended
+        tail = None
+        if (state is not None and len(games) >= seen
+                and _dtype_signature(games) == state['dtypes']
+                and games_fingerprint(games.iloc[:seen], state['sources'],
+                                      state['categories']) == state['fingerprint']):
+            if seen == len(games):
+                self.hits += 1
+                return features, targets, [stat]
+            tail = self._extend(state, features, games.iloc[seen:], stat)
+
+        if tail is None:
+            features, targets = self.rebuild(player, stat, games)
+        else:
+            features, targets = self._append(
+                player, stat, state, features, targets, games.iloc[seen:], tail)
+        return features, targets, [stat]
+
+    def check(self, player, stat, games):
+        # Stored features must equal a full recompute from the same games.
+        # Lags and one-hot columns match bit for bit; the rolling mean can
+        # differ in the last bits because pandas keeps a running sum over
+        # the whole series, hence the float tolerance.
+        features, targets, _ = self.features_for(player, stat, games)
+        expected_features, expected_targets, _ = full_features(games, stat)
+        pd.testing.assert_frame_equal(features, expected_features, rtol=1e-9, atol=1e-12)
+        pd.testing.assert_frame_equal(targets, expected_targets, check_exact=True)
+
+
+def replay_check(store, player, stat, games, start):
+    # Build from the first `start` games, then add one game at a time and
+    # compare with a full recompute after every step
+    store.rebuild(player, stat, games.iloc[:start])
+    append_time, full_time = 0.0, 0.0
+    for end in range(start + 1, len(games) + 1):
+        t = time.perf_counter()
+        store.features_for(player, stat, games.iloc[:end])
+        append_time += time.perf_counter() - t
+
+        t = time.perf_counter()
+        full_features(games.iloc[:end], stat)
+        full_time += time.perf_counter() - t
+
+        store.check(player, stat, games.iloc[:end])
+    return append_time, full_time
+
+
+def gamestats_replay_check(store, player, stat, csv_paths, count):
+    # The same replay read back through gameStats the way predictions load
+    # games: the player's last `count` games are held back and upserted one
+    # at a time into an in-memory copy of the CSVs. History must come back
+    # unchanged each time, so the store has to extend rather than rebuild
+    import predictionModelV3 as pm
+    from game_storage import MemoryStorage, csv_game_rows
+
+    rows = [(doc_id, row) for doc_id, row in csv_game_rows(csv_paths) if doc_id.startswith(f"{player}_")]
+    rows.sort(key=lambda doc: doc[1].get("Date", ""))
+    pm.storage = MemoryStorage()
+    pm.storage.upsert_games(rows[:-count])
+    store.rebuild(player, stat, pm.load_clean_games(player))
+    appends = store.appends
+    for row in rows[-count:]:
+        pm.storage.upsert_games([row])
+        store.check(player, stat, pm.load_clean_games(player))
+    if store.appends == appends:
+        raise AssertionError(f"{player} {stat}: no game read from gameStats was appended; "
+                             f"is the history returned oldest game first?")
+    return store.appends - appends
+
+
+if __name__ == "__main__":
+    from game_log_store import DEFAULT_STORE_PATH
+
+    parser = argparse.ArgumentParser(
+        description="Check incremental features against a full recompute.")
+    parser.add_argument("--players", nargs="+", default=["jose_altuve"])
+    parser.add_argument("--stats", nargs="+", default=["H"])
+    parser.add_argument("--games", type=int, default=20, help="games to append one at a time")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="local game-log store to read")
+    parser.add_argument("--path", default=os.path.join("/tmp", "feature_store_check"))
+    parser.add_argument("--gamestats", nargs="+", metavar="CSV",
+                        help="read games through gameStats (in memory, loaded from these CSVs or folders) "
+                             "instead of the store, upserting the appended games one at a time")
+    args = parser.parse_args()
+
+    import predictionModelV3 as pm
+
+    store = FeatureStore(args.path)
+    for player in args.players:
+        if args.gamestats:
+            for stat in args.stats:
+                appended = gamestats_replay_check(store, player, stat, args.gamestats, args.games)
+                print(f"{player} {stat}: {args.games} games upserted into gameStats, "
+                      f"{appended} appended to the stored features, all match a full recompute")
+            continue
+        games = pm.load_clean_games(player, store_path=args.store)
+        for stat in args.stats:
+            append_time, full_time = replay_check(store, player, stat, games, len(games) - args.games)
+            print(f"{player} {stat}: {args.games} appends match a full recompute "
+                  f"(features_for {append_time:.2f}s, full recompute {full_time:.2f}s)")
+    print(f"appends={store.appends} rebuilds={store.rebuilds} hits={store.hits}")
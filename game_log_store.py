@@ -0,0 +1,186 @@
+import argparse
+import glob
+import os
+import re
+import shutil
+import time
+
+import pandas as pd
+
+# Folders the scrapers drop per-player, per-season CSVs into
+DEFAULT_SOURCE_DIRS = ["other_files", "other_other_files", "scraped_files"]
+
+# Where the compiled Parquet store lives: one folder per season, each file
+# sorted by player so a player lookup only opens the row groups it needs
+DEFAULT_STORE_PATH = "game_log_store"
+ROW_GROUP_SIZE = 4000
+
+# "jose_altuve_2024.csv" -> ("jose_altuve", "2024"), "jose_altuve_Postseason.csv" -> ("jose_altuve", "Postseason")
+CSV_NAME_PATTERN = re.compile(r'^(?P<player>.+)_(?P<label>\d{4}|Postseason)\.csv$')
+
+# Bookkeeping columns added to every stored game
+STORE_COLS = ['player', 'season', 'postseason']
+
+# === Game Log Column Schema ===
+
+# How each known Baseball-Reference game-log column is stored in gameStats.
+# 'text' columns are only stripped, 'numeric' columns are checked for plain
+# numbers and 'percent' columns for "x%" strings. Columns missing from the
+# schema are checked for both.
+GAME_LOG_SCHEMA = {
+    **{col: 'text' for col in ['Date', 'Team', 'Opp', 'Result', 'Inngs', 'Pos', 'Series']},
+    **{col: 'numeric' for col in ['Rk', 'Gcar', 'Gtm', 'PA', 'AB', 'R', 'H', '2B', '3B', 'HR',
+                                  'RBI', 'SB', 'CS', 'BB', 'SO', 'BA', 'OBP', 'SLG', 'OPS', 'TB',
+                                  'GIDP', 'HBP', 'SH', 'SF', 'IBB', 'BAbip', 'aLI', 'WPA', 'acLI',
+                                  'RE24', 'BOP', 'DFS(DK)', 'DFS(FD)']},
+    'cWPA': 'percent',
+}
+
+# === Read Scraped CSVs ===
+
+
+def parse_csv_with_header_fix(csv_text, placeholder="@/H"):
+    # Same parsing as parseCSVWithHeaderFix in server.js, so rows match the
+    # gameStats documents: blank headers become "@/H_{index}" and the last
+    # line (season totals) is dropped
+    lines = csv_text.strip().split("\n")
+    headers = [h.strip() or f"{placeholder}_{i}" for i, h in enumerate(lines[0].split(","))]
+    rows = []
+    for line in lines[1:]:
+        values = line.split(",")
+        rows.append({h: values[i].strip() if i < len(values) else "" for i, h in enumerate(headers)})
+    return rows[:-1]
+
+
+def type_game_columns(df):
+    # Give every known column its real type; unknown columns stay text
+    for col in df.columns:
+        kind = GAME_LOG_SCHEMA.get(col)
+        if kind == 'numeric':
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+        elif kind == 'percent':
+            df[col] = pd.to_numeric(
+                df[col].str.rstrip('%'), errors='coerce').astype('float64') / 100
+    return df
+
+
+def read_game_log_csv(path):
+    # Raw rows of one scraped CSV, tagged with the player and postseason flag
+    match = CSV_NAME_PATTERN.match(os.path.basename(path))
+    if not match:
+        return None
+
+    with open(path, encoding="utf-8") as f:
+        df = pd.DataFrame(parse_csv_with_header_fix(f.read()))
+    if df.empty or 'Gcar' not in df.columns:
+        return None
+
+    df['player'] = match.group('player')
+    df['postseason'] = match.group('label') == 'Postseason'
+    return df
+
+# === Build the Store ===
+
+
+def build_store(source_dirs=DEFAULT_SOURCE_DIRS, store_path=DEFAULT_STORE_PATH):
+    start = time.perf_counter()
+
+    frames = []
+    for source_dir in source_dirs:
+        for path in sorted(glob.glob(os.path.join(source_dir, "*.csv"))):
+            df = read_game_log_csv(path)
+            if df is not None:
+                frames.append(df)
+
+    if not frames:
+        raise ValueError(f"No game-log CSVs found in {source_dirs}")
+
+    # Type the whole corpus at once rather than file by file
+    games = type_game_columns(pd.concat(frames, ignore_index=True))
+
+    # Trade notes and repeated header lines have no career game number
+    games = games[games['Gcar'].notna()]
+
+    # Postseason files span several years, so take the season from the date
+    # ("2024-07-12" or "2024-07-12 (2)" for the second game of a doubleheader)
+    games = games.assign(season=pd.to_numeric(games['Date'].str[:4], errors='coerce'))
+    games = games[games['season'].notna()].astype({'season': 'int64'})
+
+    # The same game can be scraped more than once; keep the newest copy
+    before = len(games)
+    games = games.drop_duplicates(
+        subset=['player', 'postseason', 'Gcar'], keep='last')
+
+    # Rebuild from scratch so removed CSVs don't leave stale partitions
+    if os.path.exists(store_path):
+        shutil.rmtree(store_path)
+    games = games.sort_values(['season', 'player', 'postseason', 'Gcar'])
+    games.to_parquet(store_path, partition_cols=['season'],
+                     row_group_size=ROW_GROUP_SIZE, index=False)
+
+    print(f"Stored {len(games)} games ({before - len(games)} duplicates dropped) "
+          f"for {games['player'].nunique()} players in {store_path} "
+          f"({time.perf_counter() - start:.1f}s)")
+    return len(games)
+
+# === Load from the Store ===
+
+
+def _read_store(store_path, filters=None):
+    import pyarrow.dataset as ds
+
+    if not os.path.exists(store_path):
+        raise FileNotFoundError(
+            f"No game-log store at {store_path}. Build it with: python game_log_store.py build")
+
+    dataset = ds.dataset(store_path, format="parquet", partitioning="hive")
+    df = dataset.to_table(filter=filters).to_pandas()
+    if df.empty:
+        return df
+
+    # The season folder name comes back as a categorical
+    df['season'] = df['season'].astype('int64')
+
+    # Columns a player never had (e.g. DFS before 2022) are all empty
+    df = df.dropna(axis=1, how='all')
+
+    # Chronological order, regular season before postseason on the same date
+    return df.sort_values(['Date', 'postseason', 'Gcar'], kind='stable').reset_index(drop=True)
+
+
+def load_player_games(player_name, store_path=DEFAULT_STORE_PATH):
+    # Row-group statistics let Arrow skip every other player's rows
+    import pyarrow.dataset as ds
+
+    df = _read_store(store_path, filters=ds.field('player') == player_name)
+    if df.empty:
+        raise ValueError(f"No data found for player: {player_name}")
+
+    # Same columns as a gameStats document
+    return df.drop(columns=STORE_COLS)
+
+
+def load_league_games(store_path=DEFAULT_STORE_PATH, players=None):
+    # Every stored game, optionally limited to a list of players
+    import pyarrow.dataset as ds
+
+    filters = ds.field('player').isin(players) if players else None
+    return _read_store(store_path, filters=filters)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compile the scraped game-log CSVs into a local Parquet store.")
+    parser.add_argument("command", choices=["build", "show"])
+    parser.add_argument("--source", nargs="+", default=DEFAULT_SOURCE_DIRS)
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH)
+    parser.add_argument("--player", help="player to show, e.g. jose_altuve")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_store(args.source, args.store)
+    else:
+        start = time.perf_counter()
+        games = load_player_games(args.player, args.store) if args.player else load_league_games(args.store)
+        print(games.tail())
+        print(f"\nLoaded {len(games)} games in {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,583 @@
+import argparse
+import bisect
+import json
+import operator
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Where gameStats, playerData and teams are read from and written to:
+# "firestore" (default), "sqlite:{path}" or "memory". Set GAME_STORAGE to
+# point the whole pipeline at a local copy for batch jobs.
+DEFAULT_STORAGE = "firestore"
+DEFAULT_SQLITE_PATH = "game_storage.sqlite"
+
+# Number of documents fetched per round trip when paging through a player's games
+GAME_STATS_PAGE_SIZE = 200
+
+# Firestore's limit on writes in one batch
+FIRESTORE_BATCH_LIMIT = 500
+
+# Players whose games are fetched at once by games_for_players
+PLAYER_READ_WORKERS = 8
+
+# Write batches committed at once by FirestoreStorage
+WRITE_WORKERS = 8
+
+# Comparisons count() and delete_matching() accept in filters, spelled the
+# way Firestore's where() spells them
+FILTER_OPS = {"==": operator.eq, "!=": operator.ne, "<": operator.lt,
+              "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+# === Firestore Client ===
+_firestore = None
+_firestore_lock = threading.Lock()
+
+
+def firestore_client():
+    # Created on first use and shared afterwards, so importing this module
+    # needs neither firebase_admin nor a credential file
+    global _firestore
+    if _firestore is None:
+        with _firestore_lock:
+            if _firestore is None:
+                import firebase_admin
+                from firebase_admin import credentials, firestore
+                from dotenv import load_dotenv
+
+                # Retrieve the firebase key path from environment variables
+                load_dotenv()
+                firebase_key_path = os.environ.get("FIREBASE_KEY_PATH")
+                if not firebase_key_path:
+                    raise ValueError(
+                        "No Firebase key path found. Please set FIREBASE_KEY_PATH in your environment or .env file.")
+
+                # Another module (e.g. backend.py) may have set up the app already
+                if not firebase_admin._apps:
+                    firebase_admin.initialize_app(credentials.Certificate(firebase_key_path))
+                _firestore = firestore.client()
+    return _firestore
+
+
+def prefix_id_range(prefix):
+    # First and last possible document ID starting with prefix
+    return prefix, f"{prefix}\uf8ff"
+
+
+def player_id_range(player_name):
+    # gameStats document IDs look like "{player}_{season}_{date}"
+    return prefix_id_range(f"{player_name}_")
+
+
+def season_filters(season):
+    # gameStats rows from one season, postseason included, going by Date
+    return [("Date", ">=", f"{season}-01-01"), ("Date", "<=", f"{season}-12-31")]
+
+
+def _project(data, fields):
+    if fields is None:
+        return data
+    return {field: data[field] for field in fields if field in data}
+
+
+def _check_filters(filters):
+    for _, op, _ in filters or ():
+        if op not in FILTER_OPS:
+            raise ValueError(f"Unsupported filter '{op}'. Use one of {', '.join(FILTER_OPS)}.")
+
+
+def _matches(data, filters):
+    return all(field in data and FILTER_OPS[op](data[field], value)
+               for field, op, value in filters or ())
+
+# === Storage Interface ===
+
+
+class GameStorage:
+    """Documents by collection and ID, the way the Firestore collections are laid out.
+
+    Subclasses implement get, documents, _id_range, upsert, delete, count
+    and delete_matching; the gameStats helpers are built on those.
+    """
+
+    def get(self, collection, doc_id):
+        raise NotImplementedError
+
+    def documents(self, collection, fields=None):
+        # Every (id, data) pair in the collection
+        raise NotImplementedError
+
+    def _id_range(self, collection, start, end, fields=None):
+        # (id, data) pairs with start <= id <= end, in ID order
+        raise NotImplementedError
+
+    def upsert(self, collection, rows, merge=False):
+        # rows are (id, data) pairs; an id of None gets a generated one.
+        # Existing documents are replaced like Firestore's set(), or have
+        # the given fields updated with merge=True
+        raise NotImplementedError
+
+    def delete(self, collection, doc_ids):
+        raise NotImplementedError
+
+    def count(self, collection, filters=None, id_prefix=None):
+        # Documents whose ID starts with id_prefix and whose fields pass
+        # every (field, op, value) in filters; all of them by default
+        raise NotImplementedError
+
+    def delete_matching(self, collection, filters=None, id_prefix=None):
+        # Deletes what count() would count and returns how many went
+        raise NotImplementedError
+
+    def games_for_player(self, player_name, fields=None):
+        # One player's gameStats rows in document-ID order
+        start, end = player_id_range(player_name)
+        return [data for _, data in self._id_range("gameStats", start, end, fields)]
+
+    def games_for_players(self, player_names, fields=None):
+        return {player: self.games_for_player(player, fields) for player in player_names}
+
+    def upsert_games(self, rows):
+        return self.upsert("gameStats", rows)
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+# === Firestore ===
+
+
+class FirestoreStorage(GameStorage):
+    def __init__(self, db=None, page_size=GAME_STATS_PAGE_SIZE):
+        self._db = db
+        self.page_size = page_size
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = firestore_client()
+        return self._db
+
+    def get(self, collection, doc_id):
+        snapshot = self.db.collection(collection).document(doc_id).get()
+        return snapshot.to_dict() if snapshot.exists else None
+
+    def documents(self, collection, fields=None):
+        query = self.db.collection(collection)
+        if fields is not None:
+            query = query.select(fields)
+        for doc in query.stream():
+            yield doc.id, doc.to_dict()
+
+    def _id_range(self, collection, start, end, fields=None):
+        # A document-ID range query only reads the matching documents, not
+        # the whole collection
+        from google.cloud.firestore_v1.field_path import FieldPath
+
+        query = (self.db.collection(collection)
+                 .order_by(FieldPath.document_id())
+                 .start_at([start])
+                 .end_at([end]))
+
+        # Optional projection so callers only pay for the columns they use
+        if fields:
+            query = query.select(fields)
+
+        # Page through the results with cursors instead of one long stream
+        last_doc = None
+        while True:
+            page = query.limit(self.page_size)
+            if last_doc is not None:
+                page = page.start_after(last_doc)
+
+            docs = list(page.stream())
+            for doc in docs:
+                yield doc.id, doc.to_dict()
+
+            if len(docs) < self.page_size:
+                break
+            last_doc = docs[-1]
+
+    def games_for_players(self, player_names, fields=None):
+        # One range query per player, several in flight at a time
+        player_names = list(player_names)
+        if not player_names:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(PLAYER_READ_WORKERS, len(player_names))) as pool:
+            games = pool.map(lambda player: self.games_for_player(player, fields), player_names)
+            return dict(zip(player_names, games))
+
+    def _write(self, collection, rows, write):
+        # write(batch, reference, data) for every (id, data) row. Rows go out
+        # FIRESTORE_BATCH_LIMIT to a batch with up to WRITE_WORKERS batches
+        # committing at once; one write per row would be a round trip each
+        ref = self.db.collection(collection)
+
+        def commit(chunk):
+            batch = self.db.batch()
+            for doc_id, data in chunk:
+                write(batch, ref.document(doc_id) if doc_id is not None else ref.document(), data)
+            batch.commit()
+            return len(chunk)
+
+        total, pending = 0, set()
+        with ThreadPoolExecutor(max_workers=WRITE_WORKERS) as pool:
+            for chunk in _chunks(rows, FIRESTORE_BATCH_LIMIT):
+                # Bounded so a huge load isn't all queued in memory at once
+                if len(pending) >= 2 * WRITE_WORKERS:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    total += sum(future.result() for future in done)
+                pending.add(pool.submit(commit, chunk))
+            total += sum(future.result() for future in pending)
+        return total
+
+    def upsert(self, collection, rows, merge=False):
+        return self._write(collection, rows,
+                           lambda batch, reference, data: batch.set(reference, data, merge=merge))
+
+    def delete(self, collection, doc_ids):
+        return self._write(collection, ((doc_id, None) for doc_id in doc_ids),
+                           lambda batch, reference, _: batch.delete(reference))
+
+    def _matching(self, collection, filters=None, id_prefix=None):
+        from google.cloud.firestore_v1.base_query import FieldFilter
+        from google.cloud.firestore_v1.field_path import FieldPath
+
+        _check_filters(filters)
+        query = self.db.collection(collection)
+        if id_prefix:
+            start, end = prefix_id_range(id_prefix)
+            query = query.order_by(FieldPath.document_id()).start_at([start]).end_at([end])
+        # An ID prefix together with a field filter needs a composite index
+        for field, op, value in filters or ():
+            query = query.where(filter=FieldFilter(field, op, value))
+        return query
+
+    def count(self, collection, filters=None, id_prefix=None):
+        # An aggregation query: the server counts the index entries and sends
+        # back one number instead of streaming every document
+        result = self._matching(collection, filters, id_prefix).count().get()
+        return int(result[0][0].value)
+
+    def delete_matching(self, collection, filters=None, id_prefix=None,
+                        page_size=FIRESTORE_BATCH_LIMIT * WRITE_WORKERS):
+        # Pages of IDs only (no fields), each page deleted in concurrent
+        # batches, so neither the documents nor the ID list are ever held whole
+        query = self._matching(collection, filters, id_prefix).select([])
+        total, last_doc = 0, None
+        while True:
+            page = query.limit(page_size)
+            if last_doc is not None:
+                page = page.start_after(last_doc)
+
+            docs = list(page.stream())
+            total += self.delete(collection, (doc.id for doc in docs))
+
+            if len(docs) < page_size:
+                return total
+            last_doc = docs[-1]
+
+# === SQLite ===
+
+
+class SQLiteStorage(GameStorage):
+    """Every collection in one table keyed by (collection, id), data as JSON.
+
+    The primary key is the same ordering Firestore's document-ID index uses,
+    so a player's games are one index range scan.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS documents (
+        collection TEXT NOT NULL,
+        id         TEXT NOT NULL,
+        data       TEXT NOT NULL,
+        PRIMARY KEY (collection, id)
+    ) WITHOUT ROWID
+    """
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(self.SCHEMA)
+
+    def _connect(self):
+        # A connection per call: cheap for SQLite and safe across threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _rows(self, sql, params, fields):
+        conn = self._connect()
+        try:
+            for doc_id, data in conn.execute(sql, params):
+                yield doc_id, _project(json.loads(data), fields)
+        finally:
+            conn.close()
+
+    def get(self, collection, doc_id):
+        rows = list(self._rows("SELECT id, data FROM documents WHERE collection = ? AND id = ?",
+                               (collection, doc_id), None))
+        return rows[0][1] if rows else None
+
+    def documents(self, collection, fields=None):
+        return self._rows("SELECT id, data FROM documents WHERE collection = ? ORDER BY id",
+                          (collection,), fields)
+
+    def _id_range(self, collection, start, end, fields=None):
+        return self._rows(
+            "SELECT id, data FROM documents WHERE collection = ? AND id BETWEEN ? AND ? ORDER BY id",
+            (collection, start, end), fields)
+
+    def games_for_players(self, player_names, fields=None):
+        # Every player's range on one connection
+        conn = self._connect()
+        try:
+            games = {}
+            for player in player_names:
+                start, end = player_id_range(player)
+                games[player] = [_project(json.loads(data), fields) for (data,) in conn.execute(
+                    "SELECT data FROM documents WHERE collection = 'gameStats' "
+                    "AND id BETWEEN ? AND ? ORDER BY id", (start, end))]
+            return games
+        finally:
+            conn.close()
+
+    def upsert(self, collection, rows, merge=False):
+        records = [(collection, doc_id if doc_id is not None else uuid.uuid4().hex[:20], json.dumps(data))
+                   for doc_id, data in rows]
+        # json_patch adds the new fields to the stored object for merge=True
+        update = "json_patch(data, excluded.data)" if merge else "excluded.data"
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO documents VALUES (?, ?, ?) "
+                f"ON CONFLICT (collection, id) DO UPDATE SET data = {update}", records)
+        return len(records)
+
+    def delete(self, collection, doc_ids):
+        with self._connect() as conn:
+            cursor = conn.executemany("DELETE FROM documents WHERE collection = ? AND id = ?",
+                                      [(collection, doc_id) for doc_id in doc_ids])
+            return cursor.rowcount
+
+    def _where(self, collection, filters, id_prefix):
+        _check_filters(filters)
+        clauses, params = ["collection = ?"], [collection]
+        if id_prefix:
+            clauses.append("id BETWEEN ? AND ?")
+            params.extend(prefix_id_range(id_prefix))
+        for field, op, value in filters or ():
+            clauses.append(f"json_extract(data, ?) {'=' if op == '==' else op} ?")
+            params.extend([f'$."{field}"', value])
+        return " AND ".join(clauses), params
+
+    def count(self, collection, filters=None, id_prefix=None):
+        where, params = self._where(collection, filters, id_prefix)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM documents WHERE {where}", params).fetchone()[0]
+
+    def delete_matching(self, collection, filters=None, id_prefix=None):
+        where, params = self._where(collection, filters, id_prefix)
+        with self._connect() as conn:
+            return conn.execute(f"DELETE FROM documents WHERE {where}", params).rowcount
+
+# === In Memory ===
+
+
+class MemoryStorage(GameStorage):
+    # Sorted IDs per collection so ID ranges are two bisects, for tests and
+    # benchmarks that shouldn't touch a database
+
+    def __init__(self):
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def _collection(self, collection):
+        return self._collections.setdefault(collection, ([], {}))
+
+    def get(self, collection, doc_id):
+        data = self._collection(collection)[1].get(doc_id)
+        return dict(data) if data is not None else None
+
+    def documents(self, collection, fields=None):
+        ids, docs = self._collection(collection)
+        return [(doc_id, _project(dict(docs[doc_id]), fields)) for doc_id in list(ids)]
+
+    def _id_range(self, collection, start, end, fields=None):
+        ids, docs = self._collection(collection)
+        lo, hi = bisect.bisect_left(ids, start), bisect.bisect_right(ids, end)
+        return [(doc_id, _project(dict(docs[doc_id]), fields)) for doc_id in ids[lo:hi]]
+
+    def upsert(self, collection, rows, merge=False):
+        with self._lock:
+            ids, docs = self._collection(collection)
+            total = 0
+            for doc_id, data in rows:
+                doc_id = doc_id if doc_id is not None else uuid.uuid4().hex[:20]
+                if doc_id not in docs:
+                    bisect.insort(ids, doc_id)
+                    docs[doc_id] = {}
+                docs[doc_id] = {**docs[doc_id], **data} if merge else dict(data)
+                total += 1
+            return total
+
+    def delete(self, collection, doc_ids):
+        with self._lock:
+            ids, docs = self._collection(collection)
+            total = 0
+            for doc_id in doc_ids:
+                if docs.pop(doc_id, None) is not None:
+                    ids.pop(bisect.bisect_left(ids, doc_id))
+                    total += 1
+            return total
+
+    def _matching_ids(self, collection, filters, id_prefix):
+        _check_filters(filters)
+        ids, docs = self._collection(collection)
+        if id_prefix:
+            start, end = prefix_id_range(id_prefix)
+            ids = ids[bisect.bisect_left(ids, start):bisect.bisect_right(ids, end)]
+        return [doc_id for doc_id in ids if _matches(docs[doc_id], filters)]
+
+    def count(self, collection, filters=None, id_prefix=None):
+        if not filters and not id_prefix:
+            return len(self._collection(collection)[0])
+        return len(self._matching_ids(collection, filters, id_prefix))
+
+    def delete_matching(self, collection, filters=None, id_prefix=None):
+        return self.delete(collection, self._matching_ids(collection, filters, id_prefix))
+
+
+def open_storage(spec=None):
+    # "firestore", "sqlite:{path}" or "memory"; defaults to GAME_STORAGE
+    spec = spec or os.environ.get("GAME_STORAGE") or DEFAULT_STORAGE
+    if spec == "firestore":
+        return FirestoreStorage()
+    if spec == "memory":
+        return MemoryStorage()
+    if spec.startswith("sqlite"):
+        return SQLiteStorage(spec.partition(":")[2] or DEFAULT_SQLITE_PATH)
+    raise ValueError(f"Unknown storage '{spec}'. Use firestore, sqlite:{{path}} or memory.")
+
+# === Copy Between Backends ===
+
+
+def game_doc_id(csv_path, row):
+    # The "{file}_{date}" ID server.js gives a gameStats document
+    date = row.get("Date") or row.get("date") or next(iter(row.values()))
+    return f"{os.path.basename(csv_path).replace('.csv', '')}_{date}"
+
+
+def csv_paths(paths):
+    # CSV files given directly or found in the given folders; missing
+    # folders (e.g. no scraped_files yet) are skipped
+    import glob
+
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(glob.glob(os.path.join(path, "*.csv")))
+        elif os.path.exists(path):
+            yield path
+
+
+def csv_game_rows(paths):
+    # (id, row) pairs for scraped CSVs (files or folders of them)
+    from game_log_store import parse_csv_with_header_fix
+
+    for csv_path in csv_paths(paths):
+        with open(csv_path, encoding="utf-8") as f:
+            for row in parse_csv_with_header_fix(f.read()):
+                yield game_doc_id(csv_path, row), row
+
+
+def copy_collection(source, target, collection, chunk_size=FIRESTORE_BATCH_LIMIT * 10):
+    # Streams the collection across in chunks so it never sits in memory twice
+    total, chunk = 0, []
+    for row in source.documents(collection):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            total += target.upsert(collection, chunk)
+            chunk = []
+    if chunk:
+        total += target.upsert(collection, chunk)
+    return total
+
+
+def selection(collection, player=None, season=None, where=None, id_prefix=None):
+    # (filters, id_prefix) for the count and delete commands. --player and
+    # --season only apply to gameStats, whose IDs start with the player and
+    # whose rows carry a Date
+    filters = [tuple(condition) for condition in where or ()]
+    _check_filters(filters)
+    if (player or season) and collection != "gameStats":
+        raise ValueError(f"--player and --season select gameStats rows, not {collection}; use --where.")
+    if season:
+        filters.extend(season_filters(season))
+    if player:
+        id_prefix = f"{player}_"
+    return filters, id_prefix
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Copy gameStats, playerData and teams between storage backends, "
+                    "or count and delete documents in them.")
+    parser.add_argument("command", choices=["copy", "load-csv", "count", "delete"])
+    parser.add_argument("--source", default=DEFAULT_STORAGE, help="storage to read for copy")
+    parser.add_argument("--target", help=f"storage to write or count/delete in (default: sqlite:{DEFAULT_SQLITE_PATH} "
+                                         f"for copy and load-csv, GAME_STORAGE or {DEFAULT_STORAGE} otherwise)")
+    parser.add_argument("--collections", nargs="+",
+                        help="default: gameStats, playerData and teams (only gameStats with --player/--season)")
+    parser.add_argument("--csv", nargs="+", default=["other_files"], help="CSV files or folders for load-csv")
+    parser.add_argument("--player", help="count/delete one player's gameStats rows, e.g. jose_altuve")
+    parser.add_argument("--season", help="count/delete one season's gameStats rows, e.g. 2024")
+    parser.add_argument("--where", nargs=3, action="append", metavar=("FIELD", "OP", "VALUE"),
+                        help=f"count/delete documents whose field compares ({', '.join(FILTER_OPS)}) to VALUE")
+    parser.add_argument("--id-prefix", help="count/delete documents whose ID starts with this")
+    parser.add_argument("--yes", action="store_true", help="actually delete; without it delete only counts")
+    args = parser.parse_args()
+    if args.collections is None:
+        args.collections = ["gameStats"] if args.player or args.season else ["gameStats", "playerData", "teams"]
+    if args.target is None:
+        # count and delete act on the storage the app reads, like ingest_game_logs
+        args.target = (f"sqlite:{DEFAULT_SQLITE_PATH}" if args.command in ("copy", "load-csv")
+                       else os.environ.get("GAME_STORAGE") or DEFAULT_STORAGE)
+
+    print(f"Target: {args.target}")
+    target = open_storage(args.target)
+    start = time.perf_counter()
+    if args.command == "copy":
+        source = open_storage(args.source)
+        for collection in args.collections:
+            print(f"{collection}: {copy_collection(source, target, collection)} documents copied")
+    elif args.command == "load-csv":
+        print(f"gameStats: {target.upsert_games(csv_game_rows(args.csv))} documents loaded")
+    else:
+        # Every collection's selection is checked before any is touched
+        selections = {}
+        for collection in args.collections:
+            try:
+                selections[collection] = selection(collection, args.player, args.season, args.where, args.id_prefix)
+            except ValueError as e:
+                parser.error(str(e))
+        for collection, (filters, id_prefix) in selections.items():
+            if args.command == "delete" and args.yes:
+                deleted_start = time.perf_counter()
+                deleted = target.delete_matching(collection, filters, id_prefix)
+                seconds = time.perf_counter() - deleted_start
+                print(f"{collection}: {deleted} documents deleted "
+                      f"({deleted / max(seconds, 1e-9):.0f} docs/s)")
+            else:
+                matched = target.count(collection, filters, id_prefix)
+                note = " would be deleted (pass --yes)" if args.command == "delete" else ""
+                print(f"{collection}: {matched} documents{note}")
+    print(f"Done in {time.perf_counter() - start:.1f}s")
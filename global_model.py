@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# One booster per stat trained on every player's games, saved as
+# "{model_dir}/{stat}.json". Player and opponent are categorical features,
+# so the same model serves any player without a refit.
+DEFAULT_GLOBAL_MODEL_DIR = "xgb_global_models"
+
+# gameStats IDs are "{player}_{season or Postseason}_{date}"
+GAME_ID_PATTERN = re.compile(r'^(?P<player>.+)_(\d{4}|Postseason)_')
+
+CATEGORICAL_COLS = ['player', 'Opp']
+
+# === Stack Every Player's Games ===
+
+
+def stored_league_games():
+    # Every gameStats document, cleaned like load_clean_games does per player
+    import predictionModelV3 as pm
+
+    records = []
+    for doc_id, data in pm.get_storage().documents("gameStats"):
+        match = GAME_ID_PATTERN.match(doc_id)
+        if match:
+            records.append({**data, 'player': match.group('player')})
+    if not records:
+        raise ValueError("No games found in gameStats")
+
+    games = pm.clean_game_frame(pd.DataFrame(records))
+    return games.sort_values(['Date'], kind='stable').reset_index(drop=True)
+
+
+def league_games(store_path=None):
+    if store_path:
+        from game_log_store import load_league_games
+        return load_league_games(store_path)
+    return stored_league_games()
+
+
+def panel_features(games, stat):
+    # add_lagged_features computed within each player's history, plus the
+    # player and opponent. Only what is known before a game is used, so the
+    # next game's row can be built from the games already played.
+    import predictionModelV3 as pm
+
+    values = pd.to_numeric(games[stat], errors='coerce')
+    by_player = values.groupby(games['player'].to_numpy(), sort=False)
+    shifted = {lag: by_player.shift(lag) for lag in range(1, 4)}
+
+    features = pd.DataFrame(index=games.index)
+    for lag in pm.LAGS:
+        features[f'{stat}_lag{lag}'] = shifted[lag] * pm.LAG_WEIGHTS.get(lag, 1)
+    features[f'{stat}_rolling3'] = (shifted[1] + shifted[2] + shifted[3]) / 3 * pm.ROLLING_WEIGHT
+    features['player'] = games['player'].astype(str)
+    # Opponent normalized like load_clean_games
+    features['Opp'] = games['Opp'].astype(str).str.replace(r'\s', '', regex=True).replace(
+        {'': 'Unknown', 'nan': 'Unknown'})
+    return features, values
+
+
+def encode(features, categories):
+    # Same category codes at training and prediction time; unseen players
+    # or opponents become missing values, which the trees route by default
+    features = features.copy()
+    for col, cats in categories.items():
+        features[col] = pd.Categorical(features[col], categories=cats)
+    return features
+
+
+def recency_weights(games):
+    # train_model's linspace(1, 3) over each player's own games
+    position = games.groupby('player', sort=False).cumcount().to_numpy()
+    count = games.groupby('player', sort=False)['player'].transform('size').to_numpy()
+    return 1 + 2 * position / np.maximum(count - 1, 1)
+
+# === Train One Model per Stat ===
+
+
+def train_global_model(games, stat, model_dir=DEFAULT_GLOBAL_MODEL_DIR):
+    import xgboost as xgb
+    import predictionModelV3 as pm
+
+    start = time.perf_counter()
+    features, targets = panel_features(games, stat)
+    weights = recency_weights(games)
+
+    # Same rows fetch_and_clean_player_data's dropna keeps: a full lag history
+    keep = features.notna().all(axis=1).to_numpy() & targets.notna().to_numpy()
+    features, targets, weights = features[keep], targets[keep], weights[keep]
+
+    categories = {col: sorted(features[col].unique()) for col in CATEGORICAL_COLS}
+    dtrain = xgb.DMatrix(encode(features, categories), label=targets, weight=weights,
+                         enable_categorical=True)
+    booster = xgb.train({**pm.XGB_PARAMS, 'tree_method': 'hist'}, dtrain,
+                        num_boost_round=pm.N_ESTIMATORS)
+    booster.set_attr(categories=json.dumps(categories), trained_rows=str(len(features)))
+
+    os.makedirs(model_dir, exist_ok=True)
+    path = os.path.join(model_dir, f"{stat}.json")
+    # Write then rename so a concurrent reader never sees half a file
+    booster.save_model(path + ".tmp.json")
+    os.replace(path + ".tmp.json", path)
+
+    print(f"{stat}: {len(features)} games of {len(categories['player'])} players "
+          f"in {time.perf_counter() - start:.1f}s -> {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    return booster
+
+# === Serve Any Player ===
+
+
+class GlobalModels:
+    """Loaded per-stat boosters, re-read when a new training run replaces the file."""
+
+    def __init__(self, model_dir=DEFAULT_GLOBAL_MODEL_DIR):
+        self.model_dir = model_dir
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def get(self, stat):
+        import xgboost as xgb
+
+        path = os.path.join(self.model_dir, f"{stat}.json")
+        if not os.path.exists(path):
+            raise ValueError(f"No global model for {stat}. Train it with: "
+                             f"python global_model.py train --stats {stat}")
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._models.get(stat)
+            if cached is None or cached[0] != mtime:
+                booster = xgb.Booster()
+                booster.load_model(path)
+                cached = (mtime, booster, json.loads(booster.attr('categories')))
+                self._models[stat] = cached
+        return cached[1], cached[2]
+
+
+def next_game_features(games, player_name, stat, opponent):
+    # The player's history plus an unplayed game against `opponent`; its
+    # lags come from the games already played
+    next_game = pd.DataFrame({'player': [player_name], 'Opp': [opponent], stat: [np.nan]})
+    history = games.assign(player=player_name)[['player', 'Opp', stat]]
+    features, _ = panel_features(pd.concat([history, next_game], ignore_index=True), stat)
+    return features.iloc[[-1]]
+
+
+def get_global_prediction(models, player_name, selected_stat, opponent, store_path=None):
+    # Same (target_stats, prediction) pair get_prediction returns; a new
+    # game only changes the lags, never the model
+    import predictionModelV3 as pm
+
+    booster, categories = models.get(selected_stat)
+    games = pm.load_clean_games(player_name, store_path=store_path)
+    # Lags from the latest games, in the order training saw them
+    # (stored_league_games sorts by Date the same stable way)
+    games = games.sort_values('Date', kind='stable', ignore_index=True)
+    row = encode(next_game_features(games, player_name, selected_stat, opponent), categories)
+    prediction = booster.inplace_predict(row)
+    return [selected_stat], np.asarray(prediction, dtype=np.float32)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Train or query one XGBoost model per stat over every player's games.")
+    parser.add_argument("command", choices=["train", "predict"])
+    parser.add_argument("--stats", nargs="+", default=["H"])
+    parser.add_argument("--store", help="read games from this local game-log store instead of gameStats (GAME_STORAGE)")
+    parser.add_argument("--model-dir", default=DEFAULT_GLOBAL_MODEL_DIR)
+    parser.add_argument("--player", help="player to predict, e.g. jose_altuve")
+    parser.add_argument("--opponent", help="opponent to predict against, e.g. SEA")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        start = time.perf_counter()
+        games = league_games(args.store)
+        print(f"Loaded {len(games)} games in {time.perf_counter() - start:.1f}s")
+        for stat in args.stats:
+            train_global_model(games, stat, args.model_dir)
+    else:
+        models = GlobalModels(args.model_dir)
+        for stat in args.stats:
+            print(get_global_prediction(models, args.player, stat, args.opponent, args.store))
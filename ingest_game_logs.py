@@ -0,0 +1,139 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from game_log_store import DEFAULT_SOURCE_DIRS, parse_csv_with_header_fix
+from game_storage import (DEFAULT_STORAGE, FIRESTORE_BATCH_LIMIT, WRITE_WORKERS, csv_paths,
+                          game_doc_id, open_storage)
+
+# Content hash of every CSV already written, per storage target, so a rerun
+# only parses and uploads files that are new or changed
+DEFAULT_MANIFEST_PATH = "ingest_manifest.json"
+
+# Rows written per upsert call; the manifest is saved after each one, so an
+# interrupted run picks up from the last finished chunk
+INGEST_CHUNK_ROWS = FIRESTORE_BATCH_LIMIT * WRITE_WORKERS
+
+# === Manifest ===
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path):
+    # Written to a temp file and renamed so a crash never leaves half a manifest
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+# === Parse (worker processes) ===
+
+
+def parse_file(csv_path, known_digest=None):
+    # (path, digest, rows); rows is None when the file still has known_digest.
+    # Runs in a worker process, so reading, hashing and parsing all happen
+    # off the main process
+    with open(csv_path, "rb") as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()
+    if digest == known_digest:
+        return csv_path, digest, None
+    rows = parse_csv_with_header_fix(content.decode("utf-8"))
+    return csv_path, digest, [(game_doc_id(csv_path, row), row) for row in rows]
+
+
+def player_rows(rows):
+    # uploadCSVFile also keeps playerData names for rows with a Player column
+    for _, row in rows:
+        if row.get("Player"):
+            first_name, _, last_name = row["Player"].partition(" ")
+            player_id = "_".join(row["Player"].lower().split())
+            yield player_id, {"first_name": first_name, "last_name": last_name}
+
+# === Ingest ===
+
+
+def consume_file(path, digest):
+    # Deletes an uploaded file unless it changed since it was read (a scraper
+    # added rows meanwhile); those rows go up on the next run
+    with open(path, "rb") as f:
+        if hashlib.sha256(f.read()).hexdigest() != digest:
+            return False
+    os.remove(path)
+    return True
+
+
+def ingest(paths, storage, manifest_path=DEFAULT_MANIFEST_PATH, manifest_key=DEFAULT_STORAGE,
+           workers=None, force=False, consume=False):
+    # Parses the CSVs in a process pool and upserts their rows into gameStats
+    # in concurrent batches; returns (files ingested, files skipped, rows).
+    # With consume=True each file is deleted once its rows are written (the
+    # scrapers' new_rows deltas, which keep rows until they are uploaded)
+    start = time.perf_counter()
+    manifest = load_manifest(manifest_path)
+    done = {} if force else manifest.get(manifest_key, {})
+    files = [os.path.normpath(path) for path in csv_paths(paths)]
+
+    ingested, skipped, total_rows = 0, 0, 0
+    chunk, chunk_files = [], {}
+
+    def flush():
+        nonlocal total_rows
+        if chunk:
+            total_rows += storage.upsert("gameStats", chunk)
+            players = dict(player_rows(chunk))
+            if players:
+                storage.upsert("playerData", players.items(), merge=True)
+        # Only files whose rows are all written go into the manifest
+        written = manifest.setdefault(manifest_key, {})
+        written.update(chunk_files)
+        if consume:
+            for path, digest in chunk_files.items():
+                if consume_file(path, digest):
+                    del written[path]  # a new file with this name is new rows
+        save_manifest(manifest, manifest_path)
+        chunk.clear()
+        chunk_files.clear()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        known = [done.get(path) for path in files]
+        for path, digest, rows in pool.map(parse_file, files, known, chunksize=16):
+            if rows is None:
+                skipped += 1
+                continue
+            chunk.extend(rows)
+            chunk_files[path] = digest
+            ingested += 1
+            if len(chunk) >= INGEST_CHUNK_ROWS:
+                flush()
+    if chunk_files:
+        flush()
+
+    seconds = time.perf_counter() - start
+    print(f"gameStats: {total_rows} rows from {ingested} files ({skipped} unchanged, skipped) "
+          f"in {seconds:.1f}s ({total_rows / max(seconds, 1e-9):.0f} rows/s)")
+    return ingested, skipped, total_rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Upload the scraped game-log CSVs to gameStats, skipping files already uploaded.")
+    parser.add_argument("--source", nargs="+", default=DEFAULT_SOURCE_DIRS, help="CSV files or folders")
+    parser.add_argument("--target", help="storage to write to (default: GAME_STORAGE or firestore)")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST_PATH)
+    parser.add_argument("--workers", type=int, help="parsing processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="upload every file, changed or not")
+    parser.add_argument("--consume", action="store_true",
+                        help="delete each file once uploaded (for scraped_files/new_rows)")
+    args = parser.parse_args()
+
+    target = args.target or os.environ.get("GAME_STORAGE") or DEFAULT_STORAGE
+    ingest(args.source, open_storage(target), args.manifest, target, args.workers, args.force, args.consume)
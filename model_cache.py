@@ -0,0 +1,164 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Trained boosters are saved as "{model_dir}/{player}/{stat}_{fingerprint}.json",
+# the same booster JSON save_models writes
+DEFAULT_MODEL_DIR = "xgb_json_models_v3"
+
+# === Fingerprint the Training Data ===
+
+
+def data_fingerprint(features, targets):
+    # Same features and targets in, same model out, so the hash of the
+    # training inputs identifies a trained model
+    digest = hashlib.sha1()
+    for frame in (features, targets):
+        digest.update("|".join(map(str, frame.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(
+            frame, index=False).values.tobytes())
+    return digest.hexdigest()[:16]
+
+# === Model Loaded from Disk ===
+
+
+class BoosterModel:
+    # Stands in for a fitted MultiOutputRegressor: one booster per target stat
+
+    def __init__(self, boosters):
+        self.boosters = boosters
+
+    def attr(self, name):
+        return self.boosters[0].attr(name)
+
+    def predict(self, X):
+        return np.column_stack([booster.inplace_predict(X) for booster in self.boosters])
+
+
+def model_boosters(model):
+    # Boosters of either a fitted MultiOutputRegressor or a BoosterModel
+    if isinstance(model, BoosterModel):
+        return model.boosters
+    return [est.get_booster() for est in model.estimators_]
+
+# === Two-Level Model Cache ===
+
+
+class ModelCache:
+    """LRU of trained models in memory, backed by booster JSON files on disk.
+
+    Keys are (player, stat, fingerprint of the training data), so a model is
+    only retrained when the player's data actually changed.
+    """
+
+    def __init__(self, model_dir=DEFAULT_MODEL_DIR, max_entries=64, max_disk_versions=32):
+        self.model_dir = model_dir
+        self.max_entries = max_entries
+        self.max_disk_versions = max_disk_versions  # fingerprints kept per player/stat
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _paths(self, player, fingerprint, target_stats):
+        # One file per target stat, "{model_dir}/{player}/{target}_{fingerprint}.json"
+        folder = os.path.join(self.model_dir, player)
+        return folder, [os.path.join(folder, f"{target}_{fingerprint}.json") for target in target_stats]
+
+    def _remember(self, key, model):
+        with self._lock:
+            self._models[key] = model
+            self._models.move_to_end(key)
+            while len(self._models) > self.max_entries:
+                self._models.popitem(last=False)
+
+    def _load(self, paths):
+        import xgboost as xgb
+
+        boosters = []
+        for path in paths:
+            booster = xgb.Booster()
+            booster.load_model(path)
+            boosters.append(booster)
+        return BoosterModel(boosters)
+
+    def _save(self, folder, paths, model, target_stats):
+        os.makedirs(folder, exist_ok=True)
+        for booster, path in zip(model_boosters(model), paths):
+            # Write then rename so a concurrent reader never sees half a file
+            booster.save_model(path + ".tmp.json")
+            os.replace(path + ".tmp.json", path)
+
+        # Drop the oldest fingerprints for each target stat
+        for target in target_stats:
+            for old in self._versions(folder, target)[:-self.max_disk_versions]:
+                os.remove(old)
+
+    def _versions(self, folder, target):
+        # Saved fingerprints for one target stat, oldest first
+        if not os.path.isdir(folder):
+            return []
+        return sorted(
+            (os.path.join(folder, name) for name in os.listdir(folder)
+             if name.startswith(f"{target}_") and not name.endswith(".tmp.json")),
+            key=os.path.getmtime)
+
+    def latest(self, player, target_stats):
+        # Most recently saved model for this player, whatever data it saw;
+        # the starting point for an incremental update
+        folder = os.path.join(self.model_dir, player)
+        newest = [self._versions(folder, target) for target in target_stats]
+        if not all(newest):
+            return None
+        fingerprints = {os.path.basename(paths[-1]).rsplit("_", 1)[1] for paths in newest}
+        if len(fingerprints) != 1:
+            return None  # targets saved from different training runs
+        return self._load([paths[-1] for paths in newest])
+
+    def get_or_train(self, player, stat, features, targets, train, target_stats=None):
+        # train() must return a fitted MultiOutputRegressor (or BoosterModel)
+        # for `targets`
+        target_stats = target_stats or list(targets.columns)
+        fingerprint = data_fingerprint(features, targets)
+        key = (player, stat, fingerprint)
+
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self.memory_hits += 1
+                return model
+
+        folder, paths = self._paths(player, fingerprint, target_stats)
+        if all(os.path.exists(path) for path in paths):
+            model = self._load(paths)
+            with self._lock:
+                self.disk_hits += 1
+            self._remember(key, model)
+            return model
+
+        with self._lock:
+            self.misses += 1
+        model = train()
+        self._save(folder, paths, model, target_stats)
+        self._remember(key, model)
+        return model
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._models),
+            }
+
+    def clear(self):
+        # Empties the memory layer only; files on disk are kept
+        with self._lock:
+            self._models.clear()
@@ -1,29 +1,56 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
 import pandas as pd
 import numpy as np
-import xgboost as xgb
-from sklearn.multioutput import MultiOutputRegressor
-from sklearn.model_selection import KFold
-from sklearn.metrics import mean_squared_error, r2_score
 import os
-import re
 
-# Retrieve the firebase key path from environment variables
-firebase_key_path = os.environ.get("FIREBASE_KEY_PATH")
-if not firebase_key_path:
-    raise ValueError(
-        "No Firebase key path found. Please set FIREBASE_KEY_PATH in your environment or .env file.")
+from game_log_store import GAME_LOG_SCHEMA, load_player_games
+from model_cache import DEFAULT_MODEL_DIR, BoosterModel, ModelCache, data_fingerprint, model_boosters
+from walk_forward import run_walk_forward
+from feature_store import DEFAULT_FEATURE_STORE_PATH, FeatureStore
+from game_storage import firestore_client, open_storage
 
-# ===  Firebase Setup ===
-cred = credentials.Certificate(firebase_key_path)
-firebase_admin.initialize_app(cred)
-db = firestore.client()
+# xgboost, scikit-learn and firebase_admin are imported where they are used,
+# so importing this module for the feature code stays fast and needs no
+# Firebase credentials (see benchmarks/check_import_time.py)
+
+# ===  Storage ===
+# gameStats, playerData and teams are read through game_storage; set
+# GAME_STORAGE (e.g. sqlite:game_storage.sqlite) to train from a local copy
+storage = None
+
+
+def get_storage():
+    global storage
+    if storage is None:
+        storage = open_storage()
+    return storage
+
+
+def get_db():
+    # Raw Firestore client, created on first use and shared afterwards
+    return firestore_client()
+
+
+def __getattr__(name):
+    # Keeps `pm.db` and `from predictionModelV3 import db` working, lazily
+    if name == "db":
+        return get_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# ===  Trained Model Cache ===
+# Repeat predictions for unchanged data reuse the trained boosters
+model_cache = ModelCache(DEFAULT_MODEL_DIR)
+
+# ===  Persisted Feature Rows ===
+# Only games added since the last request get their lags and one-hot rows built
+feature_store = FeatureStore(DEFAULT_FEATURE_STORE_PATH)
 
 # === Lagged Features ===
+LAGS = [1, 3]
+LAG_WEIGHTS = {1: 1.2, 3: 1.1}
+ROLLING_WEIGHT = 1.3
 
 
-def add_lagged_features(df, stats, lags=[1, 3], lag_weights={1: 1.2, 3: 1.1}, rolling_weight=1.3):
+def add_lagged_features(df, stats, lags=LAGS, lag_weights=LAG_WEIGHTS, rolling_weight=ROLLING_WEIGHT):
     for stat in stats:
         for lag in lags:
             column_name = f'{stat}_lag{lag}'
@@ -42,36 +69,88 @@ def add_lagged_features(df, stats, lags=[1, 3], lag_weights={1: 1.2, 3: 1.1}, ro
 
     return df
 
-# ===  Load and Clean Player Data ===
+# ===  Player-Scoped Game Reads ===
+
+
+def stream_player_games(player_name, fields=None):
+    # Only this player's games (a document-ID range), not the league
+    return get_storage().games_for_player(player_name, fields)
+
+# ===  Clean Raw Game Logs ===
+
+# gameStats values are strings; these are the shapes that become floats
+PERCENT_PATTERN = r'-?\d+\.?\d*%'
+NUMERIC_PATTERN = r'-?\d+\.?\d*'
+
+
+def clean_game_frame(raw):
+    # Works on every cell of the frame at once instead of one value at a time.
+    # Values that don't look like numbers (".295", "", trade notes) stay as
+    # stripped strings, exactly like the old per-cell regex loop.
+    kinds = [GAME_LOG_SCHEMA.get(col) for col in raw.columns]
+    num_rows = len(raw)
+
+    # Flatten column by column into one long string Series
+    cells = raw.to_numpy(dtype=object).ravel(order='F')
+    present = pd.notna(cells)
+    values = pd.Series(cells).astype(str).str.strip()
+    strings = values.to_numpy(dtype=object)
 
+    # Only run the regexes a column's schema calls for
+    cell_kinds = np.repeat(np.array(kinds, dtype=object), num_rows)
+    convertible = present & (cell_kinds != 'text')
+    maybe_percent = convertible & (cell_kinds != 'numeric')
 
-def fetch_and_clean_player_data(player_name, selected_stat):
-    docs = db.collection("gameStats").stream()
-    cleaned_data = []
+    percent = maybe_percent & values.str.fullmatch(
+        PERCENT_PATTERN).to_numpy(dtype=bool)
+    numeric = convertible & ~percent & values.str.fullmatch(
+        NUMERIC_PATTERN).to_numpy(dtype=bool)
 
-    for doc in docs:
-        doc_id = doc.id
-        if not doc_id.startswith(player_name):
-            continue  # Skip other players
+    numbers = np.full(len(cells), np.nan)
+    numbers[numeric] = strings[numeric].astype(float)
+    numbers[percent] = np.array(
+        [val[:-1] for val in strings[percent]], dtype=object).astype(float) / 100
+    strings[~present] = np.nan
 
-        raw = doc.to_dict()
-        cleaned = {}
+    # Back to one column per field
+    converted = (numeric | percent).reshape(num_rows, -1, order='F')
+    present = present.reshape(num_rows, -1, order='F')
+    numbers = numbers.reshape(num_rows, -1, order='F')
+    strings = strings.reshape(num_rows, -1, order='F')
 
-        for key, val in raw.items():
-            val = str(val).strip()
-            if re.match(r'^-?\d+\.?\d*%$', val):  # percent values
-                cleaned[key] = float(val.replace('%', '')) / 100
-            elif re.match(r'^-?\d+\.?\d*$', val):  # numeric values
-                cleaned[key] = float(val)
-            else:
-                cleaned[key] = val  # categorical or other
+    cleaned = {}
+    for i, col in enumerate(raw.columns):
+        if converted[:, i][present[:, i]].all():
+            cleaned[col] = numbers[:, i]  # fully numeric column
+        else:
+            mixed = strings[:, i].copy()
+            mixed[converted[:, i]] = numbers[converted[:, i], i]
+            cleaned[col] = mixed
 
-        cleaned_data.append(cleaned)
+    return pd.DataFrame(cleaned, index=raw.index)
 
-    if not cleaned_data:
-        raise ValueError(f"No data found for player: {player_name}")
+# ===  Load and Clean Player Data ===
+
+
+def load_clean_games(player_name, store_path=None):
+    # Cleaned game log before any lagged features are added
+    if store_path:
+        # Local Parquet store (see game_log_store.py), already typed
+        raw = load_player_games(player_name, store_path)
+        df = raw
+    else:
+        raw = pd.DataFrame(stream_player_games(player_name))
+
+        if raw.empty:
+            raise ValueError(f"No data found for player: {player_name}")
+
+        df = clean_game_frame(raw)
+
+    # Oldest game first: gameStats returns documents in ID order, which puts
+    # a player's *_Postseason_* file after every regular season
+    if 'Date' in df.columns:
+        df = df.sort_values('Date', kind='stable', ignore_index=True)
 
-    df = pd.DataFrame(cleaned_data)
     df = df.fillna(0)
 
     # --- Drop rows where 'ab' (at-bats) is 0 ---
@@ -98,6 +177,13 @@ def fetch_and_clean_player_data(player_name, selected_stat):
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors='coerce')
 
+    print(f"Loaded {len(raw)} games for {player_name}")
+    return df
+
+
+def fetch_and_clean_player_data(player_name, selected_stat, store_path=None):
+    df = load_clean_games(player_name, store_path)
+
     # === Add lagged features for the selected target stat ===
     target_stats = [selected_stat]
     df = add_lagged_features(df, target_stats, lags=[1, 3])
@@ -105,22 +191,32 @@ def fetch_and_clean_player_data(player_name, selected_stat):
     # Drop incomplete lagged rows
     df = df.dropna().reset_index(drop=True)
 
-    print(f"Loaded {len(cleaned_data)} games for {player_name}")
     return df
 
 # ===  Define Features and Targets ===
 
+# Columns we do not want to use for features
+FEATURE_DROP_COLS = ['Date', 'Result', 'Team', 'DFS(DK)', 'DFS(FD)', 'WPA', 'cWPA', 'aLI', 'acLI',
+                     'RE24', 'Rk', 'Inngs', 'Pos', 'Gtm', 'Gcar', '@/H', 'BOP', 'IBB', 'HBP', 'SH', 'SF', 'CS']
+
+# Stats a model can be trained for: the numeric game-log columns
+# prepare_features_and_targets keeps
+PREDICTABLE_STATS = [col for col, kind in GAME_LOG_SCHEMA.items()
+                     if kind == 'numeric' and col not in FEATURE_DROP_COLS]
+
+
+def check_stat(selected_stat):
+    if selected_stat not in PREDICTABLE_STATS:
+        raise ValueError(f"Unknown stat '{selected_stat}'. Use one of {', '.join(PREDICTABLE_STATS)}.")
+
 
 def prepare_features_and_targets(df, selected_stat):
     # Define target stats to predict
     target_stats = [selected_stat]
 
     # Drop columns we do not want to use for features
-    drop_cols = ['Date', 'Result', 'Team', 'DFS(DK)', 'DFS(FD)', 'WPA', 'cWPA', 'aLI', 'acLI',
-                 'RE24', 'Rk', 'Inngs', 'Pos', 'Gtm', 'Gcar', '@/H', 'BOP', 'IBB', 'HBP', 'SH', 'SF', 'CS']
-
     df = df.drop(
-        columns=[col for col in drop_cols if col in df.columns], errors='ignore')
+        columns=[col for col in FEATURE_DROP_COLS if col in df.columns], errors='ignore')
 
     features = df.copy()
 
@@ -188,59 +284,170 @@ def add_opponent_lagged_stats(df, stat, opponent):
     return df
 
 
+OPP_LAGS = [1, 3, 5]
+
+
+def add_all_opponent_lagged_stats(df, stat, lags=OPP_LAGS):
+    # {stat}_vs_{opp}_lag{n} for every Opp_ column in one pass: the stat from
+    # the n-th most recent game against that opponent before each row,
+    # carried forward between meetings so the prediction row has it too.
+    # On meeting rows this equals add_opponent_lagged_stats for that opponent.
+    opp_cols = [col for col in df.columns if col.startswith('Opp_')]
+    if not opp_cols:
+        return df
+
+    # Opponent of each game as a column position (rows of the drop_first
+    # opponent have no Opp_ column set and are skipped)
+    flags = df[opp_cols].to_numpy(dtype=bool)
+    meetings = np.flatnonzero(flags.any(axis=1))
+    opp_idx = flags[meetings].argmax(axis=1)
+    values = pd.Series(pd.to_numeric(df[stat], errors='coerce').to_numpy(
+        dtype=np.float64)[meetings])
+    by_opponent = values.groupby(opp_idx)
+
+    blocks, names = [], []
+    for lag in lags:
+        # n-th most recent meeting counting the current one, carried to the
+        # following games, then shifted a row so each game only sees earlier ones
+        block = np.full((len(df), len(opp_cols)), np.nan)
+        block[meetings, opp_idx] = by_opponent.shift(lag - 1).to_numpy()
+        blocks.append(pd.DataFrame(block).ffill().shift(1).to_numpy())
+        names += [f'{stat}_vs_{col[len("Opp_"):]}_lag{lag}' for col in opp_cols]
+
+    # Joined as one block instead of 3 inserts per opponent
+    lagged = pd.DataFrame(np.hstack(blocks), index=df.index, columns=names)
+    return pd.concat([df.drop(columns=names, errors='ignore'), lagged], axis=1)
+
+
 # ===  Train Model ===
+XGB_PARAMS = dict(
+    objective='reg:squarederror',
+    learning_rate=0.07,         # smaller step size for better generalization
+    max_depth=5,                # slightly deeper trees to capture interactions
+    subsample=0.85,              # inject a bit of randomness to help generalization
+    colsample_bytree=0.85,       # sample features per tree to reduce overfitting
+    reg_alpha=0.05,              # slight L1 regularization
+    reg_lambda=0.7                # L2 regularization
+)
+N_ESTIMATORS = 350              # more trees to give it room to learn
+
+
 def train_model(features, targets):
+    import xgboost as xgb
+    from sklearn.multioutput import MultiOutputRegressor
+
     num_rows = len(features)
     weights = np.linspace(1, 3, num=num_rows)  # emphasize recent games
 
-    base_model = xgb.XGBRegressor(
-        objective='reg:squarederror',
-        learning_rate=0.07,         # smaller step size for better generalization
-        n_estimators=350,           # more trees to give it room to learn
-        max_depth=5,                # slightly deeper trees to capture interactions
-        subsample=0.85,              # inject a bit of randomness to help generalization
-        colsample_bytree=0.85,       # sample features per tree to reduce overfitting
-        reg_alpha=0.05,              # slight L1 regularization
-        reg_lambda=0.7                # L2 regularization
-    )
+    base_model = xgb.XGBRegressor(**XGB_PARAMS, n_estimators=N_ESTIMATORS)
 
     model = MultiOutputRegressor(base_model)
     model.fit(features, targets, sample_weight=weights)
+    stamp_training_info(model_boosters(model), features,
+                        targets, updates_since_full=0)
 
     return model, weights
 
-# ===  Walk-Forward Validation Follows more real world predictions ===
+# ===  Incremental Model Updates ===
+
+
+INCREMENTAL_ROUNDS = 25     # trees added on top of the saved model per update
+FULL_RETRAIN_EVERY = 10     # force a full refit after this many updates in a row
+MAX_INCREMENTAL_ROWS = 20   # more new games than this and we refit from scratch
+
+
+def stamp_training_info(boosters, features, targets, updates_since_full):
+    # Stored in the booster JSON so the next update can tell what it was
+    # trained on. The last row is left out of the fingerprint because
+    # add_user_input_opponent rewrites it for every prediction.
+    info = {
+        'trained_rows': str(len(features)),
+        'history_fingerprint': data_fingerprint(features.iloc[:-1], targets.iloc[:-1]),
+        'updates_since_full': str(updates_since_full),
+    }
+    for booster in boosters:
+        booster.set_attr(**info)
+
+
+def incremental_rows(base, features, targets, full_retrain_every=FULL_RETRAIN_EVERY,
+                     max_rows=MAX_INCREMENTAL_ROWS):
+    # How many trailing rows an update should train on, or None if the
+    # policy calls for a full refit
+    if base is None or base.attr('trained_rows') is None:
+        return None
+
+    # A new opponent or stat column changes the feature set
+    if base.boosters[0].feature_names != list(features.columns):
+        return None
 
+    # Periodic full refit so the ensemble doesn't drift
+    if int(base.attr('updates_since_full')) + 1 >= full_retrain_every:
+        return None
 
-def walk_forward_validation(features, targets, weights, window=10, val_window=5):
-    r2_scores = []
+    # Only append-only changes: the games the model saw must be untouched
+    trained_rows = int(base.attr('trained_rows'))
+    if len(features) <= trained_rows or len(features) - trained_rows > max_rows:
+        return None
+    history = data_fingerprint(
+        features.iloc[:trained_rows - 1], targets.iloc[:trained_rows - 1])
+    if history != base.attr('history_fingerprint'):
+        return None
 
-    for i in range(window, len(features) - val_window):
-        X_train = features.iloc[:i]
-        y_train = targets.iloc[:i]
-        w_train = weights[:i]
+    # The old prediction row now has its real opponent, so retrain on it too
+    return len(features) - trained_rows + 1
 
-        X_val = features.iloc[i:i + val_window]
-        y_val = targets.iloc[i:i + val_window]
 
-        model = MultiOutputRegressor(
-            xgb.XGBRegressor(objective='reg:squarederror'))
-        model.fit(X_train, y_train, sample_weight=w_train)
+def update_model(base, features, targets, new_rows, rounds=INCREMENTAL_ROUNDS):
+    # Continue boosting from the saved trees using only the appended games
+    import xgboost as xgb
 
-        y_pred = model.predict(X_val)
-        r2 = r2_score(y_val, y_pred, multioutput='uniform_average')
-        r2_scores.append(r2)
+    weights = np.linspace(1, 3, num=len(features))[-new_rows:]
+    new_features = features.iloc[-new_rows:]
+
+    boosters = []
+    for i, booster in enumerate(base.boosters):
+        dtrain = xgb.DMatrix(new_features, label=targets.iloc[-new_rows:, i], weight=weights)
+        boosters.append(xgb.train(XGB_PARAMS, dtrain,
+                        num_boost_round=rounds, xgb_model=booster))
+
+    stamp_training_info(boosters, features, targets,
+                        int(base.attr('updates_since_full')) + 1)
+    return BoosterModel(boosters)
+
+
+def train_or_update(player_name, features, targets):
+    # Cheap update from the player's last saved model when only new games
+    # were added, otherwise a full train_model
+    base = model_cache.latest(player_name, list(targets.columns))
+    new_rows = incremental_rows(base, features, targets)
+    if new_rows:
+        return update_model(base, features, targets, new_rows)
+    return train_model(features, targets)[0]
+
+# ===  Walk-Forward Validation Follows more real world predictions ===
+
+
+def walk_forward_validation(features, targets, weights, window=10, val_window=5, n_jobs=1):
+    # One default XGBRegressor per target for every prefix of the games;
+    # n_jobs > 1 trains the windows in a process pool (see walk_forward.py)
+    results = run_walk_forward(
+        features, targets, weights, window=window, val_window=val_window, n_jobs=n_jobs)
+    r2_scores = results['r2'].tolist()
 
     print("\nWalk-Forward R2 Scores (windowed):", r2_scores)
     print("Average R2:", np.mean(r2_scores))
+    print("Average MSE:", results['mse'].mean())
+    print(f"{len(results)} windows in {results.attrs['wall_seconds']:.2f}s "
+          f"({results.attrs['n_jobs']} jobs)")
+    return results
 # ===  Save Models ===
 
 
 def save_models(model, target_stats):
-    os.makedirs("xgb_json_models_v3", exist_ok=True)
+    os.makedirs(DEFAULT_MODEL_DIR, exist_ok=True)
     for i, est in enumerate(model.estimators_):
         est.get_booster().save_model(
-            f"xgb_json_models_v3/{target_stats[i]}.json")
+            f"{DEFAULT_MODEL_DIR}/{target_stats[i]}.json")
 
 # ===  Predict Next Game ===
 
@@ -259,26 +466,16 @@ def predict_next_game(model, features, target_stats):
 
 
 def get_prediction(player_name, selected_stat, opponent):
-    from dotenv import load_dotenv
-    import os
-    import firebase_admin
-    from firebase_admin import credentials
-
-    load_dotenv()
-    key_path = os.environ.get("FIREBASE_KEY_PATH")
-
-    if not key_path:
-        raise ValueError("FIREBASE_KEY_PATH environment variable is not set.")
-
-    if not firebase_admin._apps:
-        cred = credentials.Certificate(key_path)
-        firebase_admin.initialize_app(cred)
-
-    df = fetch_and_clean_player_data(player_name, selected_stat)
-    features, targets, target_stats = prepare_features_and_targets(
-        df, selected_stat)
+    check_stat(selected_stat)
+    games = load_clean_games(player_name)
+    features, targets, target_stats = feature_store.features_for(
+        player_name, selected_stat, games)
     features = add_user_input_opponent(features, opponent)
-    model, _ = train_model(features, targets)
+
+    # Only trains when this player's data (or the opponent) changed
+    model = model_cache.get_or_train(
+        player_name, selected_stat, features, targets,
+        train=lambda: train_or_update(player_name, features, targets))
     prediction = model.predict(features.iloc[[-1]])[0]
 
     return target_stats, prediction
@@ -296,7 +493,7 @@ if __name__ == "__main__":
     features, targets, target_stats = prepare_features_and_targets(
         df, selected_stat)
     features = add_user_input_opponent(features, opponent)
-    features = add_opponent_lagged_stats(features, selected_stat, opponent)
+    features = add_all_opponent_lagged_stats(features, selected_stat)
 
     model, weights = train_model(features, targets)
     # This is only for evluating the model, To see evaluation score uncomment this function
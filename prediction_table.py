@@ -0,0 +1,251 @@
+import argparse
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Every player x stat x opponent prediction for the day, keyed for lookups.
+# Built by `python prediction_table.py build`, served by PredictionTable.
+DEFAULT_TABLE_PATH = "prediction_table.sqlite"
+
+# A table older than this is not served (a nightly build that failed);
+# lookups miss and fall back to get_prediction until the next good build
+DEFAULT_MAX_AGE_HOURS = 36
+
+TABLE_SCHEMA = """
+CREATE TABLE predictions (
+    player     TEXT NOT NULL,
+    stat       TEXT NOT NULL,
+    opponent   TEXT NOT NULL,
+    prediction REAL NOT NULL,
+    games      INTEGER NOT NULL,
+    last_game  TEXT,
+    built_at   TEXT NOT NULL,
+    PRIMARY KEY (player, stat, opponent)
+) WITHOUT ROWID
+"""
+
+# === What to Precompute ===
+
+
+def player_data_query_space():
+    # The same players, stats and teams the frontend's dropdowns list
+    from predictionModelV3 import get_storage
+
+    storage = get_storage()
+    players = []
+    for _, data in storage.documents('playerData', fields=['first_name', 'last_name']):
+        full_name = f"{data.get('first_name', '')} {data.get('last_name', '')}".strip()
+        if full_name:
+            players.append("_".join(full_name.lower().split()))
+    stats = [doc_id for doc_id, _ in storage.documents('stats', fields=[])]
+    teams = [doc_id for doc_id, _ in storage.documents('teams', fields=[])]
+    return sorted(set(players)), stats, teams
+
+
+def store_query_space(store_path):
+    # Players and opponents found in the local game-log store
+    from game_log_store import load_league_games
+
+    games = load_league_games(store_path)
+    teams = games['Opp'].dropna().str.strip()
+    return sorted(games['player'].unique()), sorted(teams[teams != ''].unique())
+
+# === Predict One Player and Stat ===
+
+
+def opponent_rows(features, opponents):
+    # The next-game row once per opponent, set up like add_user_input_opponent
+    # does for a single request
+    rows = features.iloc[[-1] * len(opponents)].copy()
+    opp_cols = [col for col in rows.columns if col.startswith('Opp_')]
+    rows[opp_cols] = False
+    for i, opponent in enumerate(opponents):
+        if f'Opp_{opponent}' in rows.columns:
+            rows.iloc[i, rows.columns.get_loc(f'Opp_{opponent}')] = True
+    return rows
+
+
+def predict_player_stat(player, stat, opponents, store_path=None):
+    # One model per player and stat, then every opponent in a single predict
+    import predictionModelV3 as pm
+
+    df = pm.fetch_and_clean_player_data(player, stat, store_path=store_path)
+    features, targets, target_stats = pm.prepare_features_and_targets(df, stat)
+    model, _ = pm.train_model(features, targets)
+
+    predictions = model.predict(opponent_rows(features, opponents))[:, 0]
+    last_game = str(df['Date'].iloc[-1]) if 'Date' in df.columns else None
+    return [(player, stat, opponent, float(value), len(features), last_game)
+            for opponent, value in zip(opponents, predictions)]
+
+
+def _init_worker(threads_per_job):
+    # One XGBoost thread per job so the pool uses every core without
+    # oversubscribing them
+    import xgboost as xgb
+
+    xgb.set_config(nthread=threads_per_job)
+
+
+def _predict_job(player, stat, opponents, store_path):
+    try:
+        return player, stat, predict_player_stat(player, stat, opponents, store_path), None
+    except Exception as e:
+        return player, stat, [], f"{type(e).__name__}: {e}"
+
+# === Build the Table ===
+
+
+def build_table(players, stats, opponents, table_path=DEFAULT_TABLE_PATH, store_path=None,
+                n_jobs=-1):
+    start = time.perf_counter()
+    built_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    n_jobs = (os.cpu_count() or 1) if n_jobs == -1 else n_jobs
+
+    # Written next to the live table and swapped in at the end, so readers
+    # never see a half-built table
+    tmp_path = table_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    conn.execute(TABLE_SCHEMA)
+
+    jobs = [(player, stat) for player in players for stat in stats]
+    rows_written, failures = 0, []
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(1,)) as pool:
+        futures = [pool.submit(_predict_job, player, stat, opponents, store_path)
+                   for player, stat in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            player, stat, rows, error = future.result()
+            if error:
+                failures.append((player, stat, error))
+                continue
+            conn.executemany("INSERT INTO predictions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             [row + (built_at,) for row in rows])
+            rows_written += len(rows)
+            if done % 50 == 0:
+                print(f"{done}/{len(jobs)} player/stat pairs done")
+
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, table_path)
+
+    print(f"Wrote {rows_written} predictions for {len(jobs) - len(failures)}/{len(jobs)} "
+          f"player/stat pairs to {table_path} ({time.perf_counter() - start:.1f}s, {n_jobs} jobs)")
+    for player, stat, error in failures[:10]:
+        print(f"  skipped {player} {stat}: {error}")
+    return rows_written
+
+# === Serve from the Table ===
+
+
+class PredictionTable:
+    """Read side of the table: every row held in a dict for O(1) lookups.
+
+    The file is re-read when a new build replaces it. Nothing is served from
+    a table built more than max_age_hours ago (None: no limit), and with
+    get_storage a row is only served while gameStats has no game of that
+    player newer than the row's last_game; one count() aggregation per hit.
+    """
+
+    def __init__(self, table_path=DEFAULT_TABLE_PATH, max_age_hours=DEFAULT_MAX_AGE_HOURS,
+                 get_storage=None):
+        self.table_path = table_path
+        self.max_age_hours = max_age_hours
+        self.get_storage = get_storage
+        self._rows = {}
+        self._mtime = None
+        self.built_at = None
+
+    def _refresh(self):
+        try:
+            mtime = os.path.getmtime(self.table_path)
+        except OSError:
+            self._rows, self._mtime = {}, None
+            return
+        if mtime == self._mtime:
+            return
+        conn = sqlite3.connect(f"file:{self.table_path}?mode=ro", uri=True)
+        try:
+            self._rows = {(player, stat, opponent): (prediction, last_game)
+                          for player, stat, opponent, prediction, last_game in conn.execute(
+                              "SELECT player, stat, opponent, prediction, last_game FROM predictions")}
+            built_at = conn.execute("SELECT MIN(built_at) FROM predictions").fetchone()[0]
+        finally:
+            conn.close()
+        self.built_at = datetime.fromisoformat(built_at) if built_at else None
+        self._mtime = mtime
+
+    def is_expired(self):
+        if self.max_age_hours is None or self.built_at is None:
+            return False
+        age = datetime.now(timezone.utc) - self.built_at
+        return age.total_seconds() > self.max_age_hours * 3600
+
+    def has_newer_games(self, player, last_game):
+        # Games stored since the table was built change the lags it used
+        if self.get_storage is None or not last_game:
+            return False
+        newer = self.get_storage().count("gameStats", [("Date", ">", last_game)], id_prefix=f"{player}_")
+        return newer > 0
+
+    def lookup(self, player, stat, opponent):
+        # Same (target_stats, prediction) pair get_prediction returns, or
+        # None when the combination wasn't precomputed or is out of date
+        self._refresh()
+        row = self._rows.get((player, stat, opponent))
+        if row is None or self.is_expired():
+            return None
+        value, last_game = row
+        if self.has_newer_games(player, last_game):
+            return None
+        return [stat], np.array([value])
+
+    def __len__(self):
+        self._refresh()
+        return len(self._rows)
+
+
+def get_table_prediction(table, player_name, selected_stat, opponent):
+    # Table first; only a miss pays for the full get_prediction pipeline
+    hit = table.lookup(player_name, selected_stat, opponent)
+    if hit is not None:
+        return hit
+    from predictionModelV3 import get_prediction
+    return get_prediction(player_name, selected_stat, opponent)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Precompute every player x stat x opponent prediction.")
+    parser.add_argument("command", choices=["build", "show"])
+    parser.add_argument("--table", default=DEFAULT_TABLE_PATH)
+    parser.add_argument("--store", help="read games from this local game-log store instead of Firestore")
+    parser.add_argument("--players", nargs="+", help="default: playerData (or every player in --store)")
+    parser.add_argument("--stats", nargs="+", help="default: the stats collection")
+    parser.add_argument("--opponents", nargs="+", help="default: teams (or every opponent in --store)")
+    parser.add_argument("--jobs", type=int, default=-1, help="worker processes, -1 for all cores")
+    parser.add_argument("--max-age-hours", type=float, default=DEFAULT_MAX_AGE_HOURS,
+                        help="for show: treat an older table as expired")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        players, stats, opponents = args.players, args.stats, args.opponents
+        if args.store:
+            store_players, store_teams = store_query_space(args.store)
+            players, opponents = players or store_players, opponents or store_teams
+        if not (players and stats and opponents):
+            fs_players, fs_stats, fs_teams = player_data_query_space()
+            players, stats, opponents = players or fs_players, stats or fs_stats, opponents or fs_teams
+        build_table(players, stats, opponents, args.table, args.store, args.jobs)
+    else:
+        table = PredictionTable(args.table, args.max_age_hours)
+        start = time.perf_counter()
+        print(f"{len(table)} predictions loaded in {(time.perf_counter() - start) * 1000:.1f} ms, "
+              f"built {table.built_at}{' (expired)' if table.is_expired() else ''}")
+        if args.players and args.stats and args.opponents:
+            print(table.lookup(args.players[0], args.stats[0], args.opponents[0]))
@@ -1,45 +1,90 @@
 import numpy as np
-import xgboost as xgb
 
-model_name = input(
-    "Please enter the name of the file with the model you would like to use. ")
+# === Loaded Model (used by backendAPI) ===
+# The booster is loaded once and shared by every request. xgboost is
+# imported when a model is loaded, so importing backendAPI stays cheap
+_model = None
 
-try:
-    model = xgb.Booster(model_file=model_name)
-except Exception as e:
-    print(f"Error loading the model: {e}")
-    exit()
 
-num_features = model.feature_names if hasattr(model, 'feature_names') else None
-if num_features:
-    n_features = len(num_features)
-else:
-    raise Exception("Couldn't find the model features")
+def load_xgb_model(model_path):
+    import xgboost as xgb
 
-print(f"This model expects {n_features} input features.")
+    global _model
+    _model = xgb.Booster(model_file=model_path)
+    return _model
 
-# Prompt the user for input
-try:
-    feature_values_str = input(
-        f"Enter the {n_features} feature values separated by spaces: ")
-    feature_values = [float(x) for x in feature_values_str.split()]
 
-    if len(feature_values) != n_features:
-        print(f"Error: Please enter exactly {n_features} feature values.")
+def get_loaded_model():
+    return _model
+
+
+def get_expected_features_count():
+    if _model is None:
+        return None
+    if _model.feature_names:
+        return len(_model.feature_names)
+    return _model.num_features()
+
+
+def predict_with_loaded_model(features):
+    # One row in, one prediction out
+    return float(predict_batch_with_loaded_model([features])[0])
+
+
+def predict_batch_with_loaded_model(rows):
+    # rows: (n_rows, n_features) array or list of equal-length lists.
+    # A single inplace_predict call for the whole batch, no DMatrix per row
+    if _model is None:
+        raise RuntimeError("No model loaded. Call load_xgb_model first.")
+
+    X = np.asarray(rows, dtype=np.float32)
+    if X.ndim != 2:
+        raise ValueError("Expected a list of equal-length feature vectors.")
+    return _model.inplace_predict(X)
+
+
+if __name__ == "__main__":
+    import xgboost as xgb
+
+    model_name = input(
+        "Please enter the name of the file with the model you would like to use. ")
+
+    try:
+        model = xgb.Booster(model_file=model_name)
+    except Exception as e:
+        print(f"Error loading the model: {e}")
         exit()
 
-    # Convert the input to the DMatrix format that XGBoost uses
-    dmatrix = xgb.DMatrix(
-        np.array([feature_values]), feature_names=num_features)
+    num_features = model.feature_names if hasattr(model, 'feature_names') else None
+    if num_features:
+        n_features = len(num_features)
+    else:
+        raise Exception("Couldn't find the model features")
+
+    print(f"This model expects {n_features} input features.")
+
+    # Prompt the user for input
+    try:
+        feature_values_str = input(
+            f"Enter the {n_features} feature values separated by spaces: ")
+        feature_values = [float(x) for x in feature_values_str.split()]
+
+        if len(feature_values) != n_features:
+            print(f"Error: Please enter exactly {n_features} feature values.")
+            exit()
+
+        # Convert the input to the DMatrix format that XGBoost uses
+        dmatrix = xgb.DMatrix(
+            np.array([feature_values]), feature_names=num_features)
 
-    # Make the prediction
-    prediction = model.predict(dmatrix)
+        # Make the prediction
+        prediction = model.predict(dmatrix)
 
-    print("\nPrediction:", prediction)
+        print("\nPrediction:", prediction)
 
-except ValueError:
-    print("Error: Please enter numeric values for the features.")
-except KeyboardInterrupt:
-    print("\nExiting...")
-except Exception as e:
-    print(f"An unexpected error occurred: {e}")
+    except ValueError:
+        print("Error: Please enter numeric values for the features.")
+    except KeyboardInterrupt:
+        print("\nExiting...")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
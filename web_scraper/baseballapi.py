@@ -1,6 +1,29 @@
-import statsapi
+import argparse
+import gzip
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+import statsapi
+
+# Finished games' boxscores, one gzipped JSON file per game_id. A boxscore
+# has every player in the game, so it is fetched once for all of them
+DEFAULT_BOXSCORE_DIR = "boxscore_cache"
+
+# Boxscore requests in flight at once
+MAX_PARALLEL_REQUESTS = 4
+
+# Schedule states after which a boxscore no longer changes. Statuses carry
+# a reason after a colon ("Final: Tied", "Completed Early: Rain"), so only
+# the part before it is compared
+FINAL_STATES = ("Final", "Game Over", "Completed Early")
+IN_PROGRESS_STATES = ("In Progress",)
+
+def status_in(status, states):
+    return status.split(":")[0].strip() in states
+
 def get_player_id(player_name):
     """
     Looks up a player's ID using their name.
@@ -11,6 +34,127 @@ def get_player_id(player_name):
         return people[0]['id']
     return None
 
+# === Boxscores ===
+
+class BoxscoreCache:
+    """Raw /game/{game_id}/boxscore responses on disk, keyed by game_id.
+
+    Only finished games are written; a game still in progress is fetched
+    again on the next call.
+    """
+
+    def __init__(self, path=DEFAULT_BOXSCORE_DIR):
+        self.path = path
+        self.requests = 0
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, game_id):
+        return os.path.join(self.path, f"{game_id}.json.gz")
+
+    def get(self, game_id, final=True):
+        filename = self._file(game_id)
+        if os.path.exists(filename):
+            with gzip.open(filename, "rt", encoding="utf-8") as f:
+                return json.load(f)
+
+        boxscore = statsapi.get("game_boxscore", {"gamePk": game_id})
+        with self._lock:
+            self.requests += 1
+        if final:
+            tmp_name = f"{filename}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_name, "wt", encoding="utf-8") as f:
+                json.dump(boxscore, f)
+            os.replace(tmp_name, filename)
+        return boxscore
+
+def fetch_boxscores(games, cache=None, workers=MAX_PARALLEL_REQUESTS):
+    # {game_id: boxscore, or None if it failed} for schedule entries, at most
+    # `workers` requests at a time
+    cache = cache or BoxscoreCache()
+
+    def fetch(game):
+        try:
+            return cache.get(game['game_id'], final=status_in(game['status'], FINAL_STATES))
+        except Exception as e:
+            print(f"Error fetching boxscore for game {game['game_id']} on {game['game_date']}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip((game['game_id'] for game in games), executor.map(fetch, games)))
+
+def game_log_rows(game, boxscore, player_ids=None):
+    # One game-log row per player who batted in the game (only player_ids if given)
+    rows = []
+    for side, other in (("away", "home"), ("home", "away")):
+        team = boxscore['teams'][side]
+        for player in team['players'].values():
+            player_id = player['person']['id']
+            if player_ids is not None and player_id not in player_ids:
+                continue
+            batting_info = player.get('stats', {}).get('batting')
+            if not batting_info:
+                continue
+            # Rate stats are only in the season-to-date line
+            season_info = player.get('seasonStats', {}).get('batting', {})
+            rows.append({
+                "player_id": player_id,
+                "Player": player['person'].get('fullName', ''),
+                "game_id": game['game_id'],
+                "Date": game['game_date'],
+                "Status": game['status'],
+                "Team": game[f'{side}_name'],
+                "Opp": game[f'{other}_name'],
+                "AB": batting_info.get('atBats', 0),
+                "R": batting_info.get('runs', 0),
+                "H": batting_info.get('hits', 0),
+                "2B": batting_info.get('doubles', 0),
+                "3B": batting_info.get('triples', 0),
+                "HR": batting_info.get('homeRuns', 0),
+                "RBI": batting_info.get('rbi', 0),
+                "BB": batting_info.get('baseOnBalls', batting_info.get('walks', 0)),
+                "SO": batting_info.get('strikeOuts', 0),
+                "SB": batting_info.get('stolenBases', 0),
+                "CS": batting_info.get('caughtStealing', 0),
+                "AVG": season_info.get('avg', 'N/A'),
+                "OBP": season_info.get('obp', 'N/A'),
+                "SLG": season_info.get('slg', 'N/A'),
+                "OPS": season_info.get('ops', 'N/A'),
+            })
+    return rows
+
+def fetch_game_logs(start_date, end_date, player_ids=None, team_id=None, cache=None,
+                    workers=MAX_PARALLEL_REQUESTS, include_in_progress=False):
+    # {player_id: [rows, oldest first]} for every finished game in the date
+    # range (MM/DD/YYYY), from one schedule request and one boxscore per game.
+    # include_in_progress adds games still being played; their rows are
+    # partial box lines, told apart by their "Status"
+    kwargs = {"team": team_id} if team_id else {}
+    schedule = statsapi.schedule(start_date=start_date, end_date=end_date, **kwargs)
+    states = FINAL_STATES + IN_PROGRESS_STATES if include_in_progress else FINAL_STATES
+    games = [game for game in schedule if status_in(game['status'], states)]
+    boxscores = fetch_boxscores(games, cache, workers)
+
+    game_logs = {}
+    for game in games:
+        if boxscores[game['game_id']] is None:
+            continue
+        for row in game_log_rows(game, boxscores[game['game_id']], player_ids):
+            game_logs.setdefault(row['player_id'], []).append(row)
+    return game_logs
+
+def print_game_logs(game_logs):
+    if game_logs:
+        # Print header
+        header = "| " + " | ".join(game_logs[0].keys()) + " |"
+        print(header)
+        print("|" + "---|" * len(game_logs[0].keys()))
+        for log in game_logs:
+            row = "| " + " | ".join([str(log[key]) for key in log.keys()]) + " |"
+            print(row)
+    else:
+        print("No recent game logs found.")
+
 def get_shohei_ohtani_game_data(num_games=10):
     """
     Fetches Shohei Ohtani's recent game data and current season stats.
@@ -29,81 +173,14 @@ def get_shohei_ohtani_game_data(num_games=10):
     end_date = today.strftime('%m/%d/%Y')
 
     print(f"Fetching game logs from {start_date} to {end_date}...\n")
-    # Fetch schedule for the Dodgers for the specified date range
-    # We'll filter for Ohtani's stats from each game later
+    # Only the Dodgers' games; every boxscore is cached for the other players too
     dodgers_id = statsapi.lookup_team("Dodgers")[0]['id']
-    schedule = statsapi.schedule(start_date=start_date, end_date=end_date, team=dodgers_id)
-
-    game_logs = []
-    # Iterate through games in reverse chronological order for "last X games"
-    for game in reversed(schedule):
-        if len(game_logs) >= num_games:
-            break # Stop once we have enough games
-
-        game_id = game['game_id']
-        game_date = game['game_date']
-        opponent = game['away_name'] if game['home_id'] == dodgers_id else game['home_name']
-
-        try:
-            # Get boxscore data for the game
-            boxscore_data = statsapi.boxscore_data(game_id)
-
-            # Find Ohtani's batting stats in the boxscore
-            ohtani_stats = None
-            for player_id, player_data in boxscore_data['playerInfo'].items():
-                if int(player_id) == ohtani_id:
-                    ohtani_stats = player_data
-                    break
-
-            if ohtani_stats:
-                # Batting stats are usually under 'batting' or similar
-                # The exact keys might vary, so we'll look for common ones
-                batting_info = {}
-                if 'batting' in ohtani_stats:
-                    batting_info = ohtani_stats['batting']
-                elif 'stats' in ohtani_stats and 'batting' in ohtani_stats['stats']:
-                     batting_info = ohtani_stats['stats']['batting']
-
-                if batting_info:
-                    log_entry = {
-                        "Date": game_date,
-                        "Opp": opponent,
-                        "AB": batting_info.get('atBats', 0),
-                        "R": batting_info.get('runs', 0),
-                        "H": batting_info.get('hits', 0),
-                        "2B": batting_info.get('doubles', 0),
-                        "3B": batting_info.get('triples', 0),
-                        "HR": batting_info.get('homeRuns', 0),
-                        "RBI": batting_info.get('rbi', 0),
-                        "BB": batting_info.get('walks', 0),
-                        "SO": batting_info.get('strikeOuts', 0),
-                        "SB": batting_info.get('stolenBases', 0),
-                        "CS": batting_info.get('caughtStealing', 0),
-                        "AVG": batting_info.get('avg', 'N/A'),
-                        "OBP": batting_info.get('obp', 'N/A'),
-                        "SLG": batting_info.get('slg', 'N/A'),
-                        "OPS": batting_info.get('ops', 'N/A'),
-                    }
-                    game_logs.append(log_entry)
-                else:
-                    print(f"No batting stats found for Ohtani in game {game_id} on {game_date}")
-            else:
-                print(f"Ohtani not found in boxscore for game {game_id} on {game_date}")
-
-        except Exception as e:
-            print(f"Error fetching boxscore for game {game_id} on {game_date}: {e}")
+    game_logs = fetch_game_logs(start_date, end_date, player_ids={ohtani_id}, team_id=dodgers_id)
+    # Most recent first
+    game_logs = game_logs.get(ohtani_id, [])[::-1][:num_games]
 
     print("\n--- Recent Game Logs ---\n")
-    if game_logs:
-        # Print header
-        header = "| " + " | ".join(game_logs[0].keys()) + " |"
-        print(header)
-        print("|" + "---|" * len(game_logs[0].keys()))
-        for log in game_logs:
-            row = "| " + " | ".join([str(log[key]) for key in log.keys()]) + " |"
-            print(row)
-    else:
-        print("No recent game logs found.")
+    print_game_logs(game_logs)
 
     print("\n--- 2025 Season Stats ---\n")
     # Get career/season stats
@@ -123,5 +200,30 @@ def get_shohei_ohtani_game_data(num_games=10):
     except Exception as e:
         print(f"Error fetching 2025 season stats: {e}")
 
-# Run the function
-get_shohei_ohtani_game_data(num_games=10)
\ No newline at end of file
+def main():
+    parser = argparse.ArgumentParser(description="Fetch every tracked player's game logs from the day's boxscores.")
+    yesterday = (datetime.now() - timedelta(days=1)).strftime('%m/%d/%Y')
+    parser.add_argument("--start", default=yesterday, help="MM/DD/YYYY (default yesterday)")
+    parser.add_argument("--end", help="MM/DD/YYYY (default --start)")
+    parser.add_argument("--player", action="append", help="player to track (repeatable; default every batter)")
+    parser.add_argument("--workers", type=int, default=MAX_PARALLEL_REQUESTS, help="boxscore requests at once")
+    parser.add_argument("--cache", default=DEFAULT_BOXSCORE_DIR)
+    parser.add_argument("--in-progress", action="store_true",
+                        help="also include games still being played (partial box lines)")
+    args = parser.parse_args()
+
+    player_ids = None
+    if args.player:
+        player_ids = {get_player_id(name) for name in args.player} - {None}
+    cache = BoxscoreCache(args.cache)
+    game_logs = fetch_game_logs(args.start, args.end or args.start, player_ids, cache=cache,
+                                workers=args.workers, include_in_progress=args.in_progress)
+    rows = sum(len(logs) for logs in game_logs.values())
+    print(f"{rows} game-log rows for {len(game_logs)} players from {cache.requests} boxscore requests")
+    if args.player:
+        for logs in game_logs.values():
+            print(f"\n--- {logs[0]['Player']} ---\n")
+            print_game_logs(logs)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+import argparse
+import csv
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+import updated_scraper as scraper
+from http_cache import cached_get, default_cache
+from table_extract import BATTING_PRE_ID, BATTING_TABLE_ID
+from watermarks import DELTA_DIR, Watermarks
+
+# Baseball-Reference blocks clients that make more than 20 requests a minute
+REQUESTS_PER_MINUTE = 20
+
+# Headless Chromes kept open for the whole batch (and worker threads)
+DEFAULT_DRIVERS = 3
+
+# How long a driver waits for the JavaScript to render the batting table
+TABLE_WAIT_SECONDS = 20
+
+# Scrolls a driver makes looking for "Share & Export" before giving up
+CSV_BUTTON_SCROLLS = 10
+
+# === Rate Limiting ===
+
+
+class HostRateLimiter:
+    """Spaces requests to each host evenly, shared by every worker thread.
+
+    Each caller reserves the host's next free slot under the lock and then
+    sleeps outside it, so waiting threads queue up in order instead of all
+    waking at once.
+    """
+
+    def __init__(self, per_minute=REQUESTS_PER_MINUTE):
+        self.interval = 60.0 / per_minute
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+# === Driver Pool ===
+
+
+class DriverPool:
+    """Up to `size` long-lived drivers, created on first use and reused for every page.
+
+    A driver whose task raised (a crashed or hung browser, or chromedriver
+    dying mid-request with a urllib3 error) is quit and replaced rather than
+    handed out again.
+    """
+
+    def __init__(self, size, factory):
+        self.size = size
+        self._factory = factory
+        self._idle = queue.Queue()
+        self._drivers = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def driver(self):
+        driver = self._acquire()
+        try:
+            yield driver
+        except BaseException:
+            self._discard(driver)
+            raise
+        self._idle.put(driver)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._drivers) < self.size:
+                driver = self._factory()
+                self._drivers.append(driver)
+                return driver
+        return self._idle.get()
+
+    def _discard(self, driver):
+        with self._lock:
+            self._drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass  # already dead
+
+    def close(self):
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+# === Batch ===
+
+
+def read_roster(path, column="Player"):
+    # Unique player names from a roster CSV, in file order
+    with open(path, newline="", encoding="utf-8") as f:
+        names = (scraper.normalize_player_name(row[column]) for row in csv.DictReader(f) if row.get(column))
+        return list(dict.fromkeys(names))
+
+
+class BatchScraper:
+    """Scrapes a list of players: one task finds a player's seasons, then
+    one task per (player, season) saves the game-log CSV.
+
+    Pages come from the HTTP cache when they can; otherwise from the driver
+    pool, or from the pooled HTTP session with http=True. Drivers click
+    through to the CSV <pre>; HTTP pages only have the table, which main()
+    first checks against cached <pre> pages (table_csv_trusted). Every
+    request waits for the shared rate limiter instead of sleeping a fixed time.
+    Players with a watermark only get their current season (full=False).
+    """
+
+    def __init__(self, drivers=DEFAULT_DRIVERS, http=False, limiter=None, watermarks=None, full=False):
+        self.workers = drivers
+        self.http = http
+        self.limiter = limiter or HostRateLimiter()
+        self.watermarks = watermarks if watermarks is not None else Watermarks()
+        self.full = full
+        self.pool = None if http else DriverPool(drivers, lambda: scraper.initialize_driver(headless=True))
+
+    def fetch(self, url, wait_for_id=None, csv_button=False):
+        # (html, final URL, from cache). With csv_button the driver clicks
+        # "Share & Export" -> CSV and the page is only used (or cached) once
+        # it has the <pre> that click leaves
+        ready_id = BATTING_PRE_ID if csv_button else wait_for_id
+        cache = default_cache()
+        cached = cache.fresh(url)
+        if cached is not None and (not csv_button or f'id="{ready_id}"' in cached.text):
+            return cached.text, cached.url, True
+        if self.http:
+            self.limiter.wait(url)
+            response = cached_get(url)
+            return response.text, response.url, response.from_cache
+
+        with self.pool.driver() as driver:
+            self.limiter.wait(url)
+            driver.get(url)
+            if wait_for_id:
+                try:
+                    WebDriverWait(driver, TABLE_WAIT_SECONDS).until(
+                        EC.presence_of_element_located((By.ID, wait_for_id)))
+                except TimeoutException:
+                    pass
+            if csv_button:
+                try:
+                    scraper.click_share_export_and_csv(driver, max_scrolls=CSV_BUTTON_SCROLLS)
+                    WebDriverWait(driver, TABLE_WAIT_SECONDS).until(
+                        EC.presence_of_element_located((By.ID, BATTING_PRE_ID)))
+                except Exception:
+                    pass  # save_season reports the missing <pre>
+            html, final_url = driver.page_source, driver.current_url
+        # A page whose table never rendered (a timeout, rate-limit or error
+        # page) is not cached; for a past season it would never be fetched again
+        if ready_id is None or f'id="{ready_id}"' in html:
+            cache.store(url, html, final_url)
+        return html, final_url, False
+
+    def find_seasons(self, player_name):
+        # (player, season URL, label) for each season to scrape
+        links = None if self.full else self.watermarks.incremental_links(player_name)
+        if links is not None:
+            return [(player_name, url, label) for label, url in links]
+
+        player_url = scraper.indexed_player_url(player_name)
+        if not player_url:
+            search_url = scraper.search_url_for(player_name)
+            html, final_url, _ = self.fetch(search_url)
+            if final_url != search_url:
+                player_url = final_url
+            else:
+                links = BeautifulSoup(html, "html.parser").find_all("a", href=True)
+                player_url = scraper.matching_player_link(
+                    player_name, (urljoin(scraper.BASE_URL, a["href"]) for a in links))
+            scraper.remember_player_url(player_name, player_url)
+        if not player_url:
+            raise LookupError(f"No player found for {player_name}")
+
+        html, _, _ = self.fetch(player_url)
+        year_links = scraper.get_year_links(BeautifulSoup(html, "html.parser"))
+        return [(player_name, scraper.BASE_URL + href, a.text.strip()) for a, href in year_links]
+
+    def scrape_season(self, task):
+        player_name, url, label = task
+        html, _, from_cache = self.fetch(url, wait_for_id=BATTING_TABLE_ID, csv_button=not self.http)
+        if scraper.save_season(html, player_name, label, url, self.watermarks, from_table=self.http) is None:
+            raise LookupError(f"No batting table on {url}")
+        return "from cache" if from_cache else "fetched"
+
+    def run(self, players):
+        # Returns (Counter of season outcomes, [(player or season, error)])
+        start = time.perf_counter()
+        outcomes, failures = Counter(), []
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                pending = {executor.submit(self.find_seasons, player): player for player in players}
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        task = pending.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            failures.append((task, f"{type(e).__name__}: {e}"))
+                            continue
+                        if isinstance(task, str):
+                            # A player's seasons go to the back of the same queue
+                            for season in result:
+                                pending[executor.submit(self.scrape_season, season)] = season
+                        else:
+                            outcomes[result] += 1
+                            report_progress(outcomes, failures, start)
+        finally:
+            if self.pool is not None:
+                self.pool.close()
+        return outcomes, failures
+
+
+def report_progress(outcomes, failures, start):
+    seasons = sum(outcomes.values())
+    if seasons % 10 == 0:
+        minutes = (time.perf_counter() - start) / 60
+        print(f"... {seasons} seasons saved, {len(failures)} failures, "
+              f"{seasons / max(minutes, 1e-9):.1f} seasons/min")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape the game logs of every player on a roster.")
+    parser.add_argument("--roster", default="merged_baseball_stats.csv")
+    parser.add_argument("--column", default="Player", help="roster column with the player names")
+    parser.add_argument("--limit", type=int, help="only the first N players")
+    parser.add_argument("--drivers", type=int, default=DEFAULT_DRIVERS, help="headless Chromes (or HTTP workers)")
+    parser.add_argument("--http", action="store_true", help="fetch pages over HTTP instead of driving Chrome")
+    parser.add_argument("--per-minute", type=float, default=REQUESTS_PER_MINUTE,
+                        help="requests per minute to any one host")
+    parser.add_argument("--full", action="store_true",
+                        help="scrape every season even for players scraped before")
+    args = parser.parse_args()
+
+    if args.http and not scraper.table_csv_trusted():
+        sys.exit(1)
+    os.makedirs("scraped_files", exist_ok=True)
+    players = read_roster(args.roster, args.column)[:args.limit]
+    print(f"Scraping {len(players)} players with {args.drivers} "
+          f"{'HTTP workers' if args.http else 'headless drivers'}, {args.per_minute:g} requests/min")
+
+    start = time.perf_counter()
+    batch = BatchScraper(args.drivers, args.http, HostRateLimiter(args.per_minute), full=args.full)
+    outcomes, failures = batch.run(players)
+    minutes = (time.perf_counter() - start) / 60
+
+    seasons = sum(outcomes.values())
+    print(f"\n{seasons} seasons for {len(players)} players in {minutes:.1f} min "
+          f"({seasons / max(minutes, 1e-9):.1f} seasons/min): "
+          + ", ".join(f"{count} {outcome}" for outcome, count in outcomes.items()))
+    if failures:
+        print(f"{len(failures)} failures:")
+        for task, error in failures:
+            print(f"  {task if isinstance(task, str) else task[1]}: {error}")
+    print(f"Upload only the new games with: python ingest_game_logs.py --source {DELTA_DIR} --consume")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,18 @@
-import requests
 from bs4 import BeautifulSoup
+from http_cache import cached_get
+from player_index import default_index
 
 def get_player_id(first_name, last_name):
+    # The local ID index answers without a request once the player is in it
+    index = default_index()
+    player_id = index.bbref_id(f"{first_name} {last_name}")
+    if player_id:
+        return player_id
+
     # Format the search URL for Baseball Reference
     search_url = f"https://www.baseball-reference.com/search/search.fcgi?search={first_name}+{last_name}"
-    response = requests.get(search_url)
+    # Cached; asked again with a conditional request once it is a few hours old
+    response = cached_get(search_url)
     soup = BeautifulSoup(response.text, 'html.parser')
 
     # Try to find the first player link in the search results
@@ -13,6 +21,7 @@ def get_player_id(first_name, last_name):
         if href.startswith('/players/') and href.endswith('.shtml'):
             # Player ID is the last part of the URL before .shtml
             player_id = href.split('/')[-1].replace('.shtml', '')
+            index.remember(f"{first_name} {last_name}", bbref_id=player_id)
             return player_id
     return None
 
@@ -0,0 +1,272 @@
+import argparse
+import difflib
+import json
+import os
+import re
+import sys
+import threading
+import time
+import unicodedata
+from urllib.parse import parse_qs, urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+from http_cache import cached_get, default_cache
+from watermarks import DEFAULT_WATERMARK_PATH
+
+# Normalized player name -> Baseball-Reference and MLBAM IDs, so looking a
+# player up needs no search page
+DEFAULT_INDEX_PATH = "player_index.json"
+
+# How close (difflib ratio) a name must be to be offered as a suggestion
+FUZZY_CUTOFF = 0.88
+
+BASE_URL = "https://www.baseball-reference.com"
+SEARCH_URL = BASE_URL + "/search/search.fcgi?search="
+
+PLAYER_PATH = re.compile(r"/players/[a-z]/([a-z0-9.'-]+)\.shtml$")
+
+_index = None
+_lock = threading.Lock()
+
+
+def normalize_name(name):
+    # "Ronald Acuña Jr." -> "ronald acuna jr", "J.D. Martinez" -> "jd martinez".
+    # Suffixes stay: Vladimir Guerrero Jr. is not his father
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^a-z ]", "", name.lower().replace("-", " ")).split())
+
+
+def bbref_id_from_player_url(url):
+    # ".../players/s/sotoju01.shtml" -> "sotoju01"
+    match = PLAYER_PATH.search(urlparse(url or "").path)
+    return match.group(1) if match else None
+
+
+def player_url_for(bbref_id):
+    return f"{BASE_URL}/players/{bbref_id[0]}/{bbref_id}.shtml"
+
+# === Index ===
+
+
+class PlayerIndex:
+    """{normalized name: {"name", "bbref_ids", "mlbam_ids", "doc_id"}} in a JSON file.
+
+    Every ID a source gives a name is kept, so two players sharing a name
+    show up as two IDs and bbref_id()/mlbam_id() answer None for them
+    rather than guess; the scrapers then search as before. Lookups are
+    exact dict hits. suggest() offers the closest names for a misspelt one
+    (comparing against names sharing a word with it first) and is never
+    used to pick a player automatically.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._players = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._players = json.load(f)
+        self._by_word = {}
+        for key in self._players:
+            self._index_words(key)
+
+    def _index_words(self, key):
+        for word in key.split():
+            self._by_word.setdefault(word, set()).add(key)
+
+    def __len__(self):
+        return len(self._players)
+
+    def save(self):
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._players, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def add(self, name, bbref_id=None, mlbam_id=None, doc_id=None):
+        key = normalize_name(name)
+        if not key:
+            return None
+        with self._lock:
+            entry = self._players.get(key)
+            if entry is None:
+                entry = self._players[key] = {"name": name.strip()}
+                self._index_words(key)
+            for field, value in (("bbref_ids", bbref_id), ("mlbam_ids", mlbam_id)):
+                if value and value not in entry.setdefault(field, []):
+                    entry[field].append(value)
+            if doc_id and not entry.get("doc_id"):
+                entry["doc_id"] = doc_id
+            return entry
+
+    def remember(self, name, bbref_id=None, mlbam_id=None):
+        # add() and save(), for IDs found by a network search
+        self.add(name, bbref_id, mlbam_id)
+        self.save()
+
+    def lookup(self, name):
+        # The entry for exactly this (normalized) name, or None
+        return self._players.get(normalize_name(name))
+
+    def suggest(self, name, count=3, cutoff=FUZZY_CUTOFF):
+        # Entries with names close to a misspelt one, closest first
+        key = normalize_name(name)
+        sharing_a_word = set().union(*(self._by_word.get(word, ()) for word in key.split()))
+        for candidates in (sharing_a_word, self._players):
+            matches = difflib.get_close_matches(key, candidates, n=count, cutoff=cutoff)
+            if matches:
+                return [self._players[match] for match in matches]
+        return []
+
+    def _only_id(self, name, field):
+        # The name's one ID, or None when it is unknown or shared by players
+        ids = (self.lookup(name) or {}).get(field, [])
+        return ids[0] if len(ids) == 1 else None
+
+    def bbref_id(self, name):
+        return self._only_id(name, "bbref_ids")
+
+    def mlbam_id(self, name):
+        return self._only_id(name, "mlbam_ids")
+
+    def missing(self, field):
+        return [entry["name"] for entry in self._players.values() if not entry.get(field)]
+
+
+def default_index():
+    # Shared by every scraper in the process; PLAYER_INDEX picks the file
+    global _index
+    with _lock:
+        if _index is None:
+            _index = PlayerIndex(os.environ.get("PLAYER_INDEX") or DEFAULT_INDEX_PATH)
+    return _index
+
+# === Sources ===
+
+
+def add_search_page(index, search_url, html, final_url):
+    # A search that redirected names the player's page; a results page
+    # lists "<a href="/players/s/sotoju01.shtml">Juan Soto</a>" links
+    name = parse_qs(urlparse(search_url).query).get("search", [""])[0]
+    bbref_id = bbref_id_from_player_url(final_url)
+    if name and bbref_id:
+        index.add(name, bbref_id=bbref_id)
+        return 1
+    added = 0
+    for a in BeautifulSoup(html, "html.parser").find_all("a", href=True):
+        bbref_id = bbref_id_from_player_url(urljoin(BASE_URL, a["href"]))
+        if bbref_id and a.get_text(strip=True):
+            index.add(a.get_text(strip=True), bbref_id=bbref_id)
+            added += 1
+    return added
+
+
+def add_cached_searches(index, cache=None):
+    # Every search page the scrapers have already fetched
+    cache = cache or default_cache()
+    added = 0
+    for url in cache.urls(SEARCH_URL):
+        entry = cache.lookup(url)
+        added += add_search_page(index, url, entry["text"], entry["final_url"])
+    return added
+
+
+def add_watermarks(index, path=DEFAULT_WATERMARK_PATH):
+    # Players scraped before, with the ID of the game logs they came from
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        marks = json.load(f)
+    for name, mark in marks.items():
+        index.add(name, bbref_id=mark.get("bbref_id"))
+    return len(marks)
+
+
+def add_player_data(index, storage):
+    # Every roster name in playerData, with its document ID
+    added = 0
+    for doc_id, data in storage.documents("playerData", fields=["Player", "first_name", "last_name"]):
+        name = data.get("Player") or " ".join(filter(None, (data.get("first_name"), data.get("last_name"))))
+        if index.add(name or doc_id.replace("_", " "), doc_id=doc_id):
+            added += 1
+    return added
+
+
+def add_mlbam_seasons(index, seasons):
+    # Every MLB player in each season from the endpoint statsapi.lookup_player
+    # filters, one request per season instead of one per name
+    import statsapi
+
+    added = 0
+    for season in seasons:
+        try:
+            people = statsapi.get("sports_players", {"sportId": 1, "season": season,
+                                                     "fields": "people,id,fullName"})["people"]
+        except Exception as e:
+            print(f"Could not fetch the {season} MLB players: {e}")
+            continue
+        for person in people:
+            index.add(person["fullName"], mlbam_id=person["id"])
+        added += len(people)
+    return added
+
+
+def search_missing(index, limit=None, per_minute=None):
+    # Looks up players still without a Baseball-Reference ID on the search
+    # page (cached, so a rebuild does not ask again). Requests the cache
+    # cannot answer wait for the same per-host limit as the batch scraper
+    from batch_scraper import REQUESTS_PER_MINUTE, HostRateLimiter
+
+    limiter = HostRateLimiter(per_minute or REQUESTS_PER_MINUTE)
+    cache = default_cache()
+    names = index.missing("bbref_ids")[:limit]
+    for name in names:
+        search_url = SEARCH_URL + name.replace(" ", "+")
+        if cache.fresh(search_url) is None:
+            limiter.wait(search_url)
+        response = cached_get(search_url)
+        add_search_page(index, search_url, response.text, response.url)
+    return len(names)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build the local player ID index, or look names up in it.")
+    parser.add_argument("command", choices=["build", "lookup"])
+    parser.add_argument("names", nargs="*", help="names for lookup")
+    parser.add_argument("--index", default=os.environ.get("PLAYER_INDEX") or DEFAULT_INDEX_PATH)
+    parser.add_argument("--storage", help="also index playerData from this storage (firestore, sqlite:{path})")
+    parser.add_argument("--seasons", nargs="+", type=int, default=[time.localtime().tm_year],
+                        help="seasons whose MLB players get MLBAM IDs (needs MLB-StatsAPI)")
+    parser.add_argument("--search-missing", type=int, metavar="N",
+                        help="search Baseball-Reference for up to N players without an ID")
+    parser.add_argument("--per-minute", type=float, help="search requests per minute (default: the batch scraper's)")
+    args = parser.parse_args()
+
+    index = PlayerIndex(args.index)
+    if args.command == "lookup":
+        for name in args.names:
+            entry = index.lookup(name)
+            if entry:
+                print(f"{name}: {entry}")
+                continue
+            suggestions = ", ".join(f"{match['name']} {match.get('bbref_ids', [])}" for match in index.suggest(name))
+            print(f"{name}: not in the index" + (f"; did you mean {suggestions}?" if suggestions else ""))
+        sys.exit()
+
+    start = time.perf_counter()
+    if args.storage:
+        from game_storage import open_storage  # repo root, on sys.path via watermarks
+
+        print(f"playerData: {add_player_data(index, open_storage(args.storage))} names")
+    print(f"MLB seasons {', '.join(map(str, args.seasons))}: {add_mlbam_seasons(index, args.seasons)} players")
+    print(f"Cached search pages: {add_cached_searches(index)} IDs")
+    print(f"Watermarks: {add_watermarks(index)} players")
+    if args.search_missing:
+        print(f"Searched: {search_missing(index, args.search_missing, args.per_minute)} players")
+    index.save()
+    print(f"{len(index)} players in {args.index}, {len(index.missing('bbref_ids'))} without a "
+          f"Baseball-Reference ID, {len(index.missing('mlbam_ids'))} without an MLBAM ID "
+          f"({time.perf_counter() - start:.1f}s)")
@@ -1,5 +1,3 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
 import csv
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -11,20 +9,26 @@ import time
 from bs4 import BeautifulSoup
 import os
 import re
+import sys
 
-def get_firebase_key_path():
-    firebase_key_path = os.environ.get("FIREBASE_KEY_PATH")
-    if not firebase_key_path:
-        raise ValueError("No Firebase key path found. Please set FIREBASE_KEY_PATH in your environment or .env file.")
-    return firebase_key_path
+# game_storage lives at the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from game_storage import csv_game_rows, open_storage
+from http_cache import default_cache
+from player_index import bbref_id_from_player_url, default_index, player_url_for
+from table_extract import BATTING_PRE_ID, extract_element
+from watermarks import Watermarks, bbref_id_from_url
 
-def initialize_firebase():
-    firebase_key_path = get_firebase_key_path()
-    cred = credentials.Certificate(firebase_key_path)
-    firebase_admin.initialize_app(cred)
-    return firestore.client()
+def initialize_storage():
+    # GAME_STORAGE picks the backend (Firestore by default, or e.g. sqlite:game_storage.sqlite)
+    return open_storage()
 
 def search_player(player_name, driver):
+    # Players in the local ID index (player_index.py) need no search page
+    bbref_id = default_index().bbref_id(player_name)
+    if bbref_id:
+        return player_url_for(bbref_id)
+
     # Build the search URL
     search_url = f"https://www.baseball-reference.com/search/search.fcgi?search={player_name.replace(' ', '+')}"
     driver.get(search_url)
@@ -33,6 +37,7 @@ def search_player(player_name, driver):
 
     # Just return the current URL after search
     if (driver.current_url != search_url):
+        remember_player_url(player_name, driver.current_url)
         return driver.current_url
     
     # Try to find a link that matches the player's Baseball-Reference ID pattern
@@ -45,15 +50,21 @@ def search_player(player_name, driver):
         for link in links:
             href = link.get_attribute("href")
             if href and chars in href.lower():
+                remember_player_url(player_name, href)
                 return href
     
     # If no player found, return None
     print(f"No player found for {player_name}")
     return None
 
-def table_to_csv(soup, filename):
-    # Find the <pre> tag with the specific id
-    pre_tag = soup.find("pre", id="csv_players_standard_batting")
+def remember_player_url(player_name, player_url):
+    bbref_id = bbref_id_from_player_url(player_url)
+    if bbref_id:
+        default_index().remember(player_name, bbref_id=bbref_id)
+
+def table_to_csv(html, filename):
+    # Find the <pre> tag with the specific id, parsing only that element
+    pre_tag = extract_element(html, "pre", BATTING_PRE_ID)
     if not pre_tag:
         print(f"No <pre id='csv_players_standard_batting'> found for {filename}")
         return
@@ -73,8 +84,9 @@ def table_to_csv(soup, filename):
         for line in csv_lines:
             f.write(line + "\n")
     print(f"Saved CSV from <pre> tag: {filename}")
+    return filename
 
-def scrape_player_page_and_years(player_url, driver, player_name):
+def scrape_player_page_and_years(player_url, driver, player_name, storage=None, watermarks=None):
     driver.get(player_url)
     time.sleep(1)  # Reduced from 5 to 1
     soup = BeautifulSoup(driver.page_source, "html.parser")
@@ -105,71 +117,111 @@ def scrape_player_page_and_years(player_url, driver, player_name):
         if href and href not in visited:
             visited.add(href)
             full_url = "https://www.baseball-reference.com" + href
-            driver.get(full_url)
-            time.sleep(1)  # Reduced from 5 to 1.5
+            scrape_year(driver, full_url, a.text.strip(), player_name, storage, watermarks)
 
-            try:
-                # Try to close any pop-ups if present
-                close_btn_selectors = [
-                    "//div[contains(@class, 'closer')]"
-                ]
-                for selector in close_btn_selectors:
-                    try:
-                        close_btn = WebDriverWait(driver, 1).until(
-                            EC.element_to_be_clickable((By.XPATH, selector))
-                        )
-                        close_btn.click()
-                        time.sleep(0.5)
-                        print("Closed a pop-up window.")
-                        break
-                    except Exception:
-                        continue
-                wait = WebDriverWait(driver, 1)  # Reduced from 10 to 5
-                # 1. Wait for the "Share & Export" menu to be visible
-                share_export_menu = wait.until(
-                    EC.visibility_of_element_located(
-                        (By.XPATH, "//span[text()='Share & Export']")
-                    )
-                )
-                driver.execute_script(
-                    "arguments[0].scrollIntoView({block: 'center', inline: 'center'});", share_export_menu
-                )
-                time.sleep(0.5)  # Reduced from 1 to 0.5
+    # Combine all text into a single string
+    return "\n".join(combined_text)
+
+def scrape_year(driver, full_url, label, player_name, storage=None, watermarks=None):
+    cached = default_cache().fresh_html(full_url)
+    if cached is not None:
+        # A past season rendered on an earlier run; no browser needed
+        year_html = cached
+    else:
+        year_html = render_year_page(driver, full_url, label)
+    if year_html is not None:
+        save_year_csv(year_html, player_name, label, full_url, storage, watermarks)
+
+def scrape_player_incremental(driver, player_name, storage, watermarks):
+    # A player scraped before only needs this season's page; False if the
+    # player has no watermark yet
+    links = watermarks.incremental_links(player_name)
+    if links is None:
+        return False
+    for label, url in links:
+        scrape_year(driver, url, label, player_name, storage, watermarks)
+    return True
 
-                share_export_menu.click()
-                time.sleep(0.5)  # Reduced from 1 to 0.5
+def render_year_page(driver, full_url, label):
+    # Clicks "Share & Export" -> CSV so the page has the <pre> table_to_csv reads
+    driver.get(full_url)
+    time.sleep(1)  # Reduced from 5 to 1.5
 
-                # 2. Now look for the CSV button in the revealed dropdown
-                csv_button = wait.until(
-                    EC.element_to_be_clickable(
-                        (By.XPATH, "//button[@class='tooltip' and contains(@tip, 'comma-separated values')]")
-                    )
+    try:
+        # Try to close any pop-ups if present
+        close_btn_selectors = [
+            "//div[contains(@class, 'closer')]"
+        ]
+        for selector in close_btn_selectors:
+            try:
+                close_btn = WebDriverWait(driver, 1).until(
+                    EC.element_to_be_clickable((By.XPATH, selector))
                 )
-                driver.execute_script("arguments[0].scrollIntoView(true);", csv_button)
-                driver.execute_script("window.scrollBy(0, -100);")
-                time.sleep(0.5)
-                driver.execute_script("arguments[0].click();", csv_button)
+                close_btn.click()
                 time.sleep(0.5)
-                print(f"Clicked CSV button for {a.text.strip()}")
-            except Exception as e:
-                print(f"No CSV button found or could not click for {a.text.strip()}: {e}")
-                driver.save_screenshot("debug_click_error.png")
-                continue  # Skip to next year
-
-            # Parse the table and save as CSV
-            year_soup = BeautifulSoup(driver.page_source, "html.parser")
-            pre_tag = year_soup.find("pre", id="csv_players_standard_batting")
-            if not pre_tag:
-                print(f"No <pre id='csv_players_standard_batting'> found for {csv_filename}")
-                continue  # Skip to next year
-            label = a.text.strip().replace(" ", "_")
-            # Ensure the scraped_files directory exists
-            os.makedirs("scraped_files", exist_ok=True)
-            csv_filename = os.path.join("scraped_files", f"{player_name.replace(' ', '_')}_{label}.csv")
-            table_to_csv(year_soup, csv_filename)
+                print("Closed a pop-up window.")
+                break
+            except Exception:
+                continue
+        wait = WebDriverWait(driver, 1)  # Reduced from 10 to 5
+        # 1. Wait for the "Share & Export" menu to be visible
+        share_export_menu = wait.until(
+            EC.visibility_of_element_located(
+                (By.XPATH, "//span[text()='Share & Export']")
+            )
+        )
+        driver.execute_script(
+            "arguments[0].scrollIntoView({block: 'center', inline: 'center'});", share_export_menu
+        )
+        time.sleep(0.5)  # Reduced from 1 to 0.5
+
+        share_export_menu.click()
+        time.sleep(0.5)  # Reduced from 1 to 0.5
+
+        # 2. Now look for the CSV button in the revealed dropdown
+        csv_button = wait.until(
+            EC.element_to_be_clickable(
+                (By.XPATH, "//button[@class='tooltip' and contains(@tip, 'comma-separated values')]")
+            )
+        )
+        driver.execute_script("arguments[0].scrollIntoView(true);", csv_button)
+        driver.execute_script("window.scrollBy(0, -100);")
+        time.sleep(0.5)
+        driver.execute_script("arguments[0].click();", csv_button)
+        time.sleep(0.5)
+        print(f"Clicked CSV button for {label}")
+    except Exception as e:
+        print(f"No CSV button found or could not click for {label}: {e}")
+        driver.save_screenshot("debug_click_error.png")
+        return None
+
+    # The page HTML, parsed later for just the table
+    year_html = driver.page_source
+    if BATTING_PRE_ID not in year_html:
+        print(f"No <pre id='csv_players_standard_batting'> found for {label}")
+        return None
+    # Rendered pages are cached too, so a finished season is only clicked through once
+    default_cache().store(full_url, year_html, driver.current_url)
+    return year_html
+
+def save_year_csv(year_html, player_name, label, full_url, storage=None, watermarks=None):
+    label = label.replace(" ", "_")
+    # Ensure the scraped_files directory exists
+    os.makedirs("scraped_files", exist_ok=True)
+    csv_filename = os.path.join("scraped_files", f"{player_name.replace(' ', '_')}_{label}.csv")
+    if not table_to_csv(year_html, csv_filename):
+        return
+    upload = csv_filename
+    if watermarks is not None:
+        # Only the games since the last run go up, not the whole season again
+        upload = watermarks.record(player_name, csv_filename, bbref_id_from_url(full_url))
+    if storage is not None and upload:
+        # Same document IDs server.js gives the uploaded CSV rows
+        saved = storage.upsert_games(csv_game_rows([upload]))
+        print(f"Upserted {saved} games from {upload}")
+        if watermarks is not None:
+            os.remove(upload)  # uploaded; the next run starts a new delta
 
-    # Combine all text into a single string
-    return "\n".join(combined_text)
 def normalize_player_name(name):
         return name.lower().strip()
 
@@ -190,6 +242,14 @@ def main():
 
     player_name = input("Enter the player's name: ")
     player_name = normalize_player_name(player_name)
+
+    # Only write to gameStats when a backend is configured; otherwise the
+    # CSVs are uploaded by server.js as before
+    storage = initialize_storage() if os.environ.get("GAME_STORAGE") else None
+    watermarks = Watermarks()
+    if scrape_player_incremental(driver, player_name, storage, watermarks):
+        driver.quit()
+        return
     
     print(f"Searching for {player_name}...")
     player_url = search_player(player_name, driver)
@@ -198,7 +258,7 @@ def main():
         driver.quit()
         return
 
-    scrape_player_page_and_years(player_url, driver, player_name)
+    scrape_player_page_and_years(player_url, driver, player_name, storage, watermarks)
     driver.quit()
 
 if __name__ == "__main__":
@@ -0,0 +1,191 @@
+import argparse
+import itertools
+import sys
+
+from bs4 import BeautifulSoup, Comment, SoupStrainer
+
+# The "Get table as CSV" output a browser click leaves on the page, and the
+# table it is made from
+BATTING_PRE_ID = "csv_players_standard_batting"
+BATTING_TABLE_ID = "players_standard_batting"
+
+# Batting game-log pages in the HTTP cache
+GAME_LOG_URL_PREFIX = "https://www.baseball-reference.com/players/gl.fcgi"
+
+# Rendered game logs check_cached_pages compares at most
+CHECK_PAGES = 20
+
+
+def element_markup(html, tag, element_id):
+    # The <tag id="element_id">...</tag> markup cut straight out of the page
+    # text, or None. Works the same for elements shipped inside HTML comments;
+    # the tag must not nest (true of <pre> and of Baseball-Reference tables)
+    id_at = html.find(f'id="{element_id}"')
+    if id_at == -1:
+        return None
+    start = html.rfind(f"<{tag}", 0, id_at)
+    if start == -1 or html.find(">", start) < id_at:
+        return None  # the id belongs to some other element
+    end = html.find(f"</{tag}>", id_at)
+    if end == -1:
+        return None
+    return html[start:end + len(tag) + 3]
+
+
+def extract_element(html, tag, element_id):
+    # Parses only the one element instead of a 1 MB page. Falls back to a
+    # SoupStrainer parse, which still reads the whole page but only builds
+    # the matching element
+    if element_id not in html:
+        return None
+    markup = element_markup(html, tag, element_id)
+    if markup is not None:
+        element = BeautifulSoup(markup, "html.parser").find(tag, id=element_id)
+        if element is not None:
+            return element
+    strainer = SoupStrainer(tag, id=element_id)
+    return BeautifulSoup(html, "html.parser", parse_only=strainer).find(tag, id=element_id)
+
+
+def find_table(soup, table_id):
+    # Most tables below the first one are shipped inside HTML comments and
+    # uncommented by JavaScript, so without a browser they are comment text
+    table = soup.find("table", id=table_id)
+    if table is not None:
+        return table
+    marker = f'id="{table_id}"'
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        if marker in comment:
+            table = BeautifulSoup(comment, "html.parser").find("table", id=table_id)
+            if table is not None:
+                return table
+    return None
+
+
+def table_csv_lines(table):
+    # What the "Get table as CSV" button writes into the <pre>: the last header
+    # row, then every body and footer row except repeated headers, with
+    # spanned cells (e.g. trade notes) repeated once per column
+    header_rows = table.find("thead").find_all("tr") if table.find("thead") else []
+    rows = header_rows[-1:]
+    for section in table.find_all(["tbody", "tfoot"], recursive=False) or [table]:
+        rows.extend(tr for tr in section.find_all("tr", recursive=False)
+                    if "thead" not in (tr.get("class") or []))
+    lines = []
+    for tr in rows:
+        cells = []
+        for cell in tr.find_all(["th", "td"], recursive=False):
+            text = cell.get_text().replace("\xa0", " ").strip()
+            cells.extend([text] * int(cell.get("colspan", 1)))
+        lines.append(",".join(cells))
+    return lines
+
+
+def batting_csv_lines(page, from_table=False):
+    # The batting game log as CSV lines from page HTML (or an already parsed
+    # soup): the CSV-button <pre> a browser click leaves. The <pre> is the
+    # source of truth; only with from_table does a page without it (fetched
+    # over HTTP) fall back to serializing the table, which check_cached_pages
+    # compares with real <pre> pages. None when there is nothing to read
+    if isinstance(page, str):
+        pre_tag = extract_element(page, "pre", BATTING_PRE_ID)
+        table = None if pre_tag or not from_table else extract_element(page, "table", BATTING_TABLE_ID)
+    else:
+        pre_tag = page.find("pre", id=BATTING_PRE_ID)
+        table = None if pre_tag or not from_table else find_table(page, BATTING_TABLE_ID)
+    if pre_tag is not None:
+        return pre_tag.get_text().strip().splitlines()
+    if table is not None:
+        return table_csv_lines(table)
+    return None
+
+
+def csv_file_text(lines):
+    # What table_to_csv writes: everything from the "Rk," header row on
+    csv_start = next((i for i, line in enumerate(lines) if line.strip().startswith("Rk,")), 0)
+    return "\n".join(lines[csv_start:]) + "\n"
+
+# === Table vs <pre> ===
+
+
+def table_csv_mismatch(html, expected=None):
+    # The first line where the file written from the page's batting table
+    # differs from `expected` (the original CSV file's text; by default the
+    # page's own <pre>): (line number, expected line, table line), or None
+    # when the two are byte-for-byte equal
+    if expected is None:
+        lines = batting_csv_lines(html)
+        if lines is None:
+            raise ValueError(f"no <pre id='{BATTING_PRE_ID}'> to compare with")
+        expected = csv_file_text(lines)
+    table = extract_element(html, "table", BATTING_TABLE_ID)
+    if table is None:
+        raise ValueError(f"no <table id='{BATTING_TABLE_ID}'>")
+    actual = csv_file_text(table_csv_lines(table))
+    if actual == expected:
+        return None
+    pairs = itertools.zip_longest(expected.splitlines(keepends=True), actual.splitlines(keepends=True),
+                                  fillvalue="")
+    return next((number, want, got) for number, (want, got) in enumerate(pairs, 1) if want != got)
+
+
+def check_cached_pages(cache, limit=CHECK_PAGES):
+    # Checks the table serialization against the browser-rendered game logs
+    # in the HTTP cache (the Chrome scrapers only cache a season once its
+    # <pre> is on the page); returns (pages checked, [(url, mismatch)])
+    checked, failures = 0, []
+    for url in cache.urls(GAME_LOG_URL_PREFIX):
+        html = cache.lookup(url)["text"]
+        if f'id="{BATTING_PRE_ID}"' not in html or f'id="{BATTING_TABLE_ID}"' not in html:
+            continue
+        mismatch = table_csv_mismatch(html)
+        if mismatch:
+            failures.append((url, mismatch))
+        checked += 1
+        if checked == limit:
+            break
+    return checked, failures
+
+
+def print_mismatch(source, mismatch):
+    number, expected, actual = mismatch
+    print(f"{source}: line {number} differs\n  <pre>: {expected!r}\n  table: {actual!r}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check that the batting table serializes to the same CSV file as the browser's <pre>.")
+    parser.add_argument("pages", nargs="*", metavar="PAGE[=CSV]",
+                        help="saved game-log pages; with =CSV, compare with that original CSV file "
+                             "(e.g. page.html=other_files/jose_altuve_2024.csv) instead of the page's <pre>")
+    parser.add_argument("--cache", action="store_true", help="also check the rendered game logs in the HTTP cache")
+    args = parser.parse_args()
+
+    checked, failed = 0, 0
+    for page in args.pages:
+        page_path, _, csv_path = page.partition("=")
+        with open(page_path, encoding="utf-8") as f:
+            html = f.read()
+        expected = None
+        if csv_path:
+            with open(csv_path, encoding="utf-8", newline="") as f:
+                expected = f.read()
+        checked += 1
+        try:
+            mismatch = table_csv_mismatch(html, expected)
+        except ValueError as e:
+            print(f"{page_path}: {e}")
+            failed += 1
+            continue
+        if mismatch:
+            print_mismatch(page_path, mismatch)
+            failed += 1
+    if args.cache:
+        from http_cache import default_cache
+
+        cache_checked, failures = check_cached_pages(default_cache(), limit=None)
+        for url, mismatch in failures:
+            print_mismatch(url, mismatch)
+        checked, failed = checked + cache_checked, failed + len(failures)
+    print(f"{checked} pages checked, {failed} differ")
+    sys.exit(1 if failed or not checked else 0)
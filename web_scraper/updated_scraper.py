@@ -1,8 +1,11 @@
+import argparse
 import csv
 import os
 import re
 import random
 import time
+from urllib.parse import urljoin
+import requests
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -10,21 +13,53 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
+from http_cache import cached_get, default_cache
+from player_index import bbref_id_from_player_url, default_index, player_url_for
+from table_extract import (BATTING_PRE_ID, batting_csv_lines, check_cached_pages, csv_file_text,
+                           element_markup, print_mismatch)
+from watermarks import Watermarks, bbref_id_from_url
+
+BASE_URL = "https://www.baseball-reference.com"
 
 def normalize_player_name(name):
     return name.lower().strip()
 
-def table_to_csv(soup, filename):
-    pre_tag = soup.find("pre", id="csv_players_standard_batting")
-    if not pre_tag:
-        print(f"No <pre id='csv_players_standard_batting'> found for {filename}")
-        return
-    lines = pre_tag.get_text().strip().splitlines()
-    csv_start = next((i for i, line in enumerate(lines) if line.strip().startswith("Rk,")), 0)
-    csv_lines = lines[csv_start:]
+def fetch_soup(url, session=None):
+    # (soup, final URL after redirects) for a page fetched without a browser.
+    # Goes through the HTTP cache: past seasons are never fetched twice and
+    # other pages are revalidated with conditional requests
+    response = cached_get(url, session)
+    return BeautifulSoup(response.text, "html.parser"), response.url
+
+def table_to_csv(page, filename, from_table=False):
+    # A browser-rendered page has the <pre> the CSV button fills in; a page
+    # fetched over HTTP only has the table itself, which is only read with
+    # from_table (see table_csv_trusted). Pass the page HTML rather than a
+    # soup so only that element is parsed. Returns the file written, or None
+    lines = batting_csv_lines(page, from_table)
+    if lines is None:
+        missing = "<pre id='csv_players_standard_batting'> or batting table" if from_table else \
+            "<pre id='csv_players_standard_batting'>"
+        print(f"No {missing} found for {filename}")
+        return None
     with open(filename, "w", newline="", encoding="utf-8") as f:
-        f.write("\n".join(csv_lines) + "\n")
+        f.write(csv_file_text(lines))
     print(f"Saved CSV: {filename}")
+    return filename
+
+def table_csv_trusted():
+    # Without a browser there is no CSV button, so HTTP mode writes CSVs from
+    # the table. Only allowed while the table gives byte-for-byte the file the
+    # <pre> gives on the browser-rendered game logs in the HTTP cache
+    checked, failures = check_cached_pages(default_cache())
+    for url, mismatch in failures:
+        print_mismatch(url, mismatch)
+    if not checked:
+        print("No browser-rendered game log in the HTTP cache to check the table CSV against; "
+              "scrape a season with Chrome first (or run table_extract.py on a saved page)")
+    elif failures:
+        print("The batting table no longer serializes like the <pre>; use the Chrome scraper")
+    return checked > 0 and not failures
 
 def get_year_links(soup):
     year_links, seen_hrefs = [], set()
@@ -47,10 +82,12 @@ def close_popup_if_present(driver):
     except Exception:
         pass
 
-def click_share_export_and_csv(driver):
-    # Scroll until the "Share & Export" element is in view and clickable
+def click_share_export_and_csv(driver, max_scrolls=None):
+    # Scroll until the "Share & Export" element is in view and clickable;
+    # with max_scrolls, give up (re-raising) after that many tries
     actions = ActionChains(driver)
     actions.move_by_offset(100, 50).perform()
+    scrolls = 0
     while True:
         driver.execute_script("window.scrollBy(0, 1000);")
         try:
@@ -64,6 +101,9 @@ def click_share_export_and_csv(driver):
             print("Clicked 'Share & Export' successfully.")
             break  # Exit loop if successful
         except Exception:
+            scrolls += 1
+            if max_scrolls is not None and scrolls >= max_scrolls:
+                raise
             driver.execute_script("window.scrollBy(0, 1000);")  # Scroll down more and try again
 
 
@@ -81,20 +121,16 @@ def last_name_length(last_name):
         last_char_count = 5
     return last_char_count
 
-def search_player(player_name, driver):
-    search_url = f"https://www.baseball-reference.com/search/search.fcgi?search={player_name.replace(' ', '+')}"
-    driver.get(search_url)
-    if driver.current_url != search_url:
-        return driver.current_url
-    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+def search_url_for(player_name):
+    return f"https://www.baseball-reference.com/search/search.fcgi?search={player_name.replace(' ', '+')}"
+
+def matching_player_link(player_name, hrefs):
     parts = player_name.strip().split()
     href_list = []
     if len(parts) >= 2:
         first, last = parts[0], parts[1]
         chars = (last[:last_name_length(last)] + first[:2]).lower()  # e.g., "sotoju" for "Juan Soto"
-        links = driver.find_elements(By.TAG_NAME, "a")
-        for link in links:
-            href = link.get_attribute("href")
+        for href in hrefs:
             if href and chars in href.lower():
                 href_list.append(href)
     if href_list: #check if href_list is not empty
@@ -103,6 +139,43 @@ def search_player(player_name, driver):
     print(f"No player found for {player_name}") # If no matching link is found it will print this message
     return None
 
+def indexed_player_url(player_name):
+    # The player page from the local ID index (player_index.py), no search needed
+    bbref_id = default_index().bbref_id(player_name)
+    return player_url_for(bbref_id) if bbref_id else None
+
+def remember_player_url(player_name, player_url):
+    # So the next lookup of this name is answered by the index
+    bbref_id = bbref_id_from_player_url(player_url)
+    if bbref_id:
+        default_index().remember(player_name, bbref_id=bbref_id)
+    return player_url
+
+def search_player(player_name, driver):
+    player_url = indexed_player_url(player_name)
+    if player_url:
+        return player_url
+    search_url = search_url_for(player_name)
+    driver.get(search_url)
+    if driver.current_url != search_url:
+        return remember_player_url(player_name, driver.current_url)
+    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+    links = driver.find_elements(By.TAG_NAME, "a")
+    return remember_player_url(
+        player_name, matching_player_link(player_name, (link.get_attribute("href") for link in links)))
+
+def search_player_http(player_name, session=None):
+    player_url = indexed_player_url(player_name)
+    if player_url:
+        return player_url
+    # A unique match redirects straight to the player page
+    search_url = search_url_for(player_name)
+    soup, final_url = fetch_soup(search_url, session)
+    if final_url != search_url:
+        return remember_player_url(player_name, final_url)
+    links = (urljoin(BASE_URL, a["href"]) for a in soup.find_all("a", href=True))
+    return remember_player_url(player_name, matching_player_link(player_name, links))
+
 def load_player_page(driver, player_url):
     # Only load the player page if not already there
     if driver.current_url != player_url:
@@ -117,47 +190,139 @@ def load_year_page(driver, year_url):
         WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "head")))
     return None
 
-def scrape_player_page_and_years(player_url, driver, player_name):
+def season_csv_filename(player_name, label):
+    label = label.replace(" ", "_")
+    return os.path.join("scraped_files", f"{player_name.replace(' ', '_')}_{label}.csv")
+
+def save_season(html, player_name, label, url, watermarks=None, from_table=False):
+    # Writes the season CSV and, with watermarks, the games new since last run
+    csv_filename = table_to_csv(html, season_csv_filename(player_name, label), from_table)
+    if csv_filename and watermarks is not None:
+        watermarks.record(player_name, csv_filename, bbref_id_from_url(url))
+    return csv_filename
+
+def scrape_season_with_driver(driver, full_url, label, player_name, watermarks=None):
+    cached = default_cache().fresh_html(full_url)
+    if cached is not None and element_markup(cached, "pre", BATTING_PRE_ID) is not None:
+        # A past season already rendered on an earlier run
+        save_season(cached, player_name, label, full_url, watermarks)
+        return
+    load_year_page(driver, full_url)
+    try:
+        close_popup_if_present(driver)
+        click_share_export_and_csv(driver)
+        print(f"Clicked CSV button for {label}")
+    except Exception as e:
+        print(f"No CSV button found or could not click for {label}: {e}")
+        return
+    html = driver.page_source
+    if element_markup(html, "pre", BATTING_PRE_ID) is None:
+        print(f"No <pre id='csv_players_standard_batting'> found for {player_name}_{label}")
+        return
+    default_cache().store(full_url, html, driver.current_url)
+    # os.makedirs("scraped_files", exist_ok=True)
+    save_season(html, player_name, label, full_url, watermarks)
+    time.sleep(random.uniform(2, 6))  # Wait 2-6 seconds between requests to avoid overwhelming the server
+
+def scrape_season_http(full_url, label, player_name, session=None, watermarks=None):
+    try:
+        response = cached_get(full_url, session)
+    except (requests.RequestException, LookupError) as e:
+        print(f"Could not fetch {label}: {e}")
+        return
+    save_season(response.text, player_name, label, full_url, watermarks, from_table=True)
+    if not response.from_cache:
+        time.sleep(random.uniform(2, 6))  # Wait 2-6 seconds between requests to avoid overwhelming the server
+
+def scrape_player_page_and_years(player_url, driver, player_name, watermarks=None):
     soup = load_player_page(driver, player_url)
     WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
     year_links = get_year_links(soup)
     print("Year links found:", [href for _, href in year_links])
     for a, href in year_links:
-        full_url = "https://www.baseball-reference.com" + href
-        load_year_page(driver, full_url)
-        try:
-            close_popup_if_present(driver)
-            click_share_export_and_csv(driver)
-            print(f"Clicked CSV button for {a.text.strip()}")
-        except Exception as e:
-            print(f"No CSV button found or could not click for {a.text.strip()}: {e}")
-            continue
-        year_soup = BeautifulSoup(driver.page_source, "html.parser")
-        pre_tag = year_soup.find("pre", id="csv_players_standard_batting")
-        if not pre_tag:
-            print(f"No <pre id='csv_players_standard_batting'> found for {player_name}_{a.text.strip()}")
-            continue
-        label = a.text.strip().replace(" ", "_")
-        # os.makedirs("scraped_files", exist_ok=True)
-        csv_filename = os.path.join("scraped_files", f"{player_name.replace(' ', '_')}_{label}.csv")
-        table_to_csv(year_soup, csv_filename)
-        time.sleep(random.uniform(2, 6))  # Wait 2-6 seconds between requests to avoid overwhelming the server
+        scrape_season_with_driver(driver, BASE_URL + href, a.text.strip(), player_name, watermarks)
+
+def scrape_player_http(player_url, player_name, session=None, watermarks=None):
+    # Same CSVs as scrape_player_page_and_years, one GET per season instead
+    # of a browser loading, scrolling and clicking through each page
+    soup, _ = fetch_soup(player_url, session)
+    year_links = get_year_links(soup)
+    print("Year links found:", [href for _, href in year_links])
+    for a, href in year_links:
+        scrape_season_http(BASE_URL + href, a.text.strip(), player_name, session, watermarks)
+
+def scrape_player_incremental(player_name, watermarks, driver=None, session=None):
+    # For a player scraped before, only this season's page (and the postseason
+    # log in October and November); no search or player page. Returns False
+    # when the player has no watermark yet and needs the full scrape
+    links = watermarks.incremental_links(player_name)
+    if links is None:
+        return False
+    for label, url in links:
+        if driver is not None:
+            scrape_season_with_driver(driver, url, label, player_name, watermarks)
+        else:
+            scrape_season_http(url, label, player_name, session, watermarks)
+    return True
 
-def initialize_driver():
+def initialize_driver(headless=False):
     from selenium.webdriver.chrome.options import Options
     service = Service("C:/WebDriver/chromedriver.exe")
     chrome_options = Options()
     # Add any necessary options here
     chrome_options.add_argument("--start-maximized")  # Start Chrome maximized
-    # chrome_options.add_argument("--headless")  # Run Chrome in headless mode for faster loading
+    if headless:
+        # Same flags start.py runs Chrome with
+        chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--window-size=1920,1080")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.page_load_strategy = 'eager' # Or 'none' for faster loading
 
     driver = webdriver.Chrome(service=service, options=chrome_options)
     return driver
 
+def main_http(watermarks, full=False):
+    # Driverless mode: no Chrome, every page comes from the pooled session
+    if not table_csv_trusted():
+        return
+    while True:
+        try:
+            player_name = input("Enter the player's name (or 'exit' to quit): ")
+            if player_name.lower() == 'exit':
+                break
+            player_name = normalize_player_name(player_name)
+            if not full and scrape_player_incremental(player_name, watermarks):
+                continue
+            print(f"Searching for {player_name}...")
+            player_url = search_player_http(player_name)
+            if not player_url:
+                print(f"Player not found: {player_name}")
+                continue
+            scrape_player_http(player_url, player_name, watermarks=watermarks)
+        except (requests.RequestException, LookupError) as e:
+            print(f"Request failed: {e}")
+        except KeyboardInterrupt:
+            print("\nExiting...")
+            break
+
 def main():
+    parser = argparse.ArgumentParser(description="Save Baseball-Reference batting game logs as CSVs in scraped_files/.")
+    parser.add_argument("--http", action="store_true", help="fetch pages over HTTP instead of driving Chrome")
+    parser.add_argument("--offline", action="store_true",
+                        help="with --http, reparse pages from the HTTP cache without any requests")
+    parser.add_argument("--full", action="store_true",
+                        help="scrape every season even for players scraped before")
+    args = parser.parse_args()
+    default_cache().offline = args.offline
+    watermarks = Watermarks()
+
     # Ensure the scraped_files directory exists
     os.makedirs("scraped_files", exist_ok=True)
+    if args.http:
+        main_http(watermarks, args.full)
+        return
 
     # This loop allows the user to enter player names repeatedly
     # and scrape their data until they choose to exit.
@@ -168,12 +333,15 @@ def main():
             if player_name.lower() == 'exit':
                 break
             player_name = normalize_player_name(player_name)
+            if not args.full and scrape_player_incremental(player_name, watermarks, driver=driver):
+                driver.quit()
+                continue
             print(f"Searching for {player_name}...")
             player_url = search_player(player_name, driver)
             if not player_url:
                 print(f"Player not found: {player_name}")
                 continue
-            scrape_player_page_and_years(player_url, driver, player_name)
+            scrape_player_page_and_years(player_url, driver, player_name, watermarks)
             driver.quit() # Close the driver after scraping each player (to avoid memory leaks or browser issues)
         except KeyboardInterrupt:
             print("\nExiting...")
@@ -0,0 +1,136 @@
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+from urllib.parse import parse_qs, urlparse
+
+# game_log_store lives at the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from game_log_store import parse_csv_with_header_fix
+
+# Last game scraped per player, so later runs only fetch the current season
+DEFAULT_WATERMARK_PATH = "scrape_watermarks.json"
+
+# Each run's new rows, in files named like the season CSVs so uploading them
+# gives the same gameStats document IDs
+DELTA_DIR = os.path.join("scraped_files", "new_rows")
+
+# Months the postseason log can gain games
+POSTSEASON_MONTHS = (10, 11)
+
+GAME_LOG_URL = "https://www.baseball-reference.com/players/gl.fcgi?id={bbref_id}&t=b&{season}"
+
+
+def bbref_id_from_url(url):
+    # "/players/gl.fcgi?id=altuvjo01&t=b&year=2024" -> "altuvjo01"
+    return parse_qs(urlparse(url).query).get("id", [None])[0]
+
+
+def _pending_rows(delta_path):
+    # {Gcar: CSV line} of a delta file not uploaded yet
+    if not os.path.exists(delta_path):
+        return {}
+    with open(delta_path, encoding="utf-8") as f:
+        text = f.read()
+    lines = text.strip().split("\n")
+    rows = parse_csv_with_header_fix(text)
+    return {int(row["Gcar"]): lines[i + 1] for i, row in enumerate(rows) if row.get("Gcar", "").isdigit()}
+
+
+def _kind(csv_filename):
+    # Career game numbers (Gcar) restart for the postseason, so it has its own mark
+    return "postseason" if csv_filename.endswith("_Postseason.csv") else "regular"
+
+
+class Watermarks:
+    """{player: {"bbref_id", "regular": {"Date", "Gcar"}, "postseason": {...}}} in a JSON file.
+
+    record() is called with every season CSV saved: it adds the rows past
+    the player's mark to the season's file in DELTA_DIR and moves the mark
+    forward. A delta file keeps every row not yet uploaded, across runs,
+    until whatever uploads it deletes it (ingest_game_logs.py --consume,
+    or start.py after its upsert). New rows are judged against the marks
+    as loaded, so seasons recorded out of order (the batch scraper's
+    threads) still all get their deltas.
+    """
+
+    def __init__(self, path=DEFAULT_WATERMARK_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._marks = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._marks = json.load(f)
+        self._loaded = json.loads(json.dumps(self._marks))
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._marks, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def get(self, player_name):
+        with self._lock:
+            return self._marks.get(player_name)
+
+    def incremental_links(self, player_name, now=None):
+        # [(label, game-log URL)] for a player scraped before: this season, the
+        # season of the last game scraped if that was an earlier one (its last
+        # weeks may not have been scraped yet), and the postseason log in
+        # October and November. None if the player has never been scraped and
+        # needs the full run
+        mark = self.get(player_name)
+        if not mark or not mark.get("bbref_id"):
+            return None
+        now = now or datetime.now()
+        seasons = [now.year]
+        last_date = mark.get("regular", {}).get("Date", "")
+        if last_date[:4].isdigit() and int(last_date[:4]) < now.year:
+            seasons.insert(0, int(last_date[:4]))
+        links = [(str(season), GAME_LOG_URL.format(bbref_id=mark["bbref_id"], season=f"year={season}"))
+                 for season in seasons]
+        if now.month in POSTSEASON_MONTHS:
+            links.append(("Postseason", GAME_LOG_URL.format(bbref_id=mark["bbref_id"], season="year=0&post=1")))
+        return links
+
+    def record(self, player_name, csv_filename, bbref_id=None):
+        # Adds the season CSV's games past the mark to its file in DELTA_DIR
+        # and returns that file, or None when no games are waiting for upload
+        with open(csv_filename, encoding="utf-8") as f:
+            text = f.read()
+        lines = text.strip().split("\n")
+        rows = parse_csv_with_header_fix(text)  # rows[i] is lines[i + 1]
+
+        kind = _kind(csv_filename)
+        with self._lock:
+            entry = self._marks.setdefault(player_name, {})
+            if bbref_id:
+                entry["bbref_id"] = bbref_id
+            last_gcar = self._loaded.get(player_name, {}).get(kind, {}).get("Gcar", 0)
+
+            new = [i for i, row in enumerate(rows)
+                   if row.get("Gcar", "").isdigit() and int(row["Gcar"]) > last_gcar]
+            delta_path = os.path.join(DELTA_DIR, os.path.basename(csv_filename))
+            if not new:
+                self._save()
+                # Rows from an earlier run may still be waiting for upload
+                return delta_path if os.path.exists(delta_path) else None
+
+            newest = max((rows[i] for i in new), key=lambda row: int(row["Gcar"]))
+            if int(newest["Gcar"]) > entry.get(kind, {}).get("Gcar", 0):
+                entry[kind] = {"Date": newest.get("Date", ""), "Gcar": int(newest["Gcar"])}
+
+            # Rows not uploaded yet stay in the file; a game scraped again
+            # replaces its older line
+            pending = _pending_rows(delta_path)
+            pending.update((int(rows[i]["Gcar"]), lines[i + 1]) for i in new)
+            # Header, the games, then the totals line the upload parser drops
+            os.makedirs(DELTA_DIR, exist_ok=True)
+            tmp_path = f"{delta_path}.tmp"
+            with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+                f.write("\n".join([lines[0]] + [pending[gcar] for gcar in sorted(pending)] + [lines[-1]]) + "\n")
+            os.replace(tmp_path, delta_path)
+            self._save()
+        print(f"{len(new)} new games for {player_name}, {len(pending)} waiting for upload in {delta_path}")
+        return delta_path